@@ -1,48 +1,135 @@
 import os
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, List
 
-import celery
-from celery.schedules import crontab
 from pydantic_settings import BaseSettings
 
+if TYPE_CHECKING:
+    import celery
+
 
 class CeleryConfig(BaseSettings):
     broker_url: str
     result_backend: str
     DEFAULT_CELERY_QUEUE: str
+    SCORING_CELERY_QUEUES: str
     MAPS_SERVICE_WELLBORES_URL: str
 
+    @property
+    def scoring_queues(self) -> List[str]:
+        # Без отдельных очередей шарды пересчёта идут в очередь по умолчанию
+        queues = [queue.strip() for queue in self.SCORING_CELERY_QUEUES.split(",") if queue.strip()]
+        return queues or [self.DEFAULT_CELERY_QUEUE or "celery"]
+
 
 def get_settings_celery() -> CeleryConfig:
     return CeleryConfig(
         broker_url=os.getenv("CELERY_BROKER_URL", ""),
         result_backend=os.getenv("CELERY_RESULT_BACKEND", ""),
         DEFAULT_CELERY_QUEUE=os.getenv("DEFAULT_CELERY_QUEUE", ""),
+        SCORING_CELERY_QUEUES=os.getenv("SCORING_CELERY_QUEUES", ""),
         MAPS_SERVICE_WELLBORES_URL=os.getenv("MAPS_SERVICE_WELLBORES_URL", ""),
     )
 
 
 celery_config = get_settings_celery()
 
-celery_app = celery.Celery(
-    "src.app.config",
-    broker=celery_config.broker_url,
-    backend=celery_config.result_backend,
-    broker_connection_retry_on_startup=False,
-)
-
-celery_app.conf.timezone = "Asia/Novosibirsk"
-celery_app.conf.enable_utc = True
-
-
-celery_app.autodiscover_tasks(
-    [
-        "app.common",
-    ]
-)
-
-celery_app.conf.beat_schedule = {
-    "sample_heartbeat_task": {
-        "task": "app.common.sample_heartbeat",
-        "schedule": crontab(minute="*/5"),  # каждые 5 минут
-    },
-}
+
+def init_worker_process(**kwargs) -> None:
+    # Движок создаётся в каждом процессе пула после fork, а не наследуется от родителя
+    from app.database import init_sync_engine
+
+    init_sync_engine()
+
+
+def shutdown_worker_process(**kwargs) -> None:
+    from app.database import dispose_sync_engine
+
+    dispose_sync_engine()
+
+
+@lru_cache
+def get_celery_app() -> "celery.Celery":
+    """
+    Создаёт приложение Celery при первом обращении.
+
+    API импортирует задачи только в обработчиках, которые их ставят в очередь, поэтому
+    процесс uvicorn или CLI не тратит время запуска на Celery, пока он не понадобился.
+    """
+    import celery
+    from celery.schedules import crontab
+    from celery.signals import worker_process_init, worker_process_shutdown
+
+    from app.changes.handlers import connect_celery_signals as connect_changes_signals
+    from app.common.metrics import connect_celery_signals
+
+    celery_app = celery.Celery(
+        "src.app.config",
+        broker=celery_config.broker_url,
+        backend=celery_config.result_backend,
+        broker_connection_retry_on_startup=False,
+    )
+
+    celery_app.conf.timezone = "Asia/Novosibirsk"
+    celery_app.conf.enable_utc = True
+    # Воркер слушает только DEFAULT_CELERY_QUEUE, поэтому задачи по умолчанию отправляются туда же
+    celery_app.conf.task_default_queue = celery_config.DEFAULT_CELERY_QUEUE or "celery"
+    # Задачи длинные и нагружают CPU: процесс берёт следующую только после текущей,
+    # иначе заранее выбранные сообщения простаивают, пока соседние процессы свободны
+    celery_app.conf.worker_prefetch_multiplier = 1
+    celery_app.conf.task_routes = {
+        "app.scoring.score_risk_shard": {"queue": celery_config.scoring_queues[0]},
+    }
+
+    worker_process_init.connect(init_worker_process)
+    worker_process_shutdown.connect(shutdown_worker_process)
+    connect_celery_signals()
+    connect_changes_signals()
+
+    celery_app.autodiscover_tasks(
+        [
+            "app.common",
+            "app.export",
+            "app.ingest",
+            "app.peers",
+            "app.rollups",
+            "app.scoring",
+        ]
+    )
+
+    celery_app.conf.beat_schedule = {
+        "sample_heartbeat_task": {
+            "task": "app.common.sample_heartbeat",
+            "schedule": crontab(minute="*/5"),  # каждые 5 минут
+        },
+        "recompute_risk_scores_task": {
+            "task": "app.scoring.recompute_risk_scores",
+            "schedule": crontab(minute="*/5"),  # только изменившиеся сотрудники
+        },
+        "recompute_all_risk_scores_task": {
+            "task": "app.scoring.recompute_risk_scores",
+            "schedule": crontab(hour=3, minute=0),  # раз в сутки, чтобы учесть давность отпуска
+            "kwargs": {"full": True},
+        },
+        "refresh_peer_index_task": {
+            "task": "app.peers.refresh_peer_index",
+            "schedule": crontab(hour=3, minute=30),  # полная перестройка: стаж и возраст меняются со временем
+        },
+        "compute_peer_percentiles_task": {
+            "task": "app.peers.compute_peer_percentiles",
+            "schedule": crontab(hour=5, minute=0),  # после загрузок и пересчётов ночи
+        },
+        "export_kpi_snapshot_task": {
+            "task": "app.export.export_kpi_snapshot",
+            "schedule": crontab(hour=4, minute=0),  # изменения за сутки для обучения моделей
+        },
+    }
+    return celery_app
+
+
+def __getattr__(name: str) -> Any:
+    # `from app.celery import celery_app` и `celery -A app.celery` (ищет атрибут `app`)
+    # получают приложение, созданное при первом обращении
+    if name in ("celery_app", "app"):
+        return get_celery_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,132 @@
+"""
+Реакции на изменения `employees` и `employee_kpis`, о которых сообщают триггеры базы.
+
+В процессе API слушатель перестраивает индекс автодополнения ФИО и сбрасывает основу сценариев риска.
+В воркерах Celery события обрабатывает один процесс-лидер: сбрасывает кэш сотрудников и ставит
+в очередь пересчёт оценок и строк индекса коллег только изменившихся сотрудников и обновление агрегатов
+только изменившихся периодов.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.changes.listener import ChangeListener, ChangeSet, ListenerThread
+from app.common.cache import EMPLOYEES_NAMESPACE, bump_cache_version
+from app.config import setup_config
+
+logger = logging.getLogger(__name__)
+
+_worker_listener: Optional[ListenerThread] = None
+
+
+async def invalidate_employee_caches(changes: ChangeSet) -> None:
+    await asyncio.to_thread(bump_cache_version, EMPLOYEES_NAMESPACE)
+
+
+def changed_employees(changes: ChangeSet, kpi_year: int) -> Tuple[bool, Set[int]]:
+    """
+    Сотрудники, чьи атрибуты или KPI за `kpi_year` изменились: `(False, id)`, или `(True, пустое множество)`,
+    если id неизвестны и затронуты могут быть все.
+    """
+    kpis_changed = changes.kpi_periods_all or kpi_year in changes.kpi_years()
+    if changes.employees_all or (kpis_changed and changes.kpis_all):
+        return True, set()
+    employee_ids: Set[int] = set(changes.employee_ids)
+    if kpis_changed:
+        employee_ids |= changes.kpi_employee_ids
+    return False, employee_ids
+
+
+def _rescore(changes: ChangeSet) -> None:
+    from app.scoring.tasks import recompute_employee_scores_task, recompute_risk_scores_task
+
+    scoring_config = setup_config().scoring
+    kpi_year = scoring_config.scoring_kpi_year
+    full, employee_ids = changed_employees(changes, kpi_year)
+    if full:
+        # Id неизвестны: изменившихся найдёт обычный пересчёт по отметке времени
+        recompute_risk_scores_task.delay(kpi_year=kpi_year)
+        return
+    ordered = sorted(employee_ids)
+    for start in range(0, len(ordered), scoring_config.scoring_batch_size):
+        recompute_employee_scores_task.delay(kpi_year, ordered[start : start + scoring_config.scoring_batch_size])
+
+
+async def rescore_changed_employees(changes: ChangeSet) -> None:
+    await asyncio.to_thread(_rescore, changes)
+
+
+def _refresh_rollups(changes: ChangeSet) -> None:
+    from app.rollups.tasks import refresh_kpi_rollups_task
+
+    months_by_year: Dict[int, Optional[List[int]]] = defaultdict(list)
+    for year, month in changes.kpi_periods:
+        months_by_year[year].append(month)
+    if changes.employees_updated_all or changes.updated_employee_ids or changes.kpi_periods_all:
+        # Когорты строятся по атрибутам сотрудников, поэтому их изменение затрагивает все месяцы.
+        # Новые и удалённые сотрудники меняют только месяцы своих KPI, которые уже есть в kpi_periods
+        months_by_year[setup_config().scoring.scoring_kpi_year] = None
+    for year, months in months_by_year.items():
+        refresh_kpi_rollups_task.delay(year, months)
+
+
+async def refresh_changed_rollups(changes: ChangeSet) -> None:
+    await asyncio.to_thread(_refresh_rollups, changes)
+
+
+def _refresh_peers(changes: ChangeSet) -> None:
+    from app.peers.tasks import refresh_peer_index_task
+
+    scoring_config = setup_config().scoring
+    kpi_year = scoring_config.scoring_kpi_year
+    full, employee_ids = changed_employees(changes, kpi_year)
+    if full or len(employee_ids) > scoring_config.scoring_batch_size:
+        # Id неизвестны или их больше, чем стоит передавать в сообщении: индекс строится заново
+        refresh_peer_index_task.delay(kpi_year)
+    elif employee_ids:
+        refresh_peer_index_task.delay(kpi_year, sorted(employee_ids))
+
+
+async def refresh_changed_peers(changes: ChangeSet) -> None:
+    await asyncio.to_thread(_refresh_peers, changes)
+
+
+def create_api_listener() -> ChangeListener:
+    from app.employees.search import name_index
+    from app.simulation.engine import baseline_cache
+
+    listener = ChangeListener("api")
+    listener.subscribe(name_index.on_changes)
+    listener.subscribe(baseline_cache.on_changes)
+    return listener
+
+
+def _on_worker_ready(**kwargs: Any) -> None:
+    global _worker_listener
+    if not setup_config().changes.changes_listener_enabled:
+        return
+    listener = ChangeListener("celery", leader=True)
+    listener.subscribe(invalidate_employee_caches)
+    listener.subscribe(rescore_changed_employees)
+    listener.subscribe(refresh_changed_rollups)
+    if setup_config().peers.peers_enabled:
+        listener.subscribe(refresh_changed_peers)
+    _worker_listener = ListenerThread(listener)
+    _worker_listener.start()
+
+
+def _on_worker_shutdown(**kwargs: Any) -> None:
+    if _worker_listener is not None:
+        _worker_listener.stop()
+
+
+def connect_celery_signals() -> None:
+    """
+    Запускает слушатель изменений в главном процессе воркера Celery.
+    """
+    from celery.signals import worker_ready, worker_shutdown
+
+    worker_ready.connect(_on_worker_ready, weak=False)
+    worker_shutdown.connect(_on_worker_shutdown, weak=False)
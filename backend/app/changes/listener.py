@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+import asyncpg
+import orjson
+
+from app.config import setup_config
+
+logger = logging.getLogger(__name__)
+
+# Канал уведомлений триггеров notify_rows_changed (см. миграцию d7a4c2e81b56)
+CHANGES_CHANNEL = "burnout_changes"
+# Только один процесс среди воркеров Celery реагирует на изменения (ключ пересчёта - 7_301_002)
+CHANGES_LEADER_LOCK_KEY = 7_301_006
+LISTENER_RETRY_SECONDS = 5.0
+
+
+@dataclass
+class ChangeSet:
+    """
+    Изменения, накопленные за окно ожидания. `*_all` - изменилась вся таблица или слишком много строк,
+    чтобы перечислять id (слияние загрузки, TRUNCATE).
+    """
+
+    employee_ids: Set[int] = field(default_factory=set)
+    employees_all: bool = False
+    # Сотрудники, у которых изменились атрибуты (UPDATE, TRUNCATE), а не только появились или удалены
+    updated_employee_ids: Set[int] = field(default_factory=set)
+    employees_updated_all: bool = False
+    kpi_employee_ids: Set[int] = field(default_factory=set)
+    kpis_all: bool = False
+    # Периоды KPI (год, месяц)
+    kpi_periods: Set[Tuple[int, int]] = field(default_factory=set)
+    # KPI изменились за неизвестные периоды (TRUNCATE)
+    kpi_periods_all: bool = False
+    events: int = 0
+
+    def __bool__(self) -> bool:
+        return self.events > 0
+
+    def add(self, payload: str) -> None:
+        event = orjson.loads(payload)
+        self.events += 1
+        ids = event.get("ids")
+        if event["table"] == "employees":
+            updated = event.get("op") in ("update", "truncate")
+            if ids is None:
+                self.employees_all = True
+                self.employees_updated_all = self.employees_updated_all or updated
+            else:
+                self.employee_ids.update(ids)
+                if updated:
+                    self.updated_employee_ids.update(ids)
+        elif event["table"] == "employee_kpis":
+            if ids is None:
+                self.kpis_all = True
+            else:
+                self.kpi_employee_ids.update(ids)
+            periods = event.get("periods")
+            if periods is None:
+                self.kpi_periods_all = True
+            else:
+                self.kpi_periods.update(divmod(period, 100) for period in periods)
+
+    def kpi_years(self) -> Set[int]:
+        return {year for year, _ in self.kpi_periods}
+
+
+Subscriber = Callable[[ChangeSet], Awaitable[None]]
+
+
+class ChangeListener:
+    """
+    Долгоживущее соединение asyncpg с LISTEN на `CHANGES_CHANNEL`. Уведомления копятся в `ChangeSet`
+    и передаются подписчикам, когда `CHANGES_DEBOUNCE_MS` не приходит новых, но не реже
+    чем раз в `CHANGES_MAX_DELAY_MS`: слияние загрузки присылает сотни уведомлений в одном коммите,
+    а подписчики получают их одним набором.
+
+    С `leader=True` события обрабатывает только процесс, получивший advisory-блокировку, остальные
+    ждут её освобождения - так реакции воркеров Celery не выполняются по разу на каждый контейнер.
+    """
+
+    def __init__(self, name: str, leader: bool = False) -> None:
+        self.name = name
+        self.leader = leader
+        self.subscribers: List[Subscriber] = []
+        self._pending = ChangeSet()
+        self._first_event_at: Optional[float] = None
+        self._last_event_at = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        self.subscribers.append(subscriber)
+
+    async def start(self) -> None:
+        config = setup_config()
+        if config.changes.changes_listener_enabled and self._task is None:
+            if config.db.db_pgbouncer and not config.changes.changes_listen_dsn:
+                logger.warning(
+                    "DB_PGBOUNCER включён, но CHANGES_LISTEN_DSN не задан: LISTEN через PgBouncer "
+                    "в режиме transaction не получает уведомлений"
+                )
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name=f"changes-listener-{self.name}")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _on_notification(self, connection: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            self._pending.add(payload)
+        except (ValueError, KeyError, TypeError) as exc:
+            logger.warning("Некорректное уведомление об изменениях %r: %s", payload, exc)
+            return
+        now = time.monotonic()
+        self._last_event_at = now
+        if self._first_event_at is None:
+            self._first_event_at = now
+        assert self._wakeup is not None
+        self._wakeup.set()
+
+    async def _connect(self) -> asyncpg.Connection:
+        # LISTEN держит соединение, поэтому нужен прямой доступ к Postgres, а не PgBouncer в режиме transaction
+        config = setup_config()
+        connection = await asyncpg.connect(config.changes.changes_listen_dsn or config.db.sync_dsn)
+        if self.leader:
+            while not await connection.fetchval("SELECT pg_try_advisory_lock($1)", CHANGES_LEADER_LOCK_KEY):
+                await asyncio.sleep(LISTENER_RETRY_SECONDS)
+        await connection.add_listener(CHANGES_CHANNEL, self._on_notification)
+        if self.leader:
+            # Прежний лидер мог не успеть обработать накопленные изменения, а до подписки уведомления
+            # этому процессу не доставлялись
+            self._mark_all_changed()
+        return connection
+
+    def _mark_all_changed(self) -> None:
+        self._pending = ChangeSet(
+            employees_all=True, employees_updated_all=True, kpis_all=True, kpi_periods_all=True, events=1
+        )
+        self._first_event_at = self._last_event_at = time.monotonic()
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            connection: Optional[asyncpg.Connection] = None
+            try:
+                connection = await self._connect()
+                logger.info("Слушатель изменений %s подписан на %s", self.name, CHANGES_CHANNEL)
+                await self._dispatch_loop(connection)
+            except asyncio.CancelledError:
+                raise
+            except (asyncpg.PostgresError, OSError) as exc:
+                logger.warning("Слушатель изменений %s отключён: %s", self.name, exc)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            # Уведомления, пришедшие пока соединения не было, потеряны: подписчики обрабатывают всё заново
+            self._mark_all_changed()
+            await asyncio.sleep(LISTENER_RETRY_SECONDS)
+
+    async def _dispatch_loop(self, connection: asyncpg.Connection) -> None:
+        assert self._wakeup is not None
+        changes_config = setup_config().changes
+        debounce = changes_config.changes_debounce_ms / 1000
+        max_delay = changes_config.changes_max_delay_ms / 1000
+        while not connection.is_closed():
+            if self._first_event_at is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), LISTENER_RETRY_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            now = time.monotonic()
+            due = min(self._last_event_at + debounce, self._first_event_at + max_delay)
+            if now < due:
+                await asyncio.sleep(due - now)
+                continue
+            changes, self._pending, self._first_event_at = self._pending, ChangeSet(), None
+            await self._dispatch(changes)
+
+    async def _dispatch(self, changes: ChangeSet) -> None:
+        for subscriber in self.subscribers:
+            try:
+                await subscriber(changes)
+            except Exception:
+                logger.exception("Подписчик изменений %s завершился с ошибкой", subscriber)
+
+
+class ListenerThread:
+    """
+    Слушатель в отдельном потоке со своим циклом событий - для процессов без asyncio, например
+    главного процесса воркера Celery.
+    """
+
+    def __init__(self, listener: ChangeListener) -> None:
+        self.listener = listener
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=f"changes-{self.listener.name}", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        assert self._loop is not None
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self.listener.start())
+        self._loop.run_forever()
+
+    def stop(self) -> None:
+        if self._loop is None or self._thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.listener.stop(), self._loop).result(timeout=10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+        self._thread = None
@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import orjson
+import redis
+import redis.asyncio as aioredis
+
+from app.config import CacheConfig, setup_config
+
+logger = logging.getLogger(__name__)
+
+# Пространства имён кэша: версия пространства увеличивается, когда меняются данные,
+# от которых зависят закэшированные в нём ответы
+EMPLOYEES_NAMESPACE = "employees"
+ROLLUPS_NAMESPACE = "rollups"
+SCORES_NAMESPACE = "scores"
+
+VERSION_KEY = "cache:version:{namespace}"
+ENTRY_KEY = "cache:{namespace}:v{version}:{key}"
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Пока один процесс считает значение, остальные ждут его в Redis, а не идут в базу
+LOCK_TTL_MS = 30_000
+LOCK_WAIT_SECONDS = 10.0
+LOCK_POLL_SECONDS = 0.05
+LISTENER_RETRY_SECONDS = 5.0
+
+
+@dataclass
+class CacheStats:
+    local_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    errors: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class LocalLRU:
+    """
+    Ограниченный по размеру кэш в памяти процесса с временем жизни записей.
+    """
+
+    def __init__(self, max_items: int) -> None:
+        self.max_items = max_items
+        self._items: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        item = self._items.get(key)
+        if item is None:
+            return False, None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._items[key]
+            return False, None
+        self._items.move_to_end(key)
+        return True, value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        if self.max_items <= 0:
+            return
+        self._items[key] = (time.monotonic() + ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+class ResponseCache:
+    """
+    Двухуровневый кэш ответов: LRU в памяти процесса перед Redis.
+
+    Ключи содержат версию пространства имён, поэтому после `bump_cache_version` старые записи
+    просто перестают читаться. Версии хранятся локально и обновляются по сообщениям из канала
+    `INVALIDATION_CHANNEL`; пока подписка не работает, версия читается из Redis на каждый запрос.
+    Одновременные промахи по одному ключу внутри процесса объединяются в одно вычисление,
+    между процессами - через короткую блокировку в Redis.
+    """
+
+    def __init__(self, config: CacheConfig) -> None:
+        self.enabled = config.cache_enabled and bool(config.cache_redis_url)
+        self.redis: Optional[aioredis.Redis] = aioredis.from_url(config.cache_redis_url) if self.enabled else None
+        self.local = LocalLRU(config.cache_local_max_items)
+        self.stats = CacheStats()
+        self._versions: Dict[str, int] = {}
+        self._versions_synced = False
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+        self._listener: Optional["asyncio.Task[None]"] = None
+
+    async def start(self) -> None:
+        if self.redis is not None and self._listener is None:
+            self._listener = asyncio.create_task(self._listen(), name="cache-invalidation-listener")
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self.redis is not None:
+            await self.redis.aclose()
+
+    async def _listen(self) -> None:
+        assert self.redis is not None
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    # Сначала подписка, потом чтение версий: так не теряются изменения между ними
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    self._versions.clear()
+                    self._versions_synced = True
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        namespace, _, version = message["data"].decode().rpartition(":")
+                        self._versions[namespace] = max(self._versions.get(namespace, 0), int(version))
+            except asyncio.CancelledError:
+                raise
+            except (redis.RedisError, OSError, ValueError) as exc:
+                logger.warning("Подписка на инвалидацию кэша прервана: %s", exc)
+            self._versions_synced = False
+            self._versions.clear()
+            await asyncio.sleep(LISTENER_RETRY_SECONDS)
+
+    async def version(self, namespace: str) -> int:
+        assert self.redis is not None
+        if self._versions_synced and namespace in self._versions:
+            return self._versions[namespace]
+        version = int(await self.redis.get(VERSION_KEY.format(namespace=namespace)) or 0)
+        if self._versions_synced:
+            self._versions[namespace] = max(self._versions.get(namespace, 0), version)
+        return version
+
+    async def get_or_compute(
+        self,
+        namespace: str,
+        key: str,
+        ttl: float,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Возвращает значение из кэша или вычисляет его. Значение хранится в JSON-совместимом виде.
+        Недоступность Redis не ломает запрос - значение просто вычисляется.
+        """
+        if self.redis is None:
+            return await compute()
+        try:
+            version = await self.version(namespace)
+        except redis.RedisError as exc:
+            self.stats.errors += 1
+            logger.warning("Кэш недоступен: %s", exc)
+            return await compute()
+
+        entry_key = ENTRY_KEY.format(namespace=namespace, version=version, key=key)
+        found, value = self.local.get(entry_key)
+        if found:
+            self.stats.local_hits += 1
+            return value
+
+        inflight = self._inflight.get(entry_key)
+        if inflight is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        future: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+        self._inflight[entry_key] = future
+        try:
+            value = await self._load(entry_key, ttl, compute)
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Исключение уже пробрасывается вызывающему, ожидающих может не быть
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[entry_key]
+
+    async def _load(self, entry_key: str, ttl: float, compute: Callable[[], Awaitable[Any]]) -> Any:
+        # bump_cache_version вызывают загрузчик и воркеры, которым FastAPI при импорте не нужен
+        from fastapi.encoders import jsonable_encoder
+
+        assert self.redis is not None
+        lock_key = f"{entry_key}:lock"
+        acquired = False
+        try:
+            raw = await self.redis.get(entry_key)
+            if raw is None:
+                acquired = bool(await self.redis.set(lock_key, b"1", nx=True, px=LOCK_TTL_MS))
+                if not acquired:
+                    raw = await self._wait_for_value(entry_key)
+            if raw is not None:
+                self.stats.redis_hits += 1
+                value = orjson.loads(raw)
+                self.local.set(entry_key, value, ttl)
+                return value
+        except redis.RedisError as exc:
+            self.stats.errors += 1
+            logger.warning("Кэш недоступен: %s", exc)
+
+        self.stats.misses += 1
+        try:
+            value = jsonable_encoder(await compute())
+            self.local.set(entry_key, value, ttl)
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                pipe.set(entry_key, orjson.dumps(value), px=int(ttl * 1000))
+                if acquired:
+                    pipe.delete(lock_key)
+                await pipe.execute()
+                acquired = False
+            except redis.RedisError as exc:
+                self.stats.errors += 1
+                logger.warning("Не удалось сохранить значение в кэш: %s", exc)
+            return value
+        finally:
+            # Если вычисление упало или отменено, остальные процессы не должны ждать блокировку до истечения TTL
+            if acquired:
+                await self._release_lock(lock_key)
+
+    async def _release_lock(self, lock_key: str) -> None:
+        assert self.redis is not None
+        try:
+            await self.redis.delete(lock_key)
+        except redis.RedisError as exc:
+            self.stats.errors += 1
+            logger.warning("Не удалось снять блокировку кэша: %s", exc)
+
+    async def _wait_for_value(self, entry_key: str) -> Optional[bytes]:
+        assert self.redis is not None
+        deadline = time.monotonic() + LOCK_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_SECONDS)
+            raw = await self.redis.get(entry_key)
+            if raw is not None:
+                return raw
+        return None
+
+
+response_cache = ResponseCache(setup_config().cache)
+
+
+def _key_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def make_cache_key(func: Callable[..., Any], kwargs: Dict[str, Any]) -> str:
+    """
+    Ключ из имени функции и простых аргументов. Зависимости вроде сессии БД в ключ не входят.
+    """
+    params = {
+        name: _key_value(value)
+        for name, value in sorted(kwargs.items())
+        if isinstance(value, (str, int, float, bool, Enum)) or value is None or hasattr(value, "isoformat")
+    }
+    digest = hashlib.md5(orjson.dumps(params)).hexdigest()
+    return f"{func.__module__}.{func.__qualname__}:{digest}"
+
+
+def cached(namespace: str, ttl: float) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """
+    Кэширует результат асинхронного обработчика FastAPI на `ttl` секунд в пространстве `namespace`.
+
+    Декоратор ставится под `@router.get(...)`; сигнатура обработчика сохраняется, поэтому
+    FastAPI по-прежнему разбирает параметры и зависимости. Из кэша возвращается JSON-совместимое
+    значение, которое затем проверяется по `response_model`.
+    """
+
+    def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            key = make_cache_key(func, kwargs)
+            return await response_cache.get_or_compute(namespace, key, ttl, lambda: func(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+def bump_cache_version(*namespaces: str) -> None:
+    """
+    Увеличивает версии пространств имён после фиксации изменений в базе и оповещает процессы API.
+    Вызывается из загрузчика и фоновых задач; ошибка Redis не прерывает вызывающую сторону.
+    """
+    config = setup_config().cache
+    if not config.cache_redis_url or not namespaces:
+        return
+    client = redis.Redis.from_url(config.cache_redis_url)
+    try:
+        for namespace in namespaces:
+            version = client.incr(VERSION_KEY.format(namespace=namespace))
+            client.publish(INVALIDATION_CHANNEL, f"{namespace}:{version}")
+    except redis.RedisError as exc:
+        logger.warning("Не удалось обновить версию кэша %s: %s", ", ".join(namespaces), exc)
+    finally:
+        client.close()
@@ -0,0 +1,282 @@
+import logging
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+from app.config import MetricsConfig, setup_config
+
+logger = logging.getLogger(__name__)
+
+# Для длинных запросов и задач: от миллисекунд до десятков минут
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 1800.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса до отправки последнего байта ответа",
+    ("method", "route", "status"),
+    buckets=LATENCY_BUCKETS,
+)
+SQL_STATEMENT_SECONDS = Histogram(
+    "sql_statement_duration_seconds",
+    "Время выполнения SQL-выражения",
+    ("engine", "operation"),
+    buckets=LATENCY_BUCKETS,
+)
+SQL_ROWS = Counter(
+    "sql_rows_total",
+    "Строки, возвращённые или изменённые SQL-выражениями",
+    ("engine", "operation"),
+)
+CELERY_TASK_SECONDS = Histogram(
+    "celery_task_duration_seconds",
+    "Время выполнения Celery-задачи",
+    ("task", "state"),
+    buckets=LATENCY_BUCKETS,
+)
+CELERY_QUEUE_WAIT_SECONDS = Histogram(
+    "celery_task_queue_wait_seconds",
+    "Время от отправки Celery-задачи до начала её выполнения",
+    ("task",),
+    buckets=LATENCY_BUCKETS,
+)
+LOADER_ROWS = Counter("loader_rows_total", "Строки CSV, прочитанные загрузчиком", ("mode",))
+LOADER_EMPLOYEES = Counter(
+    "loader_employees_total",
+    "Сотрудники, записанные загрузчиком",
+    ("mode", "result"),
+)
+LOADER_KPIS = Counter("loader_kpis_total", "Значения KPI, записанные загрузчиком", ("mode",))
+LOADER_SECONDS = Counter("loader_seconds_total", "Время работы загрузчика", ("mode",))
+PREDICT_BATCH_REQUESTS = Histogram(
+    "predict_batch_requests",
+    "HTTP-запросы, объединённые в одну пачку прогнозов",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+PREDICT_BATCH_ITEMS = Histogram(
+    "predict_batch_items",
+    "Сотрудники в одной пачке прогнозов",
+    buckets=(1, 4, 16, 64, 256, 1024, 4096, 16384),
+)
+PREDICT_BATCH_SECONDS = Histogram(
+    "predict_batch_duration_seconds",
+    "Время расчёта пачки прогнозов",
+    buckets=LATENCY_BUCKETS,
+)
+EVENTS_RECEIVED = Counter("events_received_total", "Строки NDJSON кадровых событий", ("result",))
+EVENTS_FLUSH_ROWS = Histogram(
+    "events_flush_rows",
+    "Кадровые события в одном COPY",
+    buckets=(1, 10, 100, 500, 1000, 2500, 5000, 10000, 25000),
+)
+EVENTS_FLUSH_SECONDS = Histogram(
+    "events_flush_duration_seconds",
+    "Время записи пачки кадровых событий",
+    buckets=LATENCY_BUCKETS,
+)
+EVENTS_BACKPRESSURE_SECONDS = Counter(
+    "events_backpressure_seconds_total",
+    "Время, которое запросы ждали места в очереди записи кадровых событий",
+)
+DB_READ_SESSIONS = Counter(
+    "db_read_sessions_total",
+    "Сессии чтения по серверу, на который они направлены",
+    ("target",),
+)
+
+# Заголовок сообщения Celery с моментом отправки задачи
+PUBLISHED_AT_HEADER = "published_at"
+# Длина выражения и параметров в журнале медленных запросов
+SLOW_QUERY_LOG_LIMIT = 2000
+
+
+def _metrics_config() -> MetricsConfig:
+    return setup_config().metrics
+
+
+def _collector_registry() -> CollectorRegistry:
+    # Если задан PROMETHEUS_MULTIPROC_DIR, значения собираются со всех процессов, пишущих в этот каталог
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Метрики процесса (или всех процессов в режиме multiprocess) в текстовом формате Prometheus.
+    """
+    return generate_latest(_collector_registry()), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware с гистограммой длительности запросов по шаблону маршрута.
+
+    Шаблон (`/employees/{employee_id}/risk`), а не фактический путь, ограничивает число рядов.
+    Запрос считается завершённым после отправки тела, поэтому потоковые ответы учитываются целиком.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status_code),
+            ).observe(time.perf_counter() - started)
+
+
+def _statement_operation(statement: str) -> str:
+    parts = statement.lstrip().split(None, 1)
+    return parts[0].upper() if parts else "UNKNOWN"
+
+
+def instrument_engine(engine: Any, engine_name: str) -> None:
+    """
+    Подписывает синхронный движок SQLAlchemy (для асинхронного - `engine.sync_engine`)
+    на замер времени выражений и журнал медленных запросов.
+    """
+    from sqlalchemy import event
+
+    slow_query_seconds = _metrics_config().metrics_slow_query_ms / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn: Any, *args: Any) -> None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, *args: Any) -> None:
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        operation = _statement_operation(statement)
+        SQL_STATEMENT_SECONDS.labels(engine=engine_name, operation=operation).observe(elapsed)
+        rowcount = getattr(cursor, "rowcount", -1)
+        if rowcount is not None and rowcount > 0:
+            SQL_ROWS.labels(engine=engine_name, operation=operation).inc(rowcount)
+        if slow_query_seconds > 0 and elapsed >= slow_query_seconds:
+            logger.warning(
+                "Медленный запрос (%s, %.0f мс): %s; параметры: %s",
+                engine_name,
+                elapsed * 1000,
+                statement[:SLOW_QUERY_LOG_LIMIT],
+                repr(parameters)[:SLOW_QUERY_LOG_LIMIT],
+            )
+
+
+def record_load(
+    mode: str,
+    rows_read: int,
+    employees_inserted: int,
+    employees_changed: int,
+    kpis_written: int,
+    elapsed: float,
+) -> None:
+    """
+    Счётчики пропускной способности загрузчика CSV.
+    """
+    LOADER_ROWS.labels(mode=mode).inc(rows_read)
+    LOADER_EMPLOYEES.labels(mode=mode, result="inserted").inc(employees_inserted)
+    LOADER_EMPLOYEES.labels(mode=mode, result="changed").inc(employees_changed)
+    LOADER_KPIS.labels(mode=mode).inc(kpis_written)
+    LOADER_SECONDS.labels(mode=mode).inc(elapsed)
+
+
+def record_predict_batch(requests: int, items: int, elapsed: float) -> None:
+    PREDICT_BATCH_REQUESTS.observe(requests)
+    PREDICT_BATCH_ITEMS.observe(items)
+    PREDICT_BATCH_SECONDS.observe(elapsed)
+
+
+def record_events_request(accepted: int, rejected: int, backpressure: float) -> None:
+    EVENTS_RECEIVED.labels(result="accepted").inc(accepted)
+    EVENTS_RECEIVED.labels(result="rejected").inc(rejected)
+    EVENTS_BACKPRESSURE_SECONDS.inc(backpressure)
+
+
+def record_events_flush(rows: int, elapsed: float) -> None:
+    EVENTS_FLUSH_ROWS.observe(rows)
+    EVENTS_FLUSH_SECONDS.observe(elapsed)
+
+
+def record_read_session(target: str) -> None:
+    DB_READ_SESSIONS.labels(target=target).inc()
+
+
+_task_started: Dict[str, float] = {}
+
+
+def _on_before_task_publish(headers: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+    if headers is not None:
+        headers.setdefault(PUBLISHED_AT_HEADER, time.time())
+
+
+def _on_task_prerun(task_id: str, task: Any, **kwargs: Any) -> None:
+    _task_started[task_id] = time.perf_counter()
+    # В протоколе сообщений Celery 2 дополнительные заголовки становятся атрибутами запроса
+    published_at = getattr(task.request, PUBLISHED_AT_HEADER, None)
+    if published_at is None:
+        published_at = (task.request.headers or {}).get(PUBLISHED_AT_HEADER)
+    if published_at is not None:
+        CELERY_QUEUE_WAIT_SECONDS.labels(task=task.name).observe(max(time.time() - float(published_at), 0.0))
+
+
+def _on_task_postrun(task_id: str, task: Any, state: Optional[str] = None, **kwargs: Any) -> None:
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        CELERY_TASK_SECONDS.labels(task=task.name, state=state or "UNKNOWN").observe(time.perf_counter() - started)
+
+
+def _on_worker_ready(**kwargs: Any) -> None:
+    # Процессы пула пишут метрики в PROMETHEUS_MULTIPROC_DIR, главный процесс воркера их отдаёт
+    port = _metrics_config().metrics_worker_port
+    if port <= 0:
+        return
+    start_http_server(port, registry=_collector_registry())
+    logger.info("Метрики воркера Celery доступны на порту %d", port)
+
+
+def _on_worker_process_shutdown(pid: Optional[int] = None, **kwargs: Any) -> None:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+def connect_celery_signals() -> None:
+    """
+    Подписывает метрики на сигналы Celery: время в очереди, время выполнения и HTTP-сервер воркера.
+    """
+    from celery.signals import before_task_publish, task_postrun, task_prerun, worker_process_shutdown, worker_ready
+
+    before_task_publish.connect(_on_before_task_publish, weak=False)
+    task_prerun.connect(_on_task_prerun, weak=False)
+    task_postrun.connect(_on_task_postrun, weak=False)
+    worker_ready.connect(_on_worker_ready, weak=False)
+    worker_process_shutdown.connect(_on_worker_process_shutdown, weak=False)
@@ -1,12 +1,17 @@
-from celery.result import AsyncResult
-from fastapi import APIRouter
+from typing import Any, Dict, List
 
-from ..celery import celery_app
-from .schema import CeleryResponse, CeleryResponseTaskStatus
-from .tasks import sample_heartbeat
+from fastapi import APIRouter, Query
+from fastapi.responses import Response, StreamingResponse
+
+from ..database import pool_status
+from .cache import response_cache
+from .metrics import render_metrics
+from .schema import CeleryResponse, CeleryResponseTaskStatus, CeleryTaskStatusBatchRequest
+from .task_status import get_task_statuses, stream_task_events
 
 base_router = APIRouter(prefix="/base", tags=["base"])
 task_stats_router = APIRouter(prefix="/tasks", tags=["tasks"])
+metrics_router = APIRouter(tags=["metrics"])
 
 
 @base_router.get("/foo")
@@ -14,6 +19,29 @@ async def foo() -> str:
     return "foo"
 
 
+@base_router.get(
+    "/cache/stats",
+    summary="Счётчики попаданий и промахов кэша ответов",
+)
+async def get_cache_stats() -> Dict[str, int]:
+    """
+    Возвращает счётчики кэша ответов текущего процесса API.
+    """
+    return response_cache.stats.as_dict()
+
+
+@base_router.get(
+    "/db/pool",
+    summary="Состояние пулов соединений с базой",
+)
+async def get_db_pool_status() -> Dict[str, Any]:
+    """
+    Возвращает занятые и свободные соединения, переполнение пула и время ожидания соединения
+    для текущего процесса API.
+    """
+    return pool_status()
+
+
 @base_router.post(
     "/heartbeat",
     response_model=CeleryResponse,
@@ -23,10 +51,54 @@ async def run_heartbeat_task() -> CeleryResponse:
     """
     Ручной запуск простой Celery-задачи.
     """
+    # Модуль задач создаёт приложение Celery, поэтому импортируется при первом вызове
+    from .tasks import sample_heartbeat
+
     task = sample_heartbeat.delay()
     return CeleryResponse(task_id=task.id, status=task.status)
 
 
+@metrics_router.get(
+    "/metrics",
+    summary="Метрики процесса API в формате Prometheus",
+    include_in_schema=False,
+)
+async def get_metrics() -> Response:
+    """
+    Гистограммы времени HTTP-запросов, SQL-выражений, счётчики строк и загрузчика CSV.
+    """
+    content, media_type = render_metrics()
+    return Response(content=content, media_type=media_type)
+
+
+@task_stats_router.post(
+    "/batch",
+    response_model=List[CeleryResponseTaskStatus],
+    summary="Получение статусов нескольких Celery-задач",
+)
+async def get_task_statuses_batch(payload: CeleryTaskStatusBatchRequest) -> List[CeleryResponseTaskStatus]:
+    """
+    Возвращает статусы задач в порядке `task_ids` одним запросом к Redis.
+    """
+    return await get_task_statuses(payload.task_ids)
+
+
+@task_stats_router.get(
+    "/events",
+    summary="Поток изменений статусов Celery-задач (Server-Sent Events)",
+)
+async def task_events(task_id: List[str] = Query(..., max_length=100)) -> StreamingResponse:
+    """
+    Отправляет событие `status` с текущим состоянием каждой задачи, затем при каждом изменении
+    состояния или прогресса. Поток закрывается, когда все задачи завершились.
+    """
+    return StreamingResponse(
+        stream_task_events(task_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @task_stats_router.get(
     "/{task_id}",
     response_model=CeleryResponseTaskStatus,
@@ -35,12 +107,7 @@ async def run_heartbeat_task() -> CeleryResponse:
 async def get_task_status(task_id: str) -> CeleryResponseTaskStatus:
     """
     Возвращает статус Celery-задачи по её `task_id`.
+    Промежуточный прогресс долгих задач отдаётся в поле `progress`.
     """
-    result = AsyncResult(task_id, app=celery_app)
-    # result.result может быть не сериализуемым, поэтому возвращаем только при успешном выполнении
-    payload_result = result.result if result.successful() else None
-    return CeleryResponseTaskStatus(
-        task_id=task_id,
-        status=result.status,
-        result=payload_result,
-    )
+    (status,) = await get_task_statuses([task_id])
+    return status
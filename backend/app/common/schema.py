@@ -1,15 +1,20 @@
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+# Идентификаторы сотрудников в базе и хранилищах признаков - integer (int32)
+MAX_EMPLOYEE_ID = 2_147_483_647
 
 
 class CeleryTaskStatus(str, Enum):
     PENDING = "PENDING"
     STARTED = "STARTED"
+    PROGRESS = "PROGRESS"
     RETRY = "RETRY"
     SUCCESS = "SUCCESS"
     FAILURE = "FAILURE"
+    REVOKED = "REVOKED"
 
 
 class CeleryResponse(BaseModel):
@@ -17,7 +22,12 @@ class CeleryResponse(BaseModel):
     status: CeleryTaskStatus
 
 
+class CeleryTaskStatusBatchRequest(BaseModel):
+    task_ids: List[str] = Field(min_length=1, max_length=1000)
+
+
 class CeleryResponseTaskStatus(BaseModel):
     task_id: str
     status: CeleryTaskStatus
     result: Optional[Any] = None
+    progress: Optional[Dict[str, Any]] = None
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+import redis.asyncio as aioredis
+from celery import states
+
+from ..celery import celery_config, get_celery_app
+from .schema import CeleryResponseTaskStatus, CeleryTaskStatus
+
+# Комментарий SSE, чтобы прокси не закрывали соединение без событий
+SSE_HEARTBEAT_SECONDS = 15.0
+
+_client: Optional[aioredis.Redis] = None
+
+
+def get_result_client() -> aioredis.Redis:
+    """
+    Асинхронный клиент Redis, в котором Celery хранит результаты задач.
+    """
+    global _client
+    if _client is None:
+        _client = aioredis.from_url(celery_config.result_backend)
+    return _client
+
+
+async def close_result_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def task_meta_key(task_id: str) -> bytes:
+    # Под этим же именем бэкенд публикует каждое сохранённое состояние
+    return get_celery_app().backend.get_key_for_task(task_id)
+
+
+def parse_task_meta(task_id: str, raw: Optional[bytes]) -> CeleryResponseTaskStatus:
+    """
+    Разбирает сохранённые бэкендом метаданные задачи так же, как `AsyncResult`:
+    неизвестная задача считается PENDING, результат отдаётся только при успехе.
+    """
+    if raw is None:
+        return CeleryResponseTaskStatus(task_id=task_id, status=CeleryTaskStatus.PENDING)
+    meta: Dict[str, Any] = get_celery_app().backend.decode(raw)
+    status = meta.get("status", states.PENDING)
+    result = meta.get("result")
+    return CeleryResponseTaskStatus(
+        task_id=task_id,
+        status=status,
+        result=result if status == states.SUCCESS else None,
+        progress=result if status == CeleryTaskStatus.PROGRESS and isinstance(result, dict) else None,
+    )
+
+
+async def get_task_statuses(task_ids: Sequence[str]) -> List[CeleryResponseTaskStatus]:
+    """
+    Получает статусы задач одним MGET без блокировки цикла событий.
+    """
+    if not task_ids:
+        return []
+    raw_values = await get_result_client().mget([task_meta_key(task_id) for task_id in task_ids])
+    return [parse_task_meta(task_id, raw) for task_id, raw in zip(task_ids, raw_values)]
+
+
+def format_sse(status: CeleryResponseTaskStatus) -> bytes:
+    return f"event: status\ndata: {status.model_dump_json()}\n\n".encode()
+
+
+async def stream_task_events(task_ids: Sequence[str]) -> AsyncIterator[bytes]:
+    """
+    Отправляет текущие статусы задач, а затем каждое новое состояние и прогресс по мере их сохранения.
+    Поток завершается, когда все задачи перешли в конечное состояние.
+    """
+    task_ids = list(dict.fromkeys(task_ids))
+    pending = set(task_ids)
+    key_to_task = {task_meta_key(task_id).decode(): task_id for task_id in task_ids}
+
+    async with get_result_client().pubsub() as pubsub:
+        # Подписываемся до чтения текущих статусов, чтобы не потерять переход между ними
+        await pubsub.subscribe(*key_to_task)
+        for status in await get_task_statuses(task_ids):
+            yield format_sse(status)
+            if status.status.value in states.READY_STATES:
+                pending.discard(status.task_id)
+
+        while pending:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=SSE_HEARTBEAT_SECONDS)
+            if message is None:
+                yield b": keep-alive\n\n"
+                continue
+            task_id = key_to_task.get(message["channel"].decode())
+            if task_id is None or task_id not in pending:
+                continue
+            status = parse_task_meta(task_id, message["data"])
+            yield format_sse(status)
+            if status.status.value in states.READY_STATES:
+                pending.discard(task_id)
@@ -1,8 +1,14 @@
 import os
-from typing import Optional
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
 
 from pydantic_settings import BaseSettings
 
+BASE_DIR: str = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Схемы DSN реплик, которые понимает asyncpg
+READ_DSN_SCHEMES = ("postgresql", "postgres", "postgresql+asyncpg")
+
 
 class DatabaseConfig(BaseSettings):
     db_host: Optional[str] = "localhost"
@@ -12,6 +18,24 @@ class DatabaseConfig(BaseSettings):
     postgres_password: Optional[str] = "postgres"
     postgres_db: Optional[str] = "burnout_db"
 
+    # Пул соединений на процесс: при нескольких воркерах uvicorn/Celery итог умножается на их число
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # Сколько соединений открыть при старте процесса
+    db_pool_warmup: int = 1
+    # Подключение через PgBouncer в режиме transaction: без кэша подготовленных выражений asyncpg
+    db_pgbouncer: bool = False
+    # Реплики для чтения (DSN через запятую); пусто - все запросы идут на основной сервер
+    db_read_dsns: str = ""
+    # Реплика с отставанием больше порога не получает запросы, пока не догонит основной сервер
+    db_replica_max_lag_seconds: float = 5.0
+    db_replica_check_seconds: float = 2.0
+    # Сколько после записи чтения того же запроса идут на основной сервер (читать свои записи)
+    db_sticky_primary_seconds: float = 2.0
+
     class Config:
         env_prefix = ""
 
@@ -19,14 +43,213 @@ class DatabaseConfig(BaseSettings):
     def dsn(self) -> str:
         return f"postgresql+asyncpg://{self.postgres_user}:{self.postgres_password}@{self.db_host}:{self.postgres_connection_port}/{self.postgres_db}"
 
+    @property
+    def asyncpg_connect_args(self) -> Dict[str, Any]:
+        if not self.db_pgbouncer:
+            return {}
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            # PgBouncer может отдать соединение другого клиента, поэтому имена выражений не должны повторяться
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+
+    @property
+    def read_dsns(self) -> List[str]:
+        """
+        DSN реплик для asyncpg. Схемы postgresql://, postgres:// и postgresql+asyncpg:// приводятся
+        к postgresql+asyncpg://, другие (например, драйвер psycopg2) - ошибка настройки.
+        """
+        dsns = []
+        for dsn in self.db_read_dsns.split(","):
+            scheme, separator, rest = dsn.strip().partition("://")
+            if not scheme:
+                continue
+            if not separator or scheme not in READ_DSN_SCHEMES:
+                raise ValueError(
+                    f"DB_READ_DSNS: неподдерживаемая схема {scheme.split(':')[0]!r}, "
+                    f"ожидается одна из {', '.join(f'{name}://' for name in READ_DSN_SCHEMES)}"
+                )
+            dsns.append(f"postgresql+asyncpg://{rest}")
+        return dsns
+
     @property
     def sync_dsn(self) -> str:
         return f"postgresql://{self.postgres_user}:{self.postgres_password}@{self.db_host}:{self.postgres_connection_port}/{self.postgres_db}"
 
 
+class IngestConfig(BaseSettings):
+    ingest_upload_dir: str = os.path.join(BASE_DIR, "uploads")
+    ingest_chunk_mb: int = 32
+
+    class Config:
+        env_prefix = ""
+
+
+class ScoringConfig(BaseSettings):
+    scoring_kpi_year: int = 2025
+    # Сколько сотрудников пересчитывается за одну транзакцию
+    scoring_batch_size: int = 50_000
+    # Сколько сотрудников в одном шарде полного пересчёта; шарды выполняются параллельно на воркерах
+    scoring_shard_size: int = 100_000
+    # Шардированный пересчёт занимает задачу до сведения итогов; если chord потерян, занятость снимается
+    # по истечении этого срока
+    scoring_full_lease_seconds: float = 6 * 60 * 60
+
+    class Config:
+        env_prefix = ""
+
+
+class CacheConfig(BaseSettings):
+    # По умолчанию используется тот же Redis, что и у Celery
+    cache_redis_url: str = os.getenv("CELERY_RESULT_BACKEND", "")
+    cache_enabled: bool = True
+    # Сколько ответов держать в памяти процесса перед Redis
+    cache_local_max_items: int = 1024
+
+    class Config:
+        env_prefix = ""
+
+
+class KPIStorageConfig(BaseSettings):
+    # Поддерживать employee_kpi_years (12 значений года в одной строке) при каждой загрузке
+    # и читать KPI для оценки риска из неё
+    kpi_compact_enabled: bool = False
+
+    class Config:
+        env_prefix = ""
+
+
+class MetricsConfig(BaseSettings):
+    # Выражения дольше порога пишутся в журнал вместе с параметрами (0 - не писать)
+    metrics_slow_query_ms: float = 500.0
+    # Порт HTTP-сервера метрик главного процесса воркера Celery (0 - не запускать)
+    metrics_worker_port: int = 0
+
+    class Config:
+        env_prefix = ""
+
+
+class ExportConfig(BaseSettings):
+    export_dir: str = os.path.join(BASE_DIR, "exports")
+    # Сколько сотрудников читается из курсора и пишется за раз (одна группа строк Parquet)
+    export_batch_size: int = 50_000
+    # parquet - сжатые файлы; arrow - несжатый Arrow IPC, который читается через mmap без копирования
+    export_format: str = "parquet"
+
+    class Config:
+        env_prefix = ""
+
+
+class FeatureStoreConfig(BaseSettings):
+    # Каталог должен быть общим для воркеров Celery, которые публикуют версии, и воркеров API.
+    # На tmpfs (например, /dev/shm/burnout) версии не попадают на диск
+    feature_store_dir: str = os.path.join(BASE_DIR, "features")
+    # Публиковать новую версию после каждого пересчёта оценок риска
+    feature_store_enabled: bool = True
+    # Сколько последних версий хранить для воркеров, ещё не переключившихся на новую
+    feature_store_keep_versions: int = 2
+    # Как часто воркер API проверяет, не опубликована ли новая версия
+    feature_store_check_seconds: float = 1.0
+
+    class Config:
+        env_prefix = ""
+
+
+class ServingConfig(BaseSettings):
+    # Файл pickle обученной модели с интерфейсом scikit-learn; пусто - формула оценки риска
+    serving_model_path: str = ""
+    # Пачка прогнозов закрывается по числу сотрудников или по времени ожидания с первого запроса
+    serving_batch_max_items: int = 256
+    serving_batch_max_wait_ms: float = 5.0
+
+    class Config:
+        env_prefix = ""
+
+
+class SearchConfig(BaseSettings):
+    # Минимальное сходство (word_similarity) для попадания в результаты поиска по ФИО
+    search_similarity_threshold: float = 0.5
+    # Индекс автодополнения ФИО в памяти каждого процесса API (на 1M сотрудников - около 100 МБ)
+    search_prefix_index_enabled: bool = True
+    # Без Redis версия данных неизвестна, и индекс перестраивается по времени
+    search_prefix_refresh_seconds: float = 300.0
+
+    class Config:
+        env_prefix = ""
+
+
+class ChangesConfig(BaseSettings):
+    # Слушать уведомления триггеров об изменениях сотрудников и KPI (процессы API и воркеры Celery)
+    changes_listener_enabled: bool = True
+    # Уведомления копятся, пока между ними меньше этой паузы, но не дольше максимальной задержки
+    changes_debounce_ms: float = 500.0
+    changes_max_delay_ms: float = 5000.0
+    # DSN для LISTEN напрямую к Postgres в обход PgBouncer (postgresql://...); пусто - DB_HOST и порт базы
+    changes_listen_dsn: str = ""
+
+    class Config:
+        env_prefix = ""
+
+
+class EventsConfig(BaseSettings):
+    # Событий в одном COPY: пачки запросов объединяются, пока не наберётся столько строк
+    events_batch_rows: int = 5000
+    # Неполная пачка записывается не позже чем через это время
+    events_flush_ms: float = 200.0
+    # Пачек в очереди писателя: при заполнении запросы перестают читать тело, пока запись не догонит
+    events_queue_batches: int = 8
+    # Строка NDJSON длиннее этого отклоняет весь запрос
+    events_max_line_bytes: int = 64 * 1024
+    # События старше этого отклоняются: секции за давние месяцы создаются только вручную
+    events_max_age_days: int = 400
+
+    class Config:
+        env_prefix = ""
+
+
+class SimulationConfig(BaseSettings):
+    # Основа сценариев перечитывается из базы не реже, даже без уведомлений об изменениях
+    simulation_baseline_ttl_seconds: float = 600.0
+    # Строк (сотрудник x сценарий) в одном расчёте: ограничивает память промежуточных массивов
+    simulation_max_rows: int = 500_000
+
+    class Config:
+        env_prefix = ""
+
+
+class PeersConfig(BaseSettings):
+    # Как и каталог хранилища признаков, должен быть общим для воркеров Celery и воркеров API
+    peers_dir: str = os.path.join(BASE_DIR, "peers")
+    # Перестраивать индекс коллег после загрузок и изменений сотрудников
+    peers_enabled: bool = True
+    peers_keep_versions: int = 2
+    peers_check_seconds: float = 1.0
+    # Ближайших коллег, с которыми сравнивается KPI сотрудника в пакетном расчёте процентилей
+    peers_group_size: int = 50
+    # Элементов матрицы расстояний в одной пачке пакетного расчёта (4 байта каждый)
+    peers_block_cells: int = 16_000_000
+
+    class Config:
+        env_prefix = ""
+
+
 class Config:
     db: DatabaseConfig = DatabaseConfig()
-    BASE_DIR: str = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    ingest: IngestConfig = IngestConfig()
+    scoring: ScoringConfig = ScoringConfig()
+    cache: CacheConfig = CacheConfig()
+    kpi_storage: KPIStorageConfig = KPIStorageConfig()
+    metrics: MetricsConfig = MetricsConfig()
+    export: ExportConfig = ExportConfig()
+    feature_store: FeatureStoreConfig = FeatureStoreConfig()
+    serving: ServingConfig = ServingConfig()
+    search: SearchConfig = SearchConfig()
+    changes: ChangesConfig = ChangesConfig()
+    events: EventsConfig = EventsConfig()
+    simulation: SimulationConfig = SimulationConfig()
+    peers: PeersConfig = PeersConfig()
+    BASE_DIR: str = BASE_DIR
 
 
 def setup_config() -> Config:
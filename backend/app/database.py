@@ -1,19 +1,410 @@
+import asyncio
+import itertools
+import logging
+import re
+import time
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
 from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
 
-from sqlalchemy import DateTime, func
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy import DateTime, Engine, event, exc, func, text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import ORMExecuteState
+from sqlalchemy.orm import Session as OrmSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.sql.elements import TextClause
 from sqlmodel import Field, Session, SQLModel, create_engine
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.config import setup_config
+from app.common.metrics import instrument_engine, record_read_session
+from app.config import DatabaseConfig, setup_config
 
-DATABASE_URL = setup_config().db.dsn
-SYNC_DATABASE_URL = setup_config().db.sync_dsn
-engine = create_async_engine(DATABASE_URL)
-sync_engine = create_engine(SYNC_DATABASE_URL)
-async_session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-session_maker = sessionmaker(sync_engine, class_=Session, expire_on_commit=False)
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PoolMetrics:
+    """
+    Накопительные счётчики выдачи соединений из пула.
+    """
+
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+
+class InstrumentedPoolMixin:
+    """
+    Замеряет, сколько запрос ждал соединение из пула (включая открытие нового соединения).
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self) -> Any:
+        started = time.perf_counter()
+        try:
+            return super()._do_get()  # type: ignore[misc]
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.metrics.checkouts += 1
+            self.metrics.wait_seconds_total += waited
+            self.metrics.wait_seconds_max = max(self.metrics.wait_seconds_max, waited)
+
+    def status_dict(self) -> Dict[str, Any]:
+        return {
+            "size": self.size(),  # type: ignore[attr-defined]
+            "checked_in": self.checkedin(),  # type: ignore[attr-defined]
+            "checked_out": self.checkedout(),  # type: ignore[attr-defined]
+            "overflow": max(self.overflow(), 0),  # type: ignore[attr-defined]
+            **asdict(self.metrics),
+        }
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+# Фабрики сессий привязываются к движкам при их создании
+async_session_maker = async_sessionmaker(class_=AsyncSession, expire_on_commit=False)
+session_maker = sessionmaker(class_=Session, expire_on_commit=False)
+
+_engine: Optional[AsyncEngine] = None
+_sync_engine: Optional[Engine] = None
+
+
+def _pool_options(config: DatabaseConfig) -> Dict[str, Any]:
+    return {
+        "pool_size": config.db_pool_size,
+        "max_overflow": config.db_max_overflow,
+        "pool_timeout": config.db_pool_timeout,
+        "pool_recycle": config.db_pool_recycle,
+        "pool_pre_ping": config.db_pool_pre_ping,
+    }
+
+
+def get_engine() -> AsyncEngine:
+    """
+    Асинхронный движок процесса. Создаётся в lifespan приложения или при первом обращении.
+    """
+    global _engine
+    if _engine is None:
+        config = setup_config().db
+        _engine = create_async_engine(
+            config.dsn,
+            poolclass=InstrumentedAsyncQueuePool,
+            connect_args=config.asyncpg_connect_args,
+            **_pool_options(config),
+        )
+        instrument_engine(_engine.sync_engine, "async")
+        async_session_maker.configure(bind=_engine)
+    return _engine
+
+
+def get_sync_engine() -> Engine:
+    """
+    Синхронный движок процесса. Создаётся при старте процесса воркера Celery или при первом обращении.
+    """
+    global _sync_engine
+    if _sync_engine is None:
+        config = setup_config().db
+        _sync_engine = create_engine(config.sync_dsn, poolclass=InstrumentedQueuePool, **_pool_options(config))
+        instrument_engine(_sync_engine, "sync")
+        session_maker.configure(bind=_sync_engine)
+    return _sync_engine
+
+
+async def init_engine() -> AsyncEngine:
+    """
+    Создаёт асинхронный движок и заранее открывает `db_pool_warmup` соединений,
+    чтобы первые запросы не ждали подключения к базе.
+    """
+    engine = get_engine()
+    warmup = min(setup_config().db.db_pool_warmup, engine.pool.size())
+
+    async def ping() -> None:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(warmup)))
+    logger.info("Пул соединений с базой готов: открыто %d", warmup)
+    return engine
+
+
+def init_sync_engine() -> Engine:
+    """
+    Синхронный аналог `init_engine`.
+    """
+    engine = get_sync_engine()
+    warmup = min(setup_config().db.db_pool_warmup, engine.pool.size())
+    connections = [engine.connect() for _ in range(warmup)]
+    for connection in connections:
+        connection.execute(text("SELECT 1"))
+        connection.close()
+    return engine
+
+
+async def dispose_engines() -> None:
+    """
+    Закрывает соединения обоих движков, если они создавались.
+    """
+    global _engine, _sync_engine
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+    dispose_sync_engine()
+
+
+def dispose_sync_engine() -> None:
+    global _sync_engine
+    if _sync_engine is not None:
+        _sync_engine.dispose()
+        _sync_engine = None
+
+
+def pool_status() -> Dict[str, Any]:
+    """
+    Текущее состояние пулов соединений процесса: занятые, свободные, переполнение и ожидание,
+    а также доступность и отставание реплик для чтения.
+    """
+    return {
+        "async": _engine.pool.status_dict() if _engine is not None else None,  # type: ignore[attr-defined]
+        "sync": _sync_engine.pool.status_dict() if _sync_engine is not None else None,  # type: ignore[attr-defined]
+        "replicas": replica_router.status(),
+    }
+
+
+# Отставание реплики в секундах; без новых записей на основном сервере
+# pg_last_xact_replay_timestamp стоит на месте, поэтому при совпадении LSN отставание нулевое
+REPLICA_LAG_SQL = """
+SELECT
+    pg_is_in_recovery(),
+    CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0.0
+        ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())::float
+    END
+"""
+
+# Текстовые выражения, которые не меняют данные
+READ_STATEMENT_RE = re.compile(r"^\s*(SELECT|WITH|SHOW|EXPLAIN)\b", re.IGNORECASE)
+ROUTING_INFO_KEY = "routing"
+
+
+@dataclass
+class ReplicaState:
+    name: str
+    engine: AsyncEngine
+    healthy: bool = False
+    lag_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+    def status_dict(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "error": self.error,
+            "pool": self.engine.pool.status_dict(),  # type: ignore[attr-defined]
+        }
+
+
+class ReplicaRouter:
+    """
+    Реплики для чтения процесса API. Фоновая проверка раз в `DB_REPLICA_CHECK_SECONDS` отмечает
+    недоступные реплики и реплики с отставанием больше `DB_REPLICA_MAX_LAG_SECONDS`;
+    сессии чтения раздаются по кругу между остальными.
+    """
+
+    def __init__(self) -> None:
+        self.replicas: List[ReplicaState] = []
+        self._counter = itertools.count()
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    async def start(self) -> None:
+        config = setup_config().db
+        if self.replicas or not config.read_dsns:
+            return
+        for number, dsn in enumerate(config.read_dsns, start=1):
+            engine = create_async_engine(
+                dsn,
+                poolclass=InstrumentedAsyncQueuePool,
+                connect_args=config.asyncpg_connect_args,
+                **_pool_options(config),
+            )
+            instrument_engine(engine.sync_engine, f"replica-{number}")
+            self.replicas.append(ReplicaState(name=f"replica-{number}", engine=engine))
+        await self.check()
+        self._task = asyncio.create_task(self._run(), name="replica-health")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+        self.replicas = []
+
+    async def _check_replica(self, replica: ReplicaState, max_lag: float, timeout: float) -> None:
+        async def query_lag() -> Any:
+            async with replica.engine.connect() as connection:
+                return (await connection.execute(text(REPLICA_LAG_SQL))).one()
+
+        try:
+            in_recovery, lag = await asyncio.wait_for(query_lag(), timeout)
+        except Exception as exc:
+            if replica.healthy:
+                logger.warning("Реплика %s исключена: %r", replica.name, exc)
+            replica.healthy, replica.lag_seconds, replica.error = False, None, repr(exc)
+            return
+        replica.lag_seconds = lag
+        if not in_recovery:
+            replica.error = None
+        elif lag is None:
+            # Реплика ещё не применила ни одной транзакции
+            replica.error = "нет данных об отставании"
+        elif lag > max_lag:
+            replica.error = f"отставание {lag:.1f} c больше {max_lag:.1f} c"
+        else:
+            replica.error = None
+        healthy = replica.error is None
+        if healthy != replica.healthy:
+            log = logger.info if healthy else logger.warning
+            log("Реплика %s %s", replica.name, "доступна для чтения" if healthy else f"исключена: {replica.error}")
+        replica.healthy = healthy
+
+    async def check(self) -> None:
+        config = setup_config().db
+        await asyncio.gather(
+            *(
+                self._check_replica(replica, config.db_replica_max_lag_seconds, config.db_pool_timeout)
+                for replica in self.replicas
+            )
+        )
+
+    async def _run(self) -> None:
+        interval = setup_config().db.db_replica_check_seconds
+        while True:
+            await asyncio.sleep(interval)
+            await self.check()
+
+    def choose(self) -> Optional[ReplicaState]:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {replica.name: replica.status_dict() for replica in self.replicas}
+
+
+replica_router = ReplicaRouter()
+
+
+@dataclass
+class RequestRouting:
+    """
+    Момент последней записи в пределах запроса: после неё чтения идут на основной сервер,
+    чтобы запрос видел свои изменения, даже если реплика их ещё не получила.
+    """
+
+    last_write_at: Optional[float] = None
+
+    def wrote_within(self, seconds: float) -> bool:
+        return self.last_write_at is not None and time.monotonic() - self.last_write_at < seconds
+
+
+_request_routing: ContextVar[Optional[RequestRouting]] = ContextVar("request_routing", default=None)
+
+
+def request_routing() -> RequestRouting:
+    """
+    Состояние маршрутизации текущего запроса (контекста asyncio); создаётся при первом обращении.
+    """
+    routing = _request_routing.get()
+    if routing is None:
+        routing = RequestRouting()
+        _request_routing.set(routing)
+    return routing
+
+
+def _mark_write(session: OrmSession, *args: Any) -> None:
+    routing = session.info.get(ROUTING_INFO_KEY)
+    if routing is not None:
+        routing.last_write_at = time.monotonic()
+
+
+def _on_orm_execute(state: ORMExecuteState) -> None:
+    if state.is_select:
+        return
+    if isinstance(state.statement, TextClause) and READ_STATEMENT_RE.match(state.statement.text):
+        return
+    _mark_write(state.session)
+
+
+event.listen(OrmSession, "after_flush", _mark_write)
+event.listen(OrmSession, "do_orm_execute", _on_orm_execute)
+
+
+def primary_session() -> AsyncSession:
+    """
+    Сессия основного сервера. Записи через неё переключают чтения запроса на основной сервер
+    на `DB_STICKY_PRIMARY_SECONDS`.
+    """
+    get_engine()
+    session = async_session_maker()
+    session.info[ROUTING_INFO_KEY] = request_routing()
+    return session
+
+
+def read_session() -> AsyncSession:
+    """
+    Сессия только для чтения: реплика по кругу, либо основной сервер, если запрос недавно писал
+    или ни одна реплика не догнала основной сервер.
+
+    Ответы, которые кэшируются по версии данных, и индекс автодополнения читают основной сервер:
+    иначе данные реплики, отстающей от только что увеличенной версии, закэшировались бы под ней.
+    """
+    routing = request_routing()
+    replica = None
+    if not routing.wrote_within(setup_config().db.db_sticky_primary_seconds):
+        replica = replica_router.choose()
+    if replica is None:
+        record_read_session("primary")
+        return primary_session()
+    record_read_session(replica.name)
+    session = async_session_maker(bind=replica.engine)
+    session.info[ROUTING_INFO_KEY] = routing
+    return session
+
+
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    """
+    Зависимость FastAPI: сессия основного сервера на время обработки запроса.
+    """
+    async with primary_session() as session:
+        yield session
+
+
+async def get_read_session() -> AsyncIterator[AsyncSession]:
+    """
+    Зависимость FastAPI: сессия для чтения (см. `read_session`).
+    """
+    async with read_session() as session:
+        yield session
 
 
 class Base(SQLModel):
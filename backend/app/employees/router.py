@@ -0,0 +1,197 @@
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+import orjson
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import Select, text
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..config import setup_config
+from ..database import get_read_session, read_session
+from ..kpis.storage import KPI_HISTORY
+from ..models import Employee
+from .schema import (
+    EmployeeAutocompleteResponse,
+    EmployeeKPIPage,
+    EmployeePage,
+    EmployeeSearchResponse,
+    EmployeeSuggestion,
+    ResponseFormat,
+)
+from .search import PREFIX_SQL, SEARCH_SQL, SET_THRESHOLD_SQL, escape_like, name_index, normalize_name
+
+employees_router = APIRouter(prefix="/employees", tags=["employees"])
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Сколько строк забирается с серверного курсора за раз в режиме NDJSON
+STREAM_BATCH_SIZE = 2000
+
+EMPLOYEE_COLUMNS = (
+    Employee.id,
+    Employee.full_name,
+    Employee.tenure_years,
+    Employee.age,
+    Employee.has_subordinates,
+    Employee.last_vacation_date,
+    Employee.took_sick_leave_2025,
+    Employee.has_disciplinary_action,
+    Employee.participates_in_corporate_events,
+    Employee.updated_datetime,
+)
+MAX_SEARCH_RESULTS = 50
+
+KPI_COLUMNS = (
+    KPI_HISTORY.c.id,
+    KPI_HISTORY.c.employee_id,
+    KPI_HISTORY.c.month,
+    KPI_HISTORY.c.year,
+    KPI_HISTORY.c.kpi_value,
+)
+
+
+async def fetch_page(session: AsyncSession, statement: Select, limit: int) -> ORJSONResponse:
+    """
+    Возвращает одну страницу: запрашивается на строку больше, чтобы понять, есть ли следующая.
+    Строки сериализуются напрямую, без промежуточных Pydantic-моделей.
+    """
+    result = await session.exec(statement.limit(limit + 1))
+    keys: Sequence[str] = list(result.keys())
+    rows = result.all()
+    items: List[Dict[str, Any]] = [dict(zip(keys, row)) for row in rows[:limit]]
+    next_after_id = items[-1]["id"] if len(rows) > limit else None
+    return ORJSONResponse({"items": items, "next_after_id": next_after_id})
+
+
+async def stream_ndjson(statement: Select) -> AsyncIterator[bytes]:
+    """
+    Отдаёт строки запроса в формате NDJSON по мере чтения с серверного курсора,
+    поэтому память не зависит от размера выборки.
+    """
+    async with read_session() as session:
+        result = await session.stream(statement.execution_options(yield_per=STREAM_BATCH_SIZE))
+        keys: Sequence[str] = list(result.keys())
+        async for rows in result.partitions():
+            yield b"".join(orjson.dumps(dict(zip(keys, row))) + b"\n" for row in rows)
+
+
+async def paginate(
+    statement: Select,
+    session: AsyncSession,
+    response_format: ResponseFormat,
+    limit: Optional[int],
+) -> Any:
+    """
+    Возвращает страницу в JSON или, для NDJSON, всю выборку потоком (не больше `limit` строк, если он задан).
+    """
+    if response_format == ResponseFormat.NDJSON:
+        if limit is not None:
+            statement = statement.limit(limit)
+        return StreamingResponse(stream_ndjson(statement), media_type="application/x-ndjson")
+    return await fetch_page(session, statement, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+
+
+@employees_router.get(
+    "",
+    response_model=EmployeePage,
+    summary="Список сотрудников с постраничной выборкой по id",
+)
+async def list_employees(
+    after_id: Optional[int] = Query(default=None, description="Вернуть сотрудников с id больше указанного"),
+    limit: Optional[int] = Query(default=None, ge=1, description="Размер страницы; для NDJSON - без ограничения"),
+    full_name: Optional[str] = Query(default=None, description="Точное совпадение ФИО"),
+    updated_since: Optional[datetime] = Query(default=None, description="Изменённые после указанного момента"),
+    response_format: ResponseFormat = Query(default=ResponseFormat.JSON, alias="format"),
+    session: AsyncSession = Depends(get_read_session),
+) -> Any:
+    """
+    Возвращает сотрудников по возрастанию `id`. Следующая страница запрашивается
+    с `after_id` из `next_after_id`, поэтому стоимость запроса не растёт с номером страницы.
+
+    С `format=ndjson` вся выборка отдаётся потоком, по одному сотруднику в строке.
+    """
+    statement = select(*EMPLOYEE_COLUMNS).order_by(Employee.id)
+    if after_id is not None:
+        statement = statement.where(Employee.id > after_id)
+    if full_name is not None:
+        statement = statement.where(Employee.full_name == full_name)
+    if updated_since is not None:
+        statement = statement.where(Employee.updated_datetime > updated_since)
+    return await paginate(statement, session, response_format, limit)
+
+
+@employees_router.get(
+    "/search",
+    response_model=EmployeeSearchResponse,
+    summary="Нечёткий поиск сотрудников по ФИО",
+)
+async def search_employees(
+    q: str = Query(min_length=2, max_length=255, description="ФИО или его часть, с опечатками"),
+    limit: int = Query(default=20, ge=1, le=MAX_SEARCH_RESULTS),
+    session: AsyncSession = Depends(get_read_session),
+) -> Any:
+    """
+    Ищет сотрудников по сходству триграмм ФИО; регистр, ё/е и лишние пробелы не учитываются.
+    Результаты упорядочены по убыванию сходства.
+    """
+    threshold = setup_config().search.search_similarity_threshold
+    await session.execute(text(SET_THRESHOLD_SQL), {"threshold": str(threshold)})
+    result = await session.execute(text(SEARCH_SQL), {"query": normalize_name(q), "limit": limit})
+    return ORJSONResponse({"items": [dict(row._mapping) for row in result]})
+
+
+@employees_router.get(
+    "/autocomplete",
+    response_model=EmployeeAutocompleteResponse,
+    summary="Автодополнение ФИО по началу",
+)
+async def autocomplete_employees(
+    prefix: str = Query(min_length=1, max_length=255, description="Начало ФИО"),
+    limit: int = Query(default=10, ge=1, le=MAX_SEARCH_RESULTS),
+    session: AsyncSession = Depends(get_read_session),
+) -> Any:
+    """
+    Возвращает сотрудников, ФИО которых начинается с `prefix`, в алфавитном порядке. Отвечает
+    из индекса в памяти процесса; пока он строится после старта - запросом к базе.
+    """
+    index = await name_index.current()
+    if index is not None:
+        matches = index.complete(prefix, limit)
+    else:
+        result = await session.execute(
+            text(PREFIX_SQL), {"pattern": escape_like(normalize_name(prefix)) + "%", "limit": limit}
+        )
+        matches = [(row.id, row.full_name) for row in result]
+    return EmployeeAutocompleteResponse(
+        items=[EmployeeSuggestion(id=employee_id, full_name=full_name) for employee_id, full_name in matches]
+    )
+
+
+@employees_router.get(
+    "/{employee_id}/kpis",
+    response_model=EmployeeKPIPage,
+    summary="KPI сотрудника с постраничной выборкой по id",
+)
+async def list_employee_kpis(
+    employee_id: int,
+    after_id: Optional[int] = Query(default=None, description="Вернуть записи KPI с id больше указанного"),
+    limit: Optional[int] = Query(default=None, ge=1, description="Размер страницы; для NDJSON - без ограничения"),
+    year: Optional[int] = Query(default=None, description="Год KPI"),
+    month: Optional[int] = Query(default=None, ge=1, le=12, description="Месяц KPI"),
+    response_format: ResponseFormat = Query(default=ResponseFormat.JSON, alias="format"),
+    session: AsyncSession = Depends(get_read_session),
+) -> Any:
+    """
+    Возвращает значения KPI сотрудника по возрастанию `id` записи, включая годы, секции которых
+    удалены: их значения читаются из упакованного хранения и идут первыми, с отрицательными `id`.
+    """
+    statement = select(*KPI_COLUMNS).where(KPI_HISTORY.c.employee_id == employee_id).order_by(KPI_HISTORY.c.id)
+    if after_id is not None:
+        statement = statement.where(KPI_HISTORY.c.id > after_id)
+    if year is not None:
+        statement = statement.where(KPI_HISTORY.c.year == year)
+    if month is not None:
+        statement = statement.where(KPI_HISTORY.c.month == month)
+    return await paginate(statement, session, response_format, limit)
@@ -0,0 +1,62 @@
+from datetime import date, datetime
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class ResponseFormat(str, Enum):
+    JSON = "json"
+    NDJSON = "ndjson"
+
+
+class EmployeeRead(BaseModel):
+    id: int
+    full_name: str
+    tenure_years: float
+    age: Optional[int] = None
+    has_subordinates: bool
+    last_vacation_date: Optional[date] = None
+    took_sick_leave_2025: Optional[bool] = None
+    has_disciplinary_action: Optional[bool] = None
+    participates_in_corporate_events: Optional[bool] = None
+    updated_datetime: Optional[datetime] = None
+
+
+class EmployeeKPIRead(BaseModel):
+    id: int
+    employee_id: int
+    month: int
+    year: int
+    kpi_value: float
+
+
+class EmployeePage(BaseModel):
+    items: List[EmployeeRead]
+    # Передаётся в `after_id` для получения следующей страницы, None - страниц больше нет
+    next_after_id: Optional[int] = None
+
+
+class EmployeeKPIPage(BaseModel):
+    items: List[EmployeeKPIRead]
+    next_after_id: Optional[int] = None
+
+
+class EmployeeSearchHit(BaseModel):
+    id: int
+    full_name: str
+    # word_similarity запроса и ФИО, от 0 до 1
+    similarity: float
+
+
+class EmployeeSearchResponse(BaseModel):
+    items: List[EmployeeSearchHit]
+
+
+class EmployeeSuggestion(BaseModel):
+    id: int
+    full_name: str
+
+
+class EmployeeAutocompleteResponse(BaseModel):
+    items: List[EmployeeSuggestion]
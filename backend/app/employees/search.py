@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import time
+from array import array
+from bisect import bisect_left
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.changes.listener import ChangeSet
+from app.common.cache import EMPLOYEES_NAMESPACE, response_cache
+from app.config import setup_config
+from app.database import async_session_maker, get_engine
+
+logger = logging.getLogger(__name__)
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+# Порог задаётся на транзакцию: по умолчанию pg_trgm отсекает совпадения слабее 0.6
+SET_THRESHOLD_SQL = "SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"
+
+# `<%` ищет по индексу ix_employees_full_name_trgm сотрудников, в ФИО которых есть фрагмент,
+# похожий на запрос; word_similarity не штрафует за остальные слова ФИО
+SEARCH_SQL = """
+SELECT id, full_name, word_similarity(:query, full_name_normalized) AS similarity
+FROM employees
+WHERE :query <% full_name_normalized
+ORDER BY similarity DESC, id
+LIMIT :limit
+"""
+
+# По индексу ix_employees_full_name_prefix, пока индекс автодополнения ещё строится
+PREFIX_SQL = """
+SELECT id, full_name
+FROM employees
+WHERE full_name_normalized LIKE :pattern
+ORDER BY full_name_normalized, id
+LIMIT :limit
+"""
+
+# Порядок COLLATE "C" совпадает с порядком байтов UTF-8, по которому ищет PrefixIndex
+PREFIX_INDEX_SQL = """
+SELECT id, full_name_normalized, full_name
+FROM employees
+ORDER BY full_name_normalized COLLATE "C", id
+"""
+PREFIX_INDEX_BATCH_SIZE = 20_000
+
+
+def normalize_name(name: str) -> str:
+    """
+    То же, что вычисляемый столбец `employees.full_name_normalized`: нижний регистр, ё -> е,
+    пробелы схлопнуты и обрезаны.
+    """
+    return WHITESPACE_RE.sub(" ", name.lower().replace("ё", "е")).strip()
+
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class PackedStrings:
+    """
+    Строки одним блоком байтов UTF-8 со смещениями: на миллион ФИО это десятки мегабайт,
+    а не сотни, как у списка объектов str.
+    """
+
+    def __init__(self, values: List[bytes]) -> None:
+        self.blob = b"".join(values)
+        self.offsets = array("q", [0])
+        position = 0
+        for value in values:
+            position += len(value)
+            self.offsets.append(position)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> bytes:
+        return self.blob[self.offsets[index] : self.offsets[index + 1]]
+
+
+class PrefixIndex:
+    """
+    Отсортированные нормализованные ФИО для автодополнения: двоичный поиск начала диапазона
+    и проход по совпадениям, без обращения к базе.
+    """
+
+    def __init__(self, ids: array, keys: PackedStrings, names: PackedStrings, version: Optional[int]) -> None:
+        self.ids = ids
+        self.keys = keys
+        self.names = names
+        self.version = version
+        self.built_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def complete(self, prefix: str, limit: int) -> List[Tuple[int, str]]:
+        key = normalize_name(prefix).encode()
+        start = bisect_left(range(len(self.keys)), key, key=self.keys.__getitem__)
+        matches = []
+        for index in range(start, min(start + limit, len(self.keys))):
+            if not self.keys[index].startswith(key):
+                break
+            matches.append((self.ids[index], self.names[index].decode()))
+        return matches
+
+
+async def build_prefix_index(version: Optional[int]) -> PrefixIndex:
+    ids = array("i")
+    keys: List[bytes] = []
+    names: List[bytes] = []
+    get_engine()
+    async with async_session_maker() as session:
+        result = await session.stream(text(PREFIX_INDEX_SQL).execution_options(yield_per=PREFIX_INDEX_BATCH_SIZE))
+        async for rows in result.partitions():
+            for employee_id, key, name in rows:
+                ids.append(employee_id)
+                keys.append(key.encode())
+                names.append(name.encode())
+    return PrefixIndex(ids, PackedStrings(keys), PackedStrings(names), version)
+
+
+class NameIndexHolder:
+    """
+    Индекс автодополнения процесса API. Перестраивается в фоне, когда загрузка увеличила версию
+    пространства кэша сотрудников (или, без Redis, раз в `SEARCH_PREFIX_REFRESH_SECONDS`);
+    до готовности новой версии запросы обслуживает прежняя.
+    """
+
+    def __init__(self) -> None:
+        self.index: Optional[PrefixIndex] = None
+        self._rebuild: Optional["asyncio.Task[None]"] = None
+
+    async def start(self) -> None:
+        if setup_config().search.search_prefix_index_enabled:
+            self._schedule(await self._current_version())
+
+    async def stop(self) -> None:
+        if self._rebuild is not None:
+            self._rebuild.cancel()
+            try:
+                await self._rebuild
+            except asyncio.CancelledError:
+                pass
+
+    async def _current_version(self) -> Optional[int]:
+        if response_cache.redis is None:
+            return None
+        try:
+            return await response_cache.version(EMPLOYEES_NAMESPACE)
+        except Exception as exc:
+            logger.warning("Не удалось прочитать версию данных сотрудников: %s", exc)
+            return None
+
+    def _schedule(self, version: Optional[int]) -> None:
+        if self._rebuild is None or self._rebuild.done():
+            self._rebuild = asyncio.create_task(self._build(version), name="employee-name-index")
+
+    async def _build(self, version: Optional[int]) -> None:
+        started = time.perf_counter()
+        try:
+            self.index = await build_prefix_index(version)
+        except Exception:
+            logger.exception("Не удалось построить индекс автодополнения ФИО")
+            return
+        elapsed = time.perf_counter() - started
+        logger.info("Индекс автодополнения ФИО: %d сотрудников за %.2f c", len(self.index), elapsed)
+
+    async def on_changes(self, changes: ChangeSet) -> None:
+        """
+        Подписчик слушателя изменений: перестраивает индекс, если менялись сотрудники.
+        """
+        if changes.employee_ids or changes.employees_all:
+            self._schedule(await self._current_version())
+
+    async def current(self) -> Optional[PrefixIndex]:
+        """
+        Текущий индекс (None, пока первый не построен); при устаревании запускает перестройку.
+        """
+        search_config = setup_config().search
+        if not search_config.search_prefix_index_enabled:
+            return None
+        index = self.index
+        version = await self._current_version()
+        if index is None or (version is not None and version != index.version):
+            self._schedule(version)
+        elif version is None and time.monotonic() - index.built_at > search_config.search_prefix_refresh_seconds:
+            self._schedule(version)
+        return index
+
+
+name_index = NameIndexHolder()
@@ -0,0 +1,118 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, List
+
+import orjson
+from fastapi import APIRouter, HTTPException, Request, status
+from pydantic import ValidationError
+
+from ..common.metrics import record_events_request
+from ..config import setup_config
+from .schema import MAX_REPORTED_ERRORS, EventIngestResponse, EventLineError, HREventIn
+from .writer import EventRow, event_writer
+
+events_router = APIRouter(prefix="/events", tags=["events"])
+
+# События из будущего - почти всегда ошибка часов или формата в HRIS; секции на годы вперёд не нужны
+MAX_FUTURE_SKEW = timedelta(days=1)
+
+
+async def iter_lines(request: Request, max_line_bytes: int) -> AsyncIterator[bytes]:
+    """
+    Разбивает тело запроса на строки по мере чтения. В памяти только текущий кусок тела
+    и незаконченная строка.
+    """
+    tail = b""
+    async for chunk in request.stream():
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        if len(tail) > max_line_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Строка длиннее {max_line_bytes} байт",
+            )
+        for line in lines:
+            yield line
+    if tail:
+        yield tail
+
+
+def parse_event(line: bytes, min_occurred_at: datetime, max_occurred_at: datetime) -> EventRow:
+    event = HREventIn.model_validate_json(line)
+    if event.occurred_at > max_occurred_at:
+        raise ValueError("occurred_at в будущем")
+    # Иначе клиент мог бы заставить писателя создавать секции за любые прошлые месяцы
+    if event.occurred_at < min_occurred_at:
+        raise ValueError(f"occurred_at раньше {min_occurred_at.date().isoformat()}")
+    return event.occurred_at, event.employee_id, event.event_type.value, orjson.dumps(event.payload).decode()
+
+
+def format_error(exc: ValueError) -> str:
+    # ValidationError pydantic - подкласс ValueError
+    if not isinstance(exc, ValidationError):
+        return str(exc)
+    error = exc.errors()[0]
+    location = ".".join(str(part) for part in error["loc"])
+    return f"{location}: {error['msg']}" if location else error["msg"]
+
+
+@events_router.post(
+    "",
+    response_model=EventIngestResponse,
+    summary="Приём кадровых событий в формате NDJSON",
+)
+async def ingest_events(request: Request) -> EventIngestResponse:
+    """
+    Принимает поток кадровых событий (`Content-Type: application/x-ndjson`), по одному JSON-объекту
+    в строке, любого размера. Строки проверяются по мере чтения тела; корректные пишутся пачками
+    в `hr_events`, некорректные пропускаются и перечисляются в ответе (первые 100). События старше
+    `EVENTS_MAX_AGE_DAYS` и позже чем через сутки отклоняются.
+    Ответ приходит после записи всех принятых событий. Если запрос завершился ошибкой, часть
+    событий до неё уже могла быть записана.
+    """
+    events_config = setup_config().events
+    now = datetime.now(timezone.utc)
+    min_occurred_at = now - timedelta(days=events_config.events_max_age_days)
+    max_occurred_at = now + MAX_FUTURE_SKEW
+    accepted = rejected = 0
+    errors: List[EventLineError] = []
+    batch: List[EventRow] = []
+    pending: List["asyncio.Future[None]"] = []
+    backpressure = 0.0
+
+    async def flush() -> None:
+        nonlocal batch, backpressure
+        started = time.perf_counter()
+        pending.append(await event_writer.submit(batch))
+        backpressure += time.perf_counter() - started
+        batch = []
+
+    try:
+        line_no = 0
+        async for line in iter_lines(request, events_config.events_max_line_bytes):
+            line_no += 1
+            if not line.strip():
+                continue
+            try:
+                batch.append(parse_event(line, min_occurred_at, max_occurred_at))
+            except ValueError as exc:
+                rejected += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append(EventLineError(line=line_no, error=format_error(exc)))
+                continue
+            accepted += 1
+            if len(batch) >= events_config.events_batch_rows:
+                await flush()
+        if batch:
+            await flush()
+        await asyncio.gather(*pending)
+    except (HTTPException, asyncio.CancelledError):
+        raise
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f"События не записаны: {exc}"
+        ) from exc
+    finally:
+        record_events_request(accepted, rejected, backpressure)
+    return EventIngestResponse(accepted=accepted, rejected=rejected, errors=errors)
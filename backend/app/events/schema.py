@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Dict, List
+
+from pydantic import BaseModel, Field, field_validator
+
+from ..common.schema import MAX_EMPLOYEE_ID
+
+# Сколько ошибок разбора строк возвращается в ответе; остальные только считаются
+MAX_REPORTED_ERRORS = 100
+
+
+def contains_nul(value: Any) -> bool:
+    if isinstance(value, str):
+        return "\x00" in value
+    if isinstance(value, dict):
+        return any(contains_nul(key) or contains_nul(item) for key, item in value.items())
+    if isinstance(value, list):
+        return any(contains_nul(item) for item in value)
+    return False
+
+
+class HREventType(str, Enum):
+    SICK_LEAVE = "sick_leave"
+    VACATION = "vacation"
+    OVERTIME = "overtime"
+    KPI_UPDATE = "kpi_update"
+
+
+class HREventIn(BaseModel):
+    """
+    Одна строка NDJSON тела `POST /events`.
+    """
+
+    employee_id: int = Field(ge=1, le=MAX_EMPLOYEE_ID)
+    event_type: HREventType
+    # Приводится к UTC: по месяцу в UTC выбирается секция; без часового пояса - уже UTC
+    occurred_at: datetime
+    payload: Dict[str, Any] = Field(default_factory=dict)
+
+    @field_validator("occurred_at")
+    @classmethod
+    def to_utc(cls, value: datetime) -> datetime:
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+
+    @field_validator("payload")
+    @classmethod
+    def without_nul(cls, value: Dict[str, Any]) -> Dict[str, Any]:
+        # jsonb не хранит \u0000: такая строка сорвала бы COPY всей объединённой пачки
+        if contains_nul(value):
+            raise ValueError("payload не может содержать символ \\u0000")
+        return value
+
+
+class EventLineError(BaseModel):
+    line: int
+    error: str
+
+
+class EventIngestResponse(BaseModel):
+    accepted: int
+    rejected: int
+    # Первые MAX_REPORTED_ERRORS отклонённых строк
+    errors: List[EventLineError]
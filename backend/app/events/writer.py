@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.common.metrics import record_events_flush
+from app.config import setup_config
+from app.database import get_engine
+
+logger = logging.getLogger(__name__)
+
+# Процессы API не создают одну секцию одновременно (ключ слушателя изменений - 7_301_006)
+EVENTS_PARTITION_LOCK_KEY = 7_301_007
+
+# `hr_events` секционирована по месяцу: секция `hr_events_<ГГГГММ>` хранит события [месяц, следующий месяц)
+EVENT_PARTITION_NAME = "hr_events_{year}{month:02d}"
+EVENT_COLUMNS = ("occurred_at", "employee_id", "event_type", "payload")
+
+# (occurred_at, employee_id, event_type, payload в JSON)
+EventRow = Tuple[datetime, int, str, str]
+
+
+def month_bounds(year: int, month: int) -> Tuple[datetime, datetime]:
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+    return start, end
+
+
+async def ensure_event_partition(connection: AsyncConnection, year: int, month: int) -> bool:
+    """
+    Создаёт секцию `hr_events` за месяц, если её нет. Секции по умолчанию нет, поэтому события
+    за месяц без секции не вставятся.
+    """
+    name = EVENT_PARTITION_NAME.format(year=year, month=month)
+    start, end = month_bounds(year, month)
+    async with connection.begin():
+        if (await connection.execute(text("SELECT to_regclass(:name)"), {"name": name})).scalar() is not None:
+            return False
+        await connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": EVENTS_PARTITION_LOCK_KEY})
+        await connection.exec_driver_sql(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF hr_events "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    logger.info("Создана секция %s", name)
+    return True
+
+
+@dataclass
+class _Batch:
+    rows: Sequence[EventRow]
+    future: "asyncio.Future[None]"
+
+
+def _resolve(batch: _Batch, exc: Optional[BaseException]) -> None:
+    if batch.future.done():
+        return
+    if exc is None:
+        batch.future.set_result(None)
+    else:
+        batch.future.set_exception(exc)
+
+
+class EventWriter:
+    """
+    Пишет кадровые события процесса API в `hr_events` через COPY. Пачки запросов объединяются,
+    пока не наберётся `EVENTS_BATCH_ROWS` строк или с первой не пройдёт `EVENTS_FLUSH_MS`.
+
+    Очередь ограничена `EVENTS_QUEUE_BATCHES` пачками: когда запись отстаёт, `submit` ждёт места,
+    запрос перестаёт читать тело, и клиента притормаживает TCP, а память процесса не растёт.
+    """
+
+    def __init__(self) -> None:
+        self._queue: Optional["asyncio.Queue[_Batch]"] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._partitions: Set[Tuple[int, int]] = set()
+
+    async def start(self) -> None:
+        events_config = setup_config().events
+        self._queue = asyncio.Queue(maxsize=events_config.events_queue_batches)
+        self._task = asyncio.create_task(self._run(), name="hr-event-writer")
+        # Секция следующего месяца создаётся заранее, чтобы на смене месяца COPY не ждал DDL
+        now = datetime.now(timezone.utc)
+        next_month = month_bounds(now.year, now.month)[1]
+        try:
+            await self._ensure_partitions({(now.year, now.month), (next_month.year, next_month.month)})
+        except Exception as exc:
+            logger.warning("Не удалось создать секции кадровых событий: %s", exc)
+
+    async def stop(self) -> None:
+        if self._queue is not None:
+            # Принятые пачки дописываются, прежде чем процесс закроет соединения с базой
+            await self._queue.join()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, rows: Sequence[EventRow]) -> "asyncio.Future[None]":
+        """
+        Ставит строки в очередь записи и возвращает future, завершающийся после их COPY.
+        Ждёт, пока в очереди не освободится место.
+        """
+        if self._queue is None:
+            raise RuntimeError("Писатель кадровых событий не запущен")
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Batch(rows, future))
+        return future
+
+    async def _collect(self) -> List[_Batch]:
+        assert self._queue is not None
+        events_config = setup_config().events
+        loop = asyncio.get_running_loop()
+        first = await self._queue.get()
+        batches = [first]
+        rows = len(first.rows)
+        deadline = loop.time() + events_config.events_flush_ms / 1000
+        while rows < events_config.events_batch_rows:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batches.append(batch)
+            rows += len(batch.rows)
+        return batches
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        while True:
+            batches = await self._collect()
+            try:
+                await self._write_batches(batches)
+            finally:
+                for _ in batches:
+                    self._queue.task_done()
+
+    async def _write_batches(self, batches: List[_Batch]) -> None:
+        """
+        Пишет пачки одним COPY. Если он не прошёл, ни одна строка не записана, и пачки пишутся
+        по отдельности: ошибку получает только запрос, чья пачка не записалась.
+        """
+        try:
+            await self._write([row for batch in batches for row in batch.rows])
+        except Exception as exc:
+            if len(batches) == 1:
+                logger.exception("Ошибка записи пачки из %d кадровых событий", len(batches[0].rows))
+                _resolve(batches[0], exc)
+                return
+            logger.warning("Ошибка записи %d объединённых пачек кадровых событий, пишу по одной: %s", len(batches), exc)
+            for batch in batches:
+                try:
+                    await self._write(list(batch.rows))
+                except Exception as batch_exc:
+                    logger.exception("Ошибка записи пачки из %d кадровых событий", len(batch.rows))
+                    _resolve(batch, batch_exc)
+                else:
+                    _resolve(batch, None)
+            return
+        for batch in batches:
+            _resolve(batch, None)
+
+    async def _ensure_partitions(self, months: Set[Tuple[int, int]]) -> None:
+        missing = months - self._partitions
+        if not missing:
+            return
+        async with get_engine().connect() as connection:
+            for year, month in sorted(missing):
+                await ensure_event_partition(connection, year, month)
+                self._partitions.add((year, month))
+
+    async def _write(self, rows: List[EventRow]) -> None:
+        started = time.perf_counter()
+        await self._ensure_partitions({(occurred_at.year, occurred_at.month) for occurred_at, *_ in rows})
+        async with get_engine().connect() as connection:
+            raw_connection = await connection.get_raw_connection()
+            # COPY в секционированную таблицу: Postgres сам раскладывает строки по секциям месяцев.
+            # Вне транзакции SQLAlchemy выражение фиксируется сразу после выполнения
+            await raw_connection.driver_connection.copy_records_to_table(
+                "hr_events", records=rows, columns=EVENT_COLUMNS
+            )
+        record_events_flush(len(rows), time.perf_counter() - started)
+
+
+event_writer = EventWriter()
@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Connection, Engine, text
+
+from app.config import setup_config
+from app.database import get_sync_engine
+from app.kpis.storage import MONTHS, compact_enabled, kpi_source
+from app.scoring.recompute import SAFE_WATERMARK_SQL
+
+logger = logging.getLogger(__name__)
+
+# Не даёт двум выгрузкам одного года писать в один каталог одновременно (второй ключ - год)
+EXPORT_LOCK_KEY = 7_301_004
+
+EXPORT_FORMATS = ("parquet", "arrow")
+FILE_SUFFIXES = {"parquet": ".parquet", "arrow": ".arrow"}
+MANIFEST_NAME = "_manifest.json"
+# Каталоги в стиле Hive (`year=2025`), чтобы pyarrow.dataset и polars брали год из пути
+YEAR_DIR = "year={year}"
+PART_NAME = "part-{number:05d}{suffix}"
+
+MONTH_COLUMNS = [f"kpi_{month:02d}" for month in range(1, MONTHS + 1)]
+
+# Строка на сотрудника: атрибуты и KPI за год по месяцам (null - нет значения за месяц)
+SNAPSHOT_SCHEMA = pa.schema(
+    [
+        pa.field("employee_id", pa.int32(), nullable=False),
+        pa.field("full_name", pa.string(), nullable=False),
+        pa.field("tenure_years", pa.float64(), nullable=False),
+        pa.field("age", pa.int32()),
+        pa.field("has_subordinates", pa.bool_(), nullable=False),
+        pa.field("last_vacation_date", pa.date32()),
+        pa.field("took_sick_leave_2025", pa.bool_()),
+        pa.field("has_disciplinary_action", pa.bool_()),
+        pa.field("participates_in_corporate_events", pa.bool_()),
+        *(pa.field(name, pa.float64()) for name in MONTH_COLUMNS),
+        pa.field("updated_datetime", pa.timestamp("us", tz="UTC")),
+    ]
+)
+
+SNAPSHOT_TEMPLATE = """
+SELECT
+    e.id,
+    e.full_name,
+    e.tenure_years,
+    e.age,
+    e.has_subordinates,
+    e.last_vacation_date,
+    e.took_sick_leave_2025,
+    e.has_disciplinary_action,
+    e.participates_in_corporate_events,
+    {month_columns},
+    {updated_datetime}
+FROM employees e
+{kpi_join}
+{{where}}
+{group_by}
+ORDER BY e.id
+"""
+
+SNAPSHOT_SQL = SNAPSHOT_TEMPLATE.format(
+    month_columns=",\n    ".join(
+        f"max(k.kpi_value) FILTER (WHERE k.month = {month})" for month in range(1, MONTHS + 1)
+    ),
+    updated_datetime="greatest(e.updated_datetime, max(k.updated_datetime))",
+    kpi_join="LEFT JOIN {kpi_table} k ON k.employee_id = e.id AND k.year = :year",
+    group_by="GROUP BY e.id",
+)
+
+# То же из employee_kpi_years, если включено компактное хранение KPI
+COMPACT_SNAPSHOT_SQL = SNAPSHOT_TEMPLATE.format(
+    month_columns=",\n    ".join(f"c.kpi_values[{month}]" for month in range(1, MONTHS + 1)),
+    updated_datetime="greatest(e.updated_datetime, c.updated_datetime)",
+    kpi_join="LEFT JOIN employee_kpi_years c ON c.employee_id = e.id AND c.year = :year",
+    group_by="",
+)
+
+CHANGED_EMPLOYEES_FILTER = """
+WHERE e.id IN (
+    SELECT id FROM employees WHERE updated_datetime > :watermark
+    UNION
+    SELECT employee_id FROM {kpi_table} WHERE year = :year AND updated_datetime > :watermark
+)
+"""
+
+
+def year_dir(export_dir: str, year: int) -> Path:
+    return Path(export_dir) / YEAR_DIR.format(year=year)
+
+
+def read_manifest(directory: Path) -> Optional[Dict[str, Any]]:
+    path = directory / MANIFEST_NAME
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def write_manifest(directory: Path, manifest: Dict[str, Any]) -> None:
+    path = directory / MANIFEST_NAME
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def snapshot_files(year: int, export_dir: Optional[str] = None) -> List[Path]:
+    """
+    Файлы, из которых складывается актуальный срез года: последний полный снимок и инкременты после него,
+    в порядке записи. Сотрудник может встречаться в нескольких файлах - актуальна строка из последнего.
+    """
+    directory = year_dir(export_dir or setup_config().export.export_dir, year)
+    manifest = read_manifest(directory)
+    if manifest is None:
+        return []
+    return [directory / part["file"] for part in manifest["parts"]]
+
+
+def rows_to_batch(rows: Sequence[Sequence[Any]]) -> pa.RecordBatch:
+    columns = list(zip(*rows))
+    arrays = [pa.array(column, type=field.type) for column, field in zip(columns, SNAPSHOT_SCHEMA)]
+    return pa.RecordBatch.from_arrays(arrays, schema=SNAPSHOT_SCHEMA)
+
+
+def stream_snapshot_batches(
+    connection: Connection,
+    year: int,
+    watermark: Optional[datetime],
+    batch_size: int,
+    compact: Optional[bool] = None,
+) -> Iterator[pa.RecordBatch]:
+    """
+    Читает сотрудников с KPI за `year` через курсор на сервере и отдаёт пачками Arrow по `batch_size` строк.
+    С `watermark` - только сотрудников, у которых после неё менялись атрибуты или KPI за год.
+    """
+    compact = compact_enabled() if compact is None else compact
+    sql = COMPACT_SNAPSHOT_SQL if compact else SNAPSHOT_SQL
+    # Год с удалённой секцией читается из упакованных значений
+    kpi_table = "employee_kpi_years" if compact else kpi_source(connection, year)
+    params: Dict[str, Any] = {"year": year}
+    where = ""
+    if watermark is not None:
+        where = CHANGED_EMPLOYEES_FILTER.format(kpi_table=kpi_table)
+        params["watermark"] = watermark
+    result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(
+        text(sql.format(where=where, kpi_table=kpi_table)), params
+    )
+    for rows in result.partitions():
+        yield rows_to_batch(rows)
+
+
+class SnapshotWriter:
+    """
+    Пишет пачки в файл снимка. Файл открывается при первой пачке и появляется под своим именем
+    только после `close`, поэтому читатели не видят недописанных файлов.
+    """
+
+    def __init__(self, path: Path, export_format: str) -> None:
+        self.path = path
+        self.tmp_path = path.with_name(path.name + ".tmp")
+        self.export_format = export_format
+        self.rows = 0
+        self._writer: Any = None
+
+    def _open(self) -> None:
+        if self.export_format == "arrow":
+            # Несжатый Arrow IPC: pyarrow.memory_map + ipc.open_file читают столбцы без копирования
+            self._writer = pa.ipc.new_file(str(self.tmp_path), SNAPSHOT_SCHEMA)
+        else:
+            self._writer = pq.ParquetWriter(str(self.tmp_path), SNAPSHOT_SCHEMA, compression="zstd")
+
+    def write(self, batch: pa.RecordBatch) -> None:
+        if self._writer is None:
+            self._open()
+        # Каждая пачка - отдельная группа строк Parquet
+        self._writer.write_batch(batch)
+        self.rows += batch.num_rows
+
+    def close(self, keep_empty: bool = False) -> bool:
+        if self._writer is None:
+            if not keep_empty:
+                return False
+            self._open()
+        self._writer.close()
+        os.replace(self.tmp_path, self.path)
+        return True
+
+    def abort(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+
+def export_kpi_snapshot(
+    year: int,
+    full: bool = False,
+    export_dir: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    export_format: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Выгружает снимок сотрудников и KPI за `year` в `<export_dir>/year=<год>/part-NNNNN.<parquet|arrow>`.
+
+    Инкрементальный снимок содержит только сотрудников, изменившихся после отметки из `_manifest.json`
+    каталога года. Полный снимок пишется при `full`, при первой выгрузке года и при смене формата;
+    после него файлы предыдущих снимков удаляются. Отметка хранится рядом с файлами, а не в базе,
+    чтобы каталог, скопированный или очищенный отдельно от базы, не терял изменений.
+    """
+    export_config = setup_config().export
+    export_dir = export_dir or export_config.export_dir
+    batch_size = batch_size or export_config.export_batch_size
+    export_format = export_format or export_config.export_format
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат выгрузки: {export_format}")
+
+    directory = year_dir(export_dir, year)
+    directory.mkdir(parents=True, exist_ok=True)
+    engine = get_sync_engine()
+    # Блокировка сессии держится от чтения манифеста до удаления прежних файлов: иначе две выгрузки
+    # выбрали бы один номер части и перезаписали файл и манифест друг друга
+    with engine.connect() as lock_connection:
+        locked = lock_connection.execute(
+            text("SELECT pg_try_advisory_lock(:key, :year)"), {"key": EXPORT_LOCK_KEY, "year": year}
+        ).scalar()
+        lock_connection.commit()
+        if not locked:
+            logger.info("Выгрузка KPI за %d год уже выполняется, пропускаю запуск", year)
+            return {"skipped": True}
+        try:
+            return _export_locked(engine, directory, year, full, batch_size, export_format)
+        finally:
+            lock_connection.execute(
+                text("SELECT pg_advisory_unlock(:key, :year)"), {"key": EXPORT_LOCK_KEY, "year": year}
+            )
+            lock_connection.commit()
+
+
+def _export_locked(
+    engine: Engine, directory: Path, year: int, full: bool, batch_size: int, export_format: str
+) -> Dict[str, Any]:
+    manifest = read_manifest(directory)
+    if manifest is None or manifest["format"] != export_format:
+        full = True
+    parts: List[Dict[str, Any]] = [] if manifest is None else manifest["parts"]
+    number = max((part["number"] for part in parts), default=-1) + 1
+    since = None if full else datetime.fromisoformat(manifest["watermark"])
+
+    started = time.perf_counter()
+    path = directory / PART_NAME.format(number=number, suffix=FILE_SUFFIXES[export_format])
+    writer = SnapshotWriter(path, export_format)
+    # Один снимок базы на всё чтение: строки, изменённые во время выгрузки, попадут в следующую
+    with engine.connect().execution_options(isolation_level="REPEATABLE READ") as connection:
+        watermark = connection.execute(text(SAFE_WATERMARK_SQL)).scalar()
+        try:
+            for batch in stream_snapshot_batches(connection, year, since, batch_size):
+                writer.write(batch)
+            written = writer.close(keep_empty=full)
+        except BaseException:
+            writer.abort()
+            raise
+        finally:
+            connection.rollback()
+
+    part = {
+        "number": number,
+        "file": path.name,
+        "full": full,
+        "rows": writer.rows,
+        "watermark": watermark.isoformat(),
+        "created_datetime": datetime.now(timezone.utc).isoformat(),
+    }
+    if full:
+        stale = [directory / old["file"] for old in parts]
+        parts = [part]
+    else:
+        stale = []
+        if written:
+            parts = parts + [part]
+    write_manifest(
+        directory,
+        {"year": year, "format": export_format, "watermark": watermark.isoformat(), "parts": parts},
+    )
+    # Прежние файлы удаляются после записи манифеста: до этого момента он ещё ссылается на них
+    for stale_path in stale:
+        stale_path.unlink(missing_ok=True)
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        "year": year,
+        "full": full,
+        "rows": writer.rows,
+        "file": str(path) if written else None,
+        "parts": len(parts),
+        "elapsed": round(elapsed, 3),
+    }
+    logger.info(
+        "Выгрузка KPI за %d год (%s): %d сотрудников за %.2f c",
+        year,
+        "полная" if full else "изменения",
+        writer.rows,
+        elapsed,
+    )
+    return summary
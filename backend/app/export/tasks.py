@@ -0,0 +1,13 @@
+from typing import Any, Dict, Optional
+
+from app.celery import celery_app
+from app.config import setup_config
+from app.export.snapshots import export_kpi_snapshot
+
+
+@celery_app.task(name="app.export.export_kpi_snapshot")
+def export_kpi_snapshot_task(year: Optional[int] = None, full: bool = False) -> Dict[str, Any]:
+    """
+    Выгружает в Parquet/Arrow сотрудников и KPI за год, изменившиеся с прошлой выгрузки (`full` - всех).
+    """
+    return export_kpi_snapshot(year or setup_config().scoring.scoring_kpi_year, full=full)
@@ -0,0 +1,35 @@
+import math
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Path, status
+
+from ..common.schema import MAX_EMPLOYEE_ID
+from ..config import setup_config
+from .schema import EmployeeFeaturesResponse
+
+features_router = APIRouter(prefix="/employees", tags=["features"])
+
+
+@features_router.get(
+    "/{employee_id}/features",
+    response_model=EmployeeFeaturesResponse,
+    summary="Признаки сотрудника из хранилища признаков",
+)
+async def get_employee_features(
+    employee_id: int = Path(ge=1, le=MAX_EMPLOYEE_ID), kpi_year: Optional[int] = None
+) -> EmployeeFeaturesResponse:
+    """
+    Возвращает признаки сотрудника из текущей версии хранилища, отображённой в память, без запроса к базе.
+    """
+    # Хранилище тянет numpy: импортируется при первом запросе, а не при запуске API
+    from .store import get_feature_store
+
+    kpi_year = kpi_year or setup_config().scoring.scoring_kpi_year
+    snapshot = get_feature_store(kpi_year).snapshot()
+    record = snapshot.lookup(employee_id) if snapshot is not None else None
+    if record is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Признаки сотрудника не найдены")
+    values = {name: record[name].item() for name in record.dtype.names}
+    if math.isnan(values["age"]):
+        values["age"] = None
+    return EmployeeFeaturesResponse(kpi_year=kpi_year, version=snapshot.version, **values)
@@ -0,0 +1,23 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class EmployeeFeaturesResponse(BaseModel):
+    employee_id: int
+    kpi_year: int
+    version: int
+    risk_score: float
+    tenure_years: float
+    age: Optional[float] = None
+    days_since_vacation: float
+    trend_slope: float
+    max_drop: float
+    volatility: float
+    kpi_zscore: float
+    kpi_mean: float
+    kpi_months: int
+    has_subordinates: bool
+    took_sick_leave: bool
+    has_disciplinary_action: bool
+    participates_in_corporate_events: bool
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from app.common.schema import MAX_EMPLOYEE_ID
+from app.config import setup_config
+from app.database import get_sync_engine
+
+logger = logging.getLogger(__name__)
+
+# Не даёт двум публикациям одного года выбрать один номер версии (второй ключ - год)
+FEATURE_STORE_LOCK_KEY = 7_301_005
+
+# Файл версии - `features-<год>-<версия>.npy`, указатель на текущую - `features-<год>.json`
+VERSION_NAME = "features-{kpi_year}-{version:06d}.npy"
+POINTER_NAME = "features-{kpi_year}.json"
+
+# Запись фиксированного размера на сотрудника; записи упорядочены по employee_id
+FEATURE_DTYPE = np.dtype(
+    [
+        ("employee_id", np.int32),
+        ("risk_score", np.float32),
+        ("tenure_years", np.float32),
+        # NaN - возраст неизвестен
+        ("age", np.float32),
+        ("days_since_vacation", np.float32),
+        ("trend_slope", np.float32),
+        ("max_drop", np.float32),
+        ("volatility", np.float32),
+        ("kpi_zscore", np.float32),
+        ("kpi_mean", np.float32),
+        ("kpi_months", np.int8),
+        ("has_subordinates", np.bool_),
+        ("took_sick_leave", np.bool_),
+        ("has_disciplinary_action", np.bool_),
+        ("participates_in_corporate_events", np.bool_),
+    ]
+)
+
+COUNT_FEATURES_SQL = "SELECT count(*) FROM employee_risk_scores WHERE kpi_year = :kpi_year"
+
+# Признаки KPI уже посчитаны пересчётом оценок, поэтому хранилище собирается одним проходом без расчётов
+FEATURES_SQL = """
+SELECT
+    e.id,
+    s.risk_score,
+    e.tenure_years,
+    e.age,
+    s.days_since_vacation,
+    s.trend_slope,
+    s.max_drop,
+    s.volatility,
+    s.kpi_zscore,
+    s.kpi_mean,
+    s.kpi_months,
+    e.has_subordinates,
+    coalesce(e.took_sick_leave_2025, false),
+    coalesce(e.has_disciplinary_action, false),
+    coalesce(e.participates_in_corporate_events, true)
+FROM employee_risk_scores s
+JOIN employees e ON e.id = s.employee_id
+WHERE s.kpi_year = :kpi_year
+ORDER BY e.id
+"""
+
+FETCH_BATCH_SIZE = 50_000
+
+
+def store_dir() -> Path:
+    return Path(setup_config().feature_store.feature_store_dir)
+
+
+def rows_to_records(rows: Sequence[Sequence[Any]]) -> np.ndarray:
+    records = np.empty(len(rows), dtype=FEATURE_DTYPE)
+    for name, column in zip(FEATURE_DTYPE.names, zip(*rows)):
+        records[name] = [np.nan if value is None else value for value in column] if name == "age" else column
+    return records
+
+
+def read_pointer(directory: Path, kpi_year: int) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads((directory / POINTER_NAME.format(kpi_year=kpi_year)).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+
+def remove_old_versions(directory: Path, kpi_year: int, current: int, keep: int) -> None:
+    """
+    Удаляет версии старше `keep` последних. Воркер, ещё читающий удалённый файл, продолжает работать
+    со своим отображением: данные освобождаются после того, как он переключится на новую версию.
+    """
+    for path in directory.glob(f"features-{kpi_year}-*.npy"):
+        version = int(path.stem.rsplit("-", 1)[1])
+        if version <= current - keep:
+            path.unlink(missing_ok=True)
+
+
+def publish_feature_store(kpi_year: int, directory: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Записывает признаки всех сотрудников с оценкой риска за `kpi_year` в новую версию хранилища
+    и переключает на неё указатель. Строки из базы пишутся сразу в отображённый в память файл,
+    весь набор в памяти процесса не собирается.
+    """
+    feature_store_config = setup_config().feature_store
+    directory = directory or store_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+
+    with get_sync_engine().connect().execution_options(isolation_level="REPEATABLE READ") as connection:
+        connection.execute(
+            text("SELECT pg_advisory_xact_lock(:key, :kpi_year)"),
+            {"key": FEATURE_STORE_LOCK_KEY, "kpi_year": kpi_year},
+        )
+        pointer = read_pointer(directory, kpi_year)
+        version = (pointer["version"] if pointer else 0) + 1
+        path = directory / VERSION_NAME.format(kpi_year=kpi_year, version=version)
+        tmp_path = path.with_name(path.name + ".tmp")
+
+        count = connection.execute(text(COUNT_FEATURES_SQL), {"kpi_year": kpi_year}).scalar()
+        target = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=FEATURE_DTYPE, shape=(count,))
+        try:
+            try:
+                offset = 0
+                result = connection.execute(
+                    text(FEATURES_SQL),
+                    {"kpi_year": kpi_year},
+                    execution_options={"stream_results": True, "yield_per": FETCH_BATCH_SIZE},
+                )
+                for rows in result.partitions():
+                    target[offset : offset + len(rows)] = rows_to_records(rows)
+                    offset += len(rows)
+                target.flush()
+            finally:
+                # Отображение закрывается до переименования или удаления файла
+                del target
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        os.replace(tmp_path, path)
+        pointer = {
+            "kpi_year": kpi_year,
+            "version": version,
+            "file": path.name,
+            "rows": count,
+            "created_datetime": datetime.now(timezone.utc).isoformat(),
+        }
+        pointer_path = directory / POINTER_NAME.format(kpi_year=kpi_year)
+        pointer_tmp_path = pointer_path.with_name(pointer_path.name + ".tmp")
+        pointer_tmp_path.write_text(json.dumps(pointer), encoding="utf-8")
+        # Переименование атомарно: воркеры видят либо прежнюю версию, либо новую целиком.
+        # Блокировка отпускается с концом транзакции при выходе из блока - уже после смены указателя
+        os.replace(pointer_tmp_path, pointer_path)
+    remove_old_versions(directory, kpi_year, version, feature_store_config.feature_store_keep_versions)
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Опубликована версия %d признаков за %d год: %d сотрудников за %.2f c", version, kpi_year, count, elapsed
+    )
+    return {"kpi_year": kpi_year, "version": version, "rows": count, "elapsed": round(elapsed, 3)}
+
+
+@dataclass(frozen=True)
+class FeatureSnapshot:
+    """
+    Одна версия хранилища, отображённая в память только для чтения. Страницы файла общие
+    для всех процессов узла, поэтому память не растёт с числом воркеров.
+    """
+
+    version: int
+    records: np.ndarray
+
+    @property
+    def employee_ids(self) -> np.ndarray:
+        return self.records["employee_id"]
+
+    def locate(self, employee_ids: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Возвращает номера строк сотрудников и маску найденных (двоичный поиск по упорядоченным id).
+        Id вне диапазона int32 не найдены: приведение типа превратило бы их в id другого сотрудника.
+        """
+        values = np.asarray(employee_ids)
+        in_range = (values >= 1) & (values <= MAX_EMPLOYEE_ID) if len(values) else np.zeros(0, dtype=bool)
+        ids = np.where(in_range, values, 0).astype(np.int32)
+        rows = np.searchsorted(self.employee_ids, ids)
+        rows = np.minimum(rows, max(len(self.records) - 1, 0))
+        found = (self.employee_ids[rows] == ids) & in_range if len(self.records) else np.zeros(len(ids), dtype=bool)
+        return rows, found
+
+    def lookup(self, employee_id: int) -> Optional[np.void]:
+        rows, found = self.locate([employee_id])
+        return self.records[rows[0]] if found[0] else None
+
+
+class FeatureStore:
+    """
+    Текущая версия хранилища признаков за год в процессе воркера. Указатель проверяется не чаще
+    раза в `FEATURE_STORE_CHECK_SECONDS`; новая версия подменяет прежнюю одним присваиванием,
+    и запросы, уже получившие снимок, дочитывают его без блокировок.
+    """
+
+    def __init__(self, kpi_year: int, directory: Path, check_seconds: float) -> None:
+        self.kpi_year = kpi_year
+        self.directory = directory
+        self.check_seconds = check_seconds
+        self._snapshot: Optional[FeatureSnapshot] = None
+        self._pointer_mtime: Optional[int] = None
+        self._checked_at = float("-inf")
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_seconds:
+            return
+        self._checked_at = now
+        pointer_path = self.directory / POINTER_NAME.format(kpi_year=self.kpi_year)
+        try:
+            mtime = pointer_path.stat().st_mtime_ns
+            if mtime == self._pointer_mtime:
+                return
+            pointer = json.loads(pointer_path.read_text(encoding="utf-8"))
+            records = np.load(self.directory / pointer["file"], mmap_mode="r")
+        except FileNotFoundError:
+            # Хранилище ещё не опубликовано или версию удалили между чтением указателя и файла
+            return
+        self._snapshot = FeatureSnapshot(version=pointer["version"], records=records)
+        self._pointer_mtime = mtime
+        logger.info("Признаки за %d год: версия %d, %d сотрудников", self.kpi_year, pointer["version"], len(records))
+
+    def snapshot(self) -> Optional[FeatureSnapshot]:
+        self._refresh()
+        return self._snapshot
+
+
+@lru_cache
+def get_feature_store(kpi_year: int) -> FeatureStore:
+    feature_store_config = setup_config().feature_store
+    return FeatureStore(kpi_year, store_dir(), feature_store_config.feature_store_check_seconds)
@@ -0,0 +1,73 @@
+from pathlib import Path
+from uuid import uuid4
+
+from fastapi import APIRouter, HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+
+from ..common.schema import CeleryResponse, CeleryTaskStatus
+from ..config import setup_config
+from .schema import IngestMode
+
+ingest_router = APIRouter(prefix="/ingest", tags=["ingest"])
+
+# Запись на диск идёт блоками, чтобы не переключаться в пул потоков на каждый кусок тела запроса
+WRITE_BUFFER_BYTES = 1024 * 1024
+
+
+async def save_request_body(request: Request, target: Path) -> int:
+    """
+    Потоково сохраняет тело запроса в файл, не держа его целиком в памяти.
+    """
+    tmp = target.with_name(target.name + ".part")
+    written = 0
+    buffer = bytearray()
+    csv_file = await run_in_threadpool(tmp.open, "wb")
+    try:
+        async for chunk in request.stream():
+            buffer += chunk
+            if len(buffer) >= WRITE_BUFFER_BYTES:
+                await run_in_threadpool(csv_file.write, bytes(buffer))
+                written += len(buffer)
+                buffer.clear()
+        if buffer:
+            await run_in_threadpool(csv_file.write, bytes(buffer))
+            written += len(buffer)
+    except BaseException:
+        csv_file.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    csv_file.close()
+    tmp.replace(target)
+    return written
+
+
+@ingest_router.post(
+    "/csv",
+    response_model=CeleryResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Загрузка CSV с данными сотрудников",
+)
+async def upload_csv(
+    request: Request,
+    kpi_year: int = 2025,
+    mode: IngestMode = IngestMode.INCREMENTAL,
+    force: bool = False,
+) -> CeleryResponse:
+    """
+    Принимает CSV в теле запроса (`Content-Type: text/csv`), сохраняет его на диск
+    и ставит загрузку в очередь Celery. Прогресс доступен по `/tasks/{task_id}`.
+    """
+    job_id = str(uuid4())
+    upload_dir = Path(setup_config().ingest.ingest_upload_dir)
+    await run_in_threadpool(upload_dir.mkdir, parents=True, exist_ok=True)
+    csv_path = upload_dir / f"{job_id}.csv"
+
+    if not await save_request_body(request, csv_path):
+        csv_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Пустое тело запроса")
+
+    # Задачи загрузки тянут за собой Celery, numpy и слияние COPY - импорт при первой загрузке
+    from .tasks import start_csv_ingest
+
+    start_csv_ingest.delay(job_id, str(csv_path), kpi_year, mode == IngestMode.INCREMENTAL, force)
+    return CeleryResponse(task_id=job_id, status=CeleryTaskStatus.PENDING)
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class IngestMode(str, Enum):
+    BULK = "bulk"
+    INCREMENTAL = "incremental"
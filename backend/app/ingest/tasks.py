@@ -0,0 +1,252 @@
+import logging
+import os
+import shutil
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+from celery import chord, group
+from sqlalchemy.exc import OperationalError
+
+from app.celery import celery_app
+from app.common.cache import EMPLOYEES_NAMESPACE, bump_cache_version
+from app.config import setup_config
+from app.database import get_sync_engine
+from app.peers.tasks import refresh_peer_index_task
+from app.rollups.tasks import refresh_kpi_rollups_task
+from app.scoring.tasks import recompute_risk_scores_task
+from app.scripts.bulk_load import (
+    LoadStats,
+    copy_payload,
+    create_staging_tables,
+    file_fingerprint,
+    is_file_loaded,
+    log_stats,
+    merge_staging,
+    record_loaded_file,
+)
+from app.scripts.parse_pipeline import CsvChunk, parse_chunk, read_header, split_csv_chunks
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_KEY = "ingest:progress:{job_id}"
+PROGRESS_TTL_SECONDS = 24 * 60 * 60
+MAX_ERROR_SAMPLES = 20
+
+
+def _payload_dir(csv_path: Path) -> Path:
+    return csv_path.with_name(csv_path.name + ".chunks")
+
+
+def _cleanup(csv_path: Path) -> None:
+    shutil.rmtree(_payload_dir(csv_path), ignore_errors=True)
+    csv_path.unlink(missing_ok=True)
+
+
+def _discard_job(job_id: str, csv_path: Path) -> None:
+    """
+    Удаляет файл задания, готовые данные чанков и счётчики прогресса после ошибки.
+    """
+    _cleanup(csv_path)
+    celery_app.backend.client.delete(PROGRESS_KEY.format(job_id=job_id))
+
+
+def publish_progress(job_id: str, stage: str, **increments: int) -> Dict[str, Any]:
+    """
+    Атомарно увеличивает счётчики задания в Redis и публикует прогресс в состоянии PROGRESS
+    задачи `job_id`, откуда его отдаёт `/tasks/{task_id}`.
+    """
+    key = PROGRESS_KEY.format(job_id=job_id)
+    pipe = celery_app.backend.client.pipeline()
+    for field, value in increments.items():
+        pipe.hincrby(key, field, value)
+    pipe.hgetall(key)
+    pipe.expire(key, PROGRESS_TTL_SECONDS)
+    counters = {name.decode(): float(value) for name, value in pipe.execute()[-2].items()}
+
+    elapsed = max(time.time() - counters.get("started_at", time.time()), 1e-9)
+    bytes_done = counters.get("bytes_done", 0)
+    bytes_per_second = bytes_done / elapsed
+    bytes_left = max(counters.get("total_bytes", 0) - bytes_done, 0)
+    meta = {
+        "stage": stage,
+        "chunks_done": int(counters.get("chunks_done", 0)),
+        "chunks_total": int(counters.get("chunks_total", 0)),
+        "rows_done": int(counters.get("rows_done", 0)),
+        "rows_per_second": round(counters.get("rows_done", 0) / elapsed, 1),
+        "errors": int(counters.get("errors", 0)),
+        "eta_seconds": round(bytes_left / bytes_per_second, 1) if bytes_per_second > 0 else None,
+    }
+    celery_app.backend.store_result(job_id, meta, "PROGRESS")
+    return meta
+
+
+@celery_app.task(name="app.ingest.start_csv_ingest")
+def start_csv_ingest(job_id: str, csv_path: str, kpi_year: int, incremental: bool, force: bool) -> Dict[str, Any]:
+    """
+    Делит загруженный файл на чанки и запускает chord: чанки разбираются параллельно
+    на воркерах, а итоговое слияние выполняет задача с идентификатором `job_id`.
+
+    Сама задача запущена под другим идентификатором, поэтому если она упала до запуска chord
+    (неверный заголовок, недоступна база или Redis), FAILURE для `job_id` записывается здесь -
+    иначе `/tasks/{job_id}` навсегда остался бы в PENDING.
+    """
+    path = Path(csv_path)
+    try:
+        return _start_csv_ingest(job_id, path, kpi_year, incremental, force)
+    except Exception as exc:
+        logger.exception("Задание загрузки %s не запущено", job_id)
+        try:
+            _discard_job(job_id, path)
+        finally:
+            celery_app.backend.store_result(job_id, exc, "FAILURE")
+        raise
+
+
+def _start_csv_ingest(job_id: str, path: Path, kpi_year: int, incremental: bool, force: bool) -> Dict[str, Any]:
+    csv_path = str(path)
+    file_sha256, file_size = file_fingerprint(path)
+    if not force:
+        with get_sync_engine().connect() as connection:
+            already_loaded = is_file_loaded(connection, file_sha256, kpi_year)
+        if already_loaded:
+            logger.info("Файл %s (sha256 %s) уже загружен за %d год, пропускаю", path, file_sha256, kpi_year)
+            path.unlink(missing_ok=True)
+            celery_app.backend.store_result(job_id, {"file_already_loaded": True}, "SUCCESS")
+            return {"job_id": job_id, "chunks": 0}
+
+    fieldnames, data_start = read_header(path)
+    chunks = split_csv_chunks(path, data_start, setup_config().ingest.ingest_chunk_mb * 1024 * 1024)
+    _payload_dir(path).mkdir(exist_ok=True)
+
+    started_at = time.time()
+    celery_app.backend.client.hset(
+        PROGRESS_KEY.format(job_id=job_id),
+        mapping={"started_at": started_at, "total_bytes": file_size - data_start, "chunks_total": len(chunks)},
+    )
+    publish_progress(job_id, "parsing")
+
+    header = group(
+        ingest_csv_chunk.s(job_id, csv_path, chunk.start, chunk.end, chunk.first_line, fieldnames) for chunk in chunks
+    )
+    callback = finalize_csv_ingest.s(job_id, csv_path, kpi_year, incremental, file_sha256, file_size, started_at)
+    callback.set(task_id=job_id)
+    chord(header)(callback.on_error(fail_csv_ingest.s(job_id, csv_path)))
+    logger.info("Задание %s: файл %s разделён на %d чанков", job_id, path, len(chunks))
+    return {"job_id": job_id, "chunks": len(chunks)}
+
+
+@celery_app.task(
+    name="app.ingest.ingest_csv_chunk",
+    acks_late=True,
+    autoretry_for=(OSError,),
+    retry_backoff=True,
+    max_retries=3,
+)
+def ingest_csv_chunk(
+    job_id: str,
+    csv_path: str,
+    start: int,
+    end: int,
+    first_line: int,
+    fieldnames: List[str],
+) -> Dict[str, Any]:
+    """
+    Разбирает один чанк файла и сохраняет готовые для COPY данные рядом с файлом.
+    Повторный запуск перезаписывает результат, поэтому упавший чанк перезапускается отдельно.
+    """
+    path = Path(csv_path)
+    parsed = parse_chunk(path, CsvChunk(start=start, end=end, first_line=first_line), fieldnames, encode_copy=True)
+
+    payload_dir = _payload_dir(path)
+    for suffix, data in (("employees", parsed.employees_csv), ("kpis", parsed.kpis_csv)):
+        target = payload_dir / f"{start:016d}.{suffix}.csv"
+        tmp = target.with_suffix(".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, target)
+
+    publish_progress(
+        job_id,
+        "parsing",
+        chunks_done=1,
+        rows_done=parsed.rows_read,
+        bytes_done=end - start,
+        errors=len(parsed.errors),
+    )
+    samples = [f"Строка {line_no}: пропущена строка без ФИО" for line_no in parsed.skipped_lines]
+    samples += [str(error) for error in parsed.errors]
+    return {
+        "rows_read": parsed.rows_read,
+        "rows_skipped": len(parsed.skipped_lines),
+        "errors": len(parsed.errors),
+        "error_samples": samples[:MAX_ERROR_SAMPLES],
+    }
+
+
+@celery_app.task(
+    name="app.ingest.finalize_csv_ingest",
+    autoretry_for=(OperationalError,),
+    retry_backoff=True,
+    max_retries=3,
+)
+def finalize_csv_ingest(
+    chunk_results: List[Dict[str, Any]],
+    job_id: str,
+    csv_path: str,
+    kpi_year: int,
+    incremental: bool,
+    file_sha256: str,
+    file_size: int,
+    started_at: float,
+) -> Dict[str, Any]:
+    """
+    Загружает результаты всех чанков в staging-таблицы и одной транзакцией сливает их в основные.
+    """
+    publish_progress(job_id, "merging")
+    path = Path(csv_path)
+    stats = LoadStats()
+    error_samples: List[str] = []
+    for result in chunk_results:
+        stats.rows_read += result["rows_read"]
+        stats.rows_skipped += result["rows_skipped"]
+        stats.errors += result["errors"]
+        error_samples += result["error_samples"]
+
+    with get_sync_engine().begin() as connection:
+        create_staging_tables(connection)
+        for employees_file in sorted(_payload_dir(path).glob("*.employees.csv")):
+            kpis_file = employees_file.with_name(employees_file.name.replace(".employees.", ".kpis."))
+            with employees_file.open("rb") as employees, kpis_file.open("rb") as kpis:
+                copy_payload(connection, employees, kpis)
+        merge_staging(connection, kpi_year, stats, incremental=incremental)
+        record_loaded_file(connection, file_sha256, file_size, kpi_year, stats)
+
+    stats.elapsed = time.time() - started_at
+    log_stats(stats)
+    _cleanup(path)
+    celery_app.backend.client.delete(PROGRESS_KEY.format(job_id=job_id))
+    bump_cache_version(EMPLOYEES_NAMESPACE)
+    # Со слушателем изменений пересчёт и агрегаты запустятся по уведомлениям триггеров слияния
+    if not setup_config().changes.changes_listener_enabled:
+        # Не дожидаемся расписания: пересчёт затронет только изменившихся сотрудников
+        recompute_risk_scores_task.delay(kpi_year=kpi_year)
+        if stats.months_changed:
+            refresh_kpi_rollups_task.delay(kpi_year, stats.months_changed)
+        if setup_config().peers.peers_enabled:
+            refresh_peer_index_task.delay(kpi_year)
+    return {
+        **asdict(stats),
+        "rows_per_second": round(stats.rows_per_second, 1),
+        "error_samples": error_samples[:MAX_ERROR_SAMPLES],
+    }
+
+
+@celery_app.task(name="app.ingest.fail_csv_ingest")
+def fail_csv_ingest(request: Any, exc: Exception, traceback: Any, job_id: str, csv_path: str) -> None:
+    """
+    Вызывается, если чанк не удалось обработать после всех повторов.
+    Само задание `job_id` помечается FAILURE средствами chord.
+    """
+    logger.error("Задание загрузки %s завершилось ошибкой: %s", job_id, exc)
+    _discard_job(job_id, Path(csv_path))
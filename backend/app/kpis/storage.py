@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import BigInteger, Connection, DateTime, Float, Integer, SmallInteger, column, func, select, table, text
+
+from app.changes.listener import CHANGES_CHANNEL
+from app.config import setup_config
+from app.database import get_sync_engine
+
+logger = logging.getLogger(__name__)
+
+MONTHS = 12
+
+# `employee_kpis` секционирована по году: секция `employee_kpis_<год>` хранит значения [год, год + 1)
+PARTITION_NAME = "employee_kpis_{year}"
+
+PARTITION_YEARS_SQL = """
+SELECT substring(c.relname FROM '\\d+$')::integer
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = 'employee_kpis'::regclass
+ORDER BY 1
+"""
+
+# DROP TABLE не вызывает триггеры notify_rows_changed, поэтому об удалении года сообщаем сами:
+# без "ids" подписчики считают изменёнными KPI всех сотрудников за периоды года
+NOTIFY_YEAR_DROPPED_SQL = """
+SELECT pg_notify(:channel, json_build_object(
+    'table', 'employee_kpis', 'op', 'drop', 'periods', array(SELECT :year * 100 + m FROM generate_series(1, 12) m)
+)::text)
+"""
+
+# Строки KPI за все годы: секции employee_kpis и упакованные значения годов, секции которых удалены
+# (у таких строк отрицательный id). Читателям KPI нужно оно, а не employee_kpis: иначе после
+# `drop_kpi_year` история года пропадёт
+KPI_HISTORY = table(
+    "employee_kpi_history",
+    column("id", BigInteger),
+    column("employee_id", Integer),
+    column("month", SmallInteger),
+    column("year", Integer),
+    column("kpi_value", Float),
+    column("updated_datetime", DateTime(timezone=True)),
+)
+UNPACKED_VIEW = "employee_kpis_unpacked"
+
+# 12 значений года в порядке месяцев, отсутствующие месяцы - NULL
+PACKED_VALUES_SQL = "ARRAY[{}]::real[]".format(
+    ", ".join(f"max(k.kpi_value) FILTER (WHERE k.month = {month})" for month in range(1, MONTHS + 1))
+)
+
+PACK_YEAR_SQL = f"""
+INSERT INTO employee_kpi_years (employee_id, year, kpi_values, updated_datetime)
+SELECT k.employee_id, k.year, {PACKED_VALUES_SQL}, now()
+FROM employee_kpis k
+WHERE k.year = :year {{employee_filter}}
+GROUP BY k.employee_id, k.year
+ON CONFLICT ON CONSTRAINT employee_kpi_years_pkey DO UPDATE
+SET kpi_values = EXCLUDED.kpi_values, updated_datetime = now()
+WHERE employee_kpi_years.kpi_values IS DISTINCT FROM EXCLUDED.kpi_values
+"""
+
+
+def compact_enabled() -> bool:
+    return setup_config().kpi_storage.kpi_compact_enabled
+
+
+def partition_years(connection: Connection) -> List[int]:
+    return list(connection.execute(text(PARTITION_YEARS_SQL)).scalars())
+
+
+def kpi_source(connection: Connection, year: int) -> str:
+    """
+    Откуда читать строки KPI за `year` в запросах по одному году: из `employee_kpis`, пока есть секция
+    года, иначе из упакованных значений. В отличие от `employee_kpi_history`, не просматривает
+    упакованные значения годов, секции которых на месте.
+    """
+    name = PARTITION_NAME.format(year=year)
+    exists = connection.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None
+    return "employee_kpis" if exists else UNPACKED_VIEW
+
+
+def ensure_kpi_partition(connection: Connection, year: int) -> bool:
+    """
+    Создаёт секцию `employee_kpis` за `year`, если её нет. Вызывается до записи KPI за год:
+    секции по умолчанию нет, и значения за год без секции не вставятся.
+    """
+    name = PARTITION_NAME.format(year=year)
+    if connection.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+        return False
+    connection.exec_driver_sql(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF employee_kpis FOR VALUES FROM ({year}) TO ({year + 1})"
+    )
+    logger.info("Создана секция %s", name)
+    return True
+
+
+def pack_kpi_year(connection: Connection, year: int, employees_query: Optional[str] = None) -> int:
+    """
+    Обновляет компактное представление `employee_kpi_years` за `year` из строк `employee_kpis`.
+
+    `employees_query` - подзапрос, возвращающий `employee_id`, чтобы переупаковать только их
+    (например, сотрудников из staging-таблиц загрузки). Без него переупаковывается весь год.
+    """
+    employee_filter = f"AND k.employee_id IN ({employees_query})" if employees_query else ""
+    return connection.execute(text(PACK_YEAR_SQL.format(employee_filter=employee_filter)), {"year": year}).rowcount
+
+
+def drop_kpi_year(connection: Connection, year: int, with_compact: bool = False) -> Dict[str, Any]:
+    """
+    Удаляет секцию `employee_kpis` за `year` целиком - без построчного DELETE и последующего VACUUM.
+    Упакованные значения года остаются в `employee_kpi_years`, и читатели KPI получают их через
+    `employee_kpi_history`, если не указан `with_compact`. Если после удаления история года отдаёт
+    не все строки секции, удаление отменяется. Слушатели изменений получают уведомление о годе.
+    """
+    name = PARTITION_NAME.format(year=year)
+    dropped = connection.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None
+    if dropped:
+        partition_rows = connection.exec_driver_sql(f"SELECT count(*) FROM {name}").scalar()
+        if not with_compact:
+            # Перед удалением строк год упаковывается, чтобы история не потерялась
+            pack_kpi_year(connection, year)
+        connection.exec_driver_sql(f"DROP TABLE {name}")
+        if not with_compact:
+            history_rows = connection.execute(
+                select(func.count()).select_from(KPI_HISTORY).where(KPI_HISTORY.c.year == year)
+            ).scalar()
+            if history_rows != partition_rows:
+                raise RuntimeError(
+                    f"После удаления секции {name} история KPI отдаёт {history_rows} строк вместо {partition_rows}"
+                )
+    compact_rows = 0
+    if with_compact:
+        compact_rows = connection.execute(
+            text("DELETE FROM employee_kpi_years WHERE year = :year"), {"year": year}
+        ).rowcount
+    if dropped or compact_rows:
+        # Уведомление доставляется слушателям после фиксации транзакции
+        connection.execute(text(NOTIFY_YEAR_DROPPED_SQL), {"channel": CHANGES_CHANNEL, "year": year})
+    return {"year": year, "partition_dropped": dropped, "compact_rows_deleted": compact_rows}
+
+
+def repack_kpi_year(year: int) -> Dict[str, Any]:
+    """
+    Полная переупаковка года, например после включения `KPI_COMPACT_ENABLED` на существующих данных.
+    """
+    started = time.perf_counter()
+    with get_sync_engine().begin() as connection:
+        rows = pack_kpi_year(connection, year)
+    elapsed = time.perf_counter() - started
+    logger.info("Упаковано KPI за %d год: %d сотрудников за %.2f c", year, rows, elapsed)
+    return {"year": year, "rows": rows, "elapsed": round(elapsed, 3)}
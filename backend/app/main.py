@@ -3,7 +3,24 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
-from app.common.router import base_router, task_stats_router
+from app.changes.handlers import create_api_listener
+from app.common.cache import response_cache
+from app.common.metrics import MetricsMiddleware
+from app.common.router import base_router, metrics_router, task_stats_router
+from app.common.task_status import close_result_client
+from app.database import dispose_engines, init_engine, replica_router
+from app.employees.router import employees_router
+from app.employees.search import name_index
+from app.events.router import events_router
+from app.events.writer import event_writer
+from app.features.router import features_router
+from app.ingest.router import ingest_router
+from app.peers.router import peers_router
+from app.rollups.router import rollups_router
+from app.scoring.router import risk_router
+from app.serving.router import predict_router
+from app.serving.service import start_prediction_service
+from app.simulation.router import simulation_router
 
 
 @asynccontextmanager
@@ -13,9 +30,37 @@ async def lifespan(app: FastAPI):
         level=logging.INFO,
         format="%(asctime)s - %(levelname)s - %(message)s",
     )
+    await init_engine()
+    await replica_router.start()
+    await response_cache.start()
+    await name_index.start()
+    changes_listener = create_api_listener()
+    await changes_listener.start()
+    # Модель загружается один раз на процесс, запросы к ней идут через очередь пачек
+    app.state.prediction_service = await start_prediction_service()
+    await event_writer.start()
     yield
+    await event_writer.stop()
+    await app.state.prediction_service.stop()
+    await changes_listener.stop()
+    await name_index.stop()
+    await response_cache.stop()
+    await close_result_client()
+    await replica_router.stop()
+    await dispose_engines()
 
 
 app = FastAPI(lifespan=lifespan, root_path="/api")
+app.add_middleware(MetricsMiddleware)
+app.include_router(metrics_router)
 app.include_router(base_router)
 app.include_router(task_stats_router)
+app.include_router(ingest_router)
+app.include_router(events_router)
+app.include_router(employees_router)
+app.include_router(risk_router)
+app.include_router(features_router)
+app.include_router(peers_router)
+app.include_router(predict_router)
+app.include_router(simulation_router)
+app.include_router(rollups_router)
@@ -13,6 +13,9 @@ from app.config import setup_config
 
 # Импорт моделей нужен для корректной регистрации таблиц в metadata
 import app.models.employee  # noqa: F401
+import app.models.ingest  # noqa: F401
+import app.models.rollup  # noqa: F401
+import app.models.scoring  # noqa: F401
 
 config = context.config
 
@@ -63,6 +66,7 @@ async def run_migrations_online() -> None:
         configuration,
         prefix="sqlalchemy.",
         poolclass=pool.NullPool,
+        connect_args=settings.db.asyncpg_connect_args,
     )
 
     async with connectable.connect() as connection:
@@ -0,0 +1,43 @@
+"""add incremental load fingerprints
+
+Revision ID: 5b7c1e2f9a41
+Revises: d3b29e0a3d09
+Create Date: 2026-10-16 09:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "5b7c1e2f9a41"
+down_revision: Union[str, None] = "d3b29e0a3d09"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("employees", sa.Column("row_hash", sa.String(length=32), nullable=True))
+
+    op.create_table(
+        "ingest_files",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_by_id", sa.Integer(), nullable=True),
+        sa.Column("created_datetime", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("updated_datetime", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("file_sha256", sa.String(length=64), nullable=False),
+        sa.Column("file_size", sa.BigInteger(), nullable=False),
+        sa.Column("kpi_year", sa.Integer(), nullable=False),
+        sa.Column("rows_read", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("employees_inserted", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("employees_changed", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("employees_unchanged", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("file_sha256", "kpi_year", name="uq_ingest_file_sha256_year"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ingest_files")
+    op.drop_column("employees", "row_hash")
@@ -0,0 +1,67 @@
+"""add employee risk scores
+
+Revision ID: 8e4d2a6c1f37
+Revises: 5b7c1e2f9a41
+Create Date: 2026-10-16 12:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "8e4d2a6c1f37"
+down_revision: Union[str, None] = "5b7c1e2f9a41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_employees_updated_datetime", "employees", ["updated_datetime"], unique=False)
+    op.create_index("ix_employee_kpis_updated_datetime", "employee_kpis", ["updated_datetime"], unique=False)
+
+    op.create_table(
+        "employee_risk_scores",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_by_id", sa.Integer(), nullable=True),
+        sa.Column("created_datetime", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("updated_datetime", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("employee_id", sa.Integer(), nullable=False),
+        sa.Column("kpi_year", sa.Integer(), nullable=False),
+        sa.Column("risk_score", sa.Float(), nullable=False),
+        sa.Column("trend_slope", sa.Float(), nullable=False),
+        sa.Column("max_drop", sa.Float(), nullable=False),
+        sa.Column("volatility", sa.Float(), nullable=False),
+        sa.Column("kpi_zscore", sa.Float(), nullable=False),
+        sa.Column("days_since_vacation", sa.Float(), nullable=False),
+        sa.Column("kpi_mean", sa.Float(), nullable=False),
+        sa.Column("kpi_months", sa.Integer(), nullable=False),
+        sa.Column("as_of", sa.Date(), nullable=False),
+        sa.ForeignKeyConstraint(["employee_id"], ["employees.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("employee_id", "kpi_year", name="uq_risk_score_employee_year"),
+    )
+    op.create_index(
+        "ix_employee_risk_scores_year_score", "employee_risk_scores", ["kpi_year", "risk_score"], unique=False
+    )
+
+    op.create_table(
+        "job_watermarks",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_by_id", sa.Integer(), nullable=True),
+        sa.Column("created_datetime", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("updated_datetime", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("job_name", sa.String(length=100), nullable=False),
+        sa.Column("watermark", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("job_name"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("job_watermarks")
+    op.drop_index("ix_employee_risk_scores_year_score", table_name="employee_risk_scores")
+    op.drop_table("employee_risk_scores")
+    op.drop_index("ix_employee_kpis_updated_datetime", table_name="employee_kpis")
+    op.drop_index("ix_employees_updated_datetime", table_name="employees")
@@ -0,0 +1,41 @@
+"""add kpi cohort rollups
+
+Revision ID: c2a97f4d83b5
+Revises: 8e4d2a6c1f37
+Create Date: 2026-10-16 15:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "c2a97f4d83b5"
+down_revision: Union[str, None] = "8e4d2a6c1f37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "kpi_cohort_rollups",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_by_id", sa.Integer(), nullable=True),
+        sa.Column("created_datetime", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("updated_datetime", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("month", sa.Integer(), nullable=False),
+        sa.Column("dimension", sa.String(length=50), nullable=False),
+        sa.Column("cohort", sa.String(length=50), nullable=False),
+        sa.Column("employees", sa.Integer(), nullable=False),
+        sa.Column("kpi_avg", sa.Float(), nullable=False),
+        sa.Column("kpi_median", sa.Float(), nullable=False),
+        sa.Column("kpi_p90", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("year", "dimension", "cohort", "month", name="uq_kpi_cohort_rollup"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("kpi_cohort_rollups")
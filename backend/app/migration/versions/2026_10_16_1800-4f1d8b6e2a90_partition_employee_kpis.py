@@ -0,0 +1,133 @@
+"""partition employee kpis by year and add compact kpi storage
+
+Revision ID: 4f1d8b6e2a90
+Revises: c2a97f4d83b5
+Create Date: 2026-10-16 18:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "4f1d8b6e2a90"
+down_revision: Union[str, None] = "c2a97f4d83b5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PACKED_VALUES_SQL = "ARRAY[{}]::real[]".format(
+    ", ".join(f"max(k.kpi_value) FILTER (WHERE k.month = {month})" for month in range(1, 13))
+)
+
+
+def _rename_old_table() -> None:
+    op.execute("ALTER TABLE employee_kpis RENAME TO employee_kpis_old")
+    op.execute("ALTER TABLE employee_kpis_old RENAME CONSTRAINT employee_kpis_pkey TO employee_kpis_old_pkey")
+    op.execute("ALTER TABLE employee_kpis_old RENAME CONSTRAINT uq_employee_month_year TO uq_employee_month_year_old")
+    op.execute("DROP INDEX IF EXISTS ix_employee_kpis_employee_id")
+    op.execute("DROP INDEX IF EXISTS ix_employee_kpis_month_year")
+    op.execute("DROP INDEX IF EXISTS ix_employee_kpis_updated_datetime")
+    # Последовательность id переходит к новой таблице, поэтому не должна удалиться вместе со старой
+    op.execute("ALTER SEQUENCE employee_kpis_id_seq OWNED BY NONE")
+
+
+def _drop_old_table() -> None:
+    op.execute("DROP TABLE employee_kpis_old")
+    op.execute("ALTER SEQUENCE employee_kpis_id_seq OWNED BY employee_kpis.id")
+
+
+def upgrade() -> None:
+    _rename_old_table()
+    op.execute(
+        """
+        CREATE TABLE employee_kpis (
+            id integer NOT NULL DEFAULT nextval('employee_kpis_id_seq'),
+            employee_id integer NOT NULL REFERENCES employees (id) ON DELETE CASCADE,
+            month smallint NOT NULL,
+            year integer NOT NULL DEFAULT 2025,
+            kpi_value double precision NOT NULL,
+            updated_datetime timestamp with time zone DEFAULT now(),
+            CONSTRAINT employee_kpis_pkey PRIMARY KEY (id, year),
+            CONSTRAINT uq_employee_month_year UNIQUE (employee_id, month, year)
+        ) PARTITION BY RANGE (year)
+        """
+    )
+    years = set(op.get_bind().execute(sa.text("SELECT DISTINCT year FROM employee_kpis_old")).scalars())
+    for year in sorted(years | {2025}):
+        op.execute(
+            f"CREATE TABLE employee_kpis_{year} PARTITION OF employee_kpis FOR VALUES FROM ({year}) TO ({year + 1})"
+        )
+    op.execute(
+        """
+        INSERT INTO employee_kpis (id, employee_id, month, year, kpi_value, updated_datetime)
+        SELECT id, employee_id, month, year, kpi_value, updated_datetime
+        FROM employee_kpis_old
+        ORDER BY year, month, employee_id
+        """
+    )
+    _drop_old_table()
+    # Индексы строятся после переноса данных - так быстрее, чем поддерживать их при вставке
+    op.execute(
+        "CREATE INDEX ix_employee_kpis_month_year ON employee_kpis (month, year) INCLUDE (employee_id, kpi_value)"
+    )
+    op.create_index("ix_employee_kpis_updated_datetime", "employee_kpis", ["updated_datetime"], unique=False)
+
+    op.create_table(
+        "employee_kpi_years",
+        sa.Column("employee_id", sa.Integer(), nullable=False),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("kpi_values", sa.ARRAY(sa.REAL()), nullable=False),
+        sa.Column("updated_datetime", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["employee_id"], ["employees.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("employee_id", "year", name="employee_kpi_years_pkey"),
+    )
+    op.execute(
+        f"""
+        INSERT INTO employee_kpi_years (employee_id, year, kpi_values)
+        SELECT k.employee_id, k.year, {PACKED_VALUES_SQL}
+        FROM employee_kpis k
+        GROUP BY k.employee_id, k.year
+        """
+    )
+    op.execute(
+        """
+        CREATE VIEW employee_kpis_unpacked AS
+        SELECT c.employee_id, m.month::smallint AS month, c.year, m.kpi_value::double precision AS kpi_value
+        FROM employee_kpi_years c
+        CROSS JOIN LATERAL unnest(c.kpi_values) WITH ORDINALITY AS m(kpi_value, month)
+        WHERE m.kpi_value IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP VIEW employee_kpis_unpacked")
+    op.drop_table("employee_kpi_years")
+
+    _rename_old_table()
+    op.create_table(
+        "employee_kpis",
+        sa.Column("id", sa.Integer(), server_default=sa.text("nextval('employee_kpis_id_seq')"), nullable=False),
+        sa.Column("created_by_id", sa.Integer(), nullable=True),
+        sa.Column("created_datetime", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("updated_datetime", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("employee_id", sa.Integer(), nullable=False),
+        sa.Column("month", sa.SmallInteger(), nullable=False),
+        sa.Column("year", sa.Integer(), server_default=sa.text("2025"), nullable=False),
+        sa.Column("kpi_value", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["employee_id"], ["employees.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("employee_id", "month", "year", name="uq_employee_month_year"),
+    )
+    op.execute(
+        """
+        INSERT INTO employee_kpis (id, employee_id, month, year, kpi_value, updated_datetime)
+        SELECT id, employee_id, month, year, kpi_value, updated_datetime
+        FROM employee_kpis_old
+        """
+    )
+    _drop_old_table()
+    op.create_index("ix_employee_kpis_employee_id", "employee_kpis", ["employee_id"], unique=False)
+    op.create_index("ix_employee_kpis_month_year", "employee_kpis", ["month", "year"], unique=False)
+    op.create_index("ix_employee_kpis_updated_datetime", "employee_kpis", ["updated_datetime"], unique=False)
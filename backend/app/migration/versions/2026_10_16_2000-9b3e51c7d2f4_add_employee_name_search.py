@@ -0,0 +1,41 @@
+"""add normalized employee name with trigram search indexes
+
+Revision ID: 9b3e51c7d2f4
+Revises: 4f1d8b6e2a90
+Create Date: 2026-10-16 20:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "9b3e51c7d2f4"
+down_revision: Union[str, None] = "4f1d8b6e2a90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Должно совпадать с FULL_NAME_NORMALIZED_SQL в app.models.employee и normalize_name в app.employees.search
+FULL_NAME_NORMALIZED_SQL = "btrim(regexp_replace(replace(lower(full_name), 'ё', 'е'), '\\s+', ' ', 'g'))"
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "ALTER TABLE employees ADD COLUMN full_name_normalized varchar(255) "
+        f"GENERATED ALWAYS AS ({FULL_NAME_NORMALIZED_SQL}) STORED"
+    )
+    # Нечёткий поиск по словам ФИО (оператор <%)
+    op.execute(
+        "CREATE INDEX ix_employees_full_name_trgm ON employees USING gin (full_name_normalized gin_trgm_ops)"
+    )
+    # Поиск по началу ФИО, пока индекс автодополнения в памяти процесса не построен
+    op.execute(
+        "CREATE INDEX ix_employees_full_name_prefix ON employees (full_name_normalized varchar_pattern_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX ix_employees_full_name_prefix")
+    op.execute("DROP INDEX ix_employees_full_name_trgm")
+    op.execute("ALTER TABLE employees DROP COLUMN full_name_normalized")
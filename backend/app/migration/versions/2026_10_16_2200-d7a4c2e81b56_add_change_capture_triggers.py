@@ -0,0 +1,125 @@
+"""add triggers for updated_datetime and change notifications
+
+Revision ID: d7a4c2e81b56
+Revises: 9b3e51c7d2f4
+Create Date: 2026-10-16 22:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "d7a4c2e81b56"
+down_revision: Union[str, None] = "9b3e51c7d2f4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Должен совпадать с CHANGES_CHANNEL в app.changes.listener
+CHANGES_CHANNEL = "burnout_changes"
+# Сотрудников в одном уведомлении: полезная нагрузка NOTIFY ограничена 8000 байт
+IDS_PER_NOTIFY = 400
+# Если выражение (например, слияние загрузки) изменило больше строк, уходит одно уведомление без id
+BULK_ROWS = 20_000
+
+# Отметка ставится и при изменениях из SQL в обход ORM. Если строка по существу не изменилась,
+# сохраняется прежняя отметка - даже если клиент передал новую. Вычисляемые столбцы в NEW
+# BEFORE-триггера ещё не посчитаны, поэтому в сравнении не участвуют.
+SET_UPDATED_DATETIME_SQL = """
+CREATE FUNCTION set_updated_datetime() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF (to_jsonb(NEW) - 'updated_datetime' - 'full_name_normalized')
+        IS DISTINCT FROM (to_jsonb(OLD) - 'updated_datetime' - 'full_name_normalized') THEN
+        NEW.updated_datetime := now();
+    ELSE
+        NEW.updated_datetime := OLD.updated_datetime;
+    END IF;
+    RETURN NEW;
+END;
+$$
+"""
+
+# Одно или несколько уведомлений на выражение: {"table", "op", "ids", "periods"}.
+# TG_ARGV[0] - столбец с id сотрудника; с TG_ARGV[1] в уведомление добавляются периоды year * 100 + month.
+# Без "ids" - изменилось слишком много строк (или TRUNCATE), и подписчики обрабатывают таблицу целиком.
+NOTIFY_ROWS_CHANGED_SQL = f"""
+CREATE FUNCTION notify_rows_changed() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    source text := CASE WHEN TG_OP = 'DELETE' THEN 'old_rows' ELSE 'new_rows' END;
+    id_column text := TG_ARGV[0];
+    periods text := CASE WHEN TG_NARGS > 1 THEN 'array_agg(DISTINCT year * 100 + month)' ELSE 'NULL::integer[]' END;
+    total bigint;
+    payload text;
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        PERFORM pg_notify('{CHANGES_CHANNEL}', json_build_object('table', TG_TABLE_NAME, 'op', 'truncate')::text);
+        RETURN NULL;
+    END IF;
+    EXECUTE format('SELECT count(*) FROM %I', source) INTO total;
+    IF total = 0 THEN
+        RETURN NULL;
+    END IF;
+    IF total > {BULK_ROWS} THEN
+        EXECUTE format(
+            'SELECT json_build_object(''table'', %L, ''op'', %L, ''periods'', %s)::text FROM %I',
+            TG_TABLE_NAME, lower(TG_OP), periods, source
+        ) INTO payload;
+        PERFORM pg_notify('{CHANGES_CHANNEL}', payload);
+        RETURN NULL;
+    END IF;
+    FOR payload IN EXECUTE format(
+        'SELECT json_build_object(''table'', %L, ''op'', %L, ''ids'', array_agg(DISTINCT %I), ''periods'', %s)::text '
+        'FROM (SELECT *, (dense_rank() OVER (ORDER BY %I) - 1) / {IDS_PER_NOTIFY} AS chunk FROM %I) c '
+        'GROUP BY chunk',
+        TG_TABLE_NAME, lower(TG_OP), id_column, periods, id_column, source
+    )
+    LOOP
+        PERFORM pg_notify('{CHANGES_CHANNEL}', payload);
+    END LOOP;
+    RETURN NULL;
+END;
+$$
+"""
+
+TABLE_NOTIFY_ARGS = {
+    "employees": "'id'",
+    "employee_kpis": "'employee_id', 'periods'",
+}
+
+
+def upgrade() -> None:
+    op.execute(SET_UPDATED_DATETIME_SQL)
+    op.execute(NOTIFY_ROWS_CHANGED_SQL)
+    for table, args in TABLE_NOTIFY_ARGS.items():
+        # На секционированной employee_kpis строчный триггер создаётся и на всех её секциях
+        op.execute(
+            f"CREATE TRIGGER {table}_set_updated_datetime BEFORE UPDATE ON {table} "
+            "FOR EACH ROW EXECUTE FUNCTION set_updated_datetime()"
+        )
+        # Таблицы переходов нельзя объявить у триггера на несколько событий, поэтому триггер на каждое
+        op.execute(
+            f"CREATE TRIGGER {table}_notify_insert AFTER INSERT ON {table} "
+            f"REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION notify_rows_changed({args})"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_notify_update AFTER UPDATE ON {table} "
+            f"REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION notify_rows_changed({args})"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_notify_delete AFTER DELETE ON {table} "
+            f"REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION notify_rows_changed({args})"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_notify_truncate AFTER TRUNCATE ON {table} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION notify_rows_changed({args})"
+        )
+
+
+def downgrade() -> None:
+    for table in TABLE_NOTIFY_ARGS:
+        for trigger in ("set_updated_datetime", "notify_insert", "notify_update", "notify_delete", "notify_truncate"):
+            op.execute(f"DROP TRIGGER {table}_{trigger} ON {table}")
+    op.execute("DROP FUNCTION notify_rows_changed()")
+    op.execute("DROP FUNCTION set_updated_datetime()")
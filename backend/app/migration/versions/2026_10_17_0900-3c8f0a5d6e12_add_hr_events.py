@@ -0,0 +1,60 @@
+"""add append-only hr events table partitioned by month
+
+Revision ID: 3c8f0a5d6e12
+Revises: d7a4c2e81b56
+Create Date: 2026-10-17 09:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "3c8f0a5d6e12"
+down_revision: Union[str, None] = "d7a4c2e81b56"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# События только добавляются; устаревшие месяцы удаляются целой секцией (DROP TABLE), а не DELETE
+APPEND_ONLY_SQL = """
+CREATE FUNCTION forbid_hr_event_changes() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    RAISE EXCEPTION 'hr_events только дополняется: % запрещён', TG_OP;
+END;
+$$
+"""
+
+
+def upgrade() -> None:
+    # Кэш значений последовательности снижает конкуренцию процессов API, пишущих через COPY
+    op.execute("CREATE SEQUENCE hr_events_id_seq AS bigint CACHE 1000")
+    op.execute(
+        """
+        CREATE TABLE hr_events (
+            id bigint NOT NULL DEFAULT nextval('hr_events_id_seq'),
+            occurred_at timestamp with time zone NOT NULL,
+            employee_id integer NOT NULL,
+            event_type varchar(32) NOT NULL,
+            received_at timestamp with time zone NOT NULL DEFAULT now(),
+            payload jsonb NOT NULL DEFAULT '{}'::jsonb,
+            CONSTRAINT hr_events_pkey PRIMARY KEY (id, occurred_at)
+        ) PARTITION BY RANGE (occurred_at)
+        """
+    )
+    op.execute("ALTER SEQUENCE hr_events_id_seq OWNED BY hr_events.id")
+    op.execute("CREATE INDEX ix_hr_events_employee_occurred ON hr_events (employee_id, occurred_at)")
+    # Секции по месяцам создаёт писатель событий перед первой записью за месяц
+    op.execute(APPEND_ONLY_SQL)
+    op.execute(
+        """
+        CREATE TRIGGER hr_events_append_only
+        BEFORE UPDATE OR DELETE ON hr_events
+        FOR EACH ROW EXECUTE FUNCTION forbid_hr_event_changes()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE hr_events")
+    op.execute("DROP FUNCTION forbid_hr_event_changes()")
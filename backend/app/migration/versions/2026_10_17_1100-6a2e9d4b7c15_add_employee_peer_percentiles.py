@@ -0,0 +1,48 @@
+"""add employee peer percentiles
+
+Revision ID: 6a2e9d4b7c15
+Revises: 3c8f0a5d6e12
+Create Date: 2026-10-17 11:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "6a2e9d4b7c15"
+down_revision: Union[str, None] = "3c8f0a5d6e12"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "employee_peer_percentiles",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_by_id", sa.Integer(), nullable=True),
+        sa.Column("created_datetime", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("updated_datetime", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("employee_id", sa.Integer(), nullable=False),
+        sa.Column("kpi_year", sa.Integer(), nullable=False),
+        sa.Column("kpi_month", sa.Integer(), nullable=False),
+        sa.Column("kpi_value", sa.Float(), nullable=False),
+        sa.Column("peer_percentile", sa.Float(), nullable=False),
+        sa.Column("peer_count", sa.Integer(), nullable=False),
+        sa.Column("peer_kpi_median", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["employee_id"], ["employees.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("employee_id", "kpi_year", name="uq_peer_percentile_employee_year"),
+    )
+    op.create_index(
+        "ix_employee_peer_percentiles_year_percentile",
+        "employee_peer_percentiles",
+        ["kpi_year", "peer_percentile"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_employee_peer_percentiles_year_percentile", table_name="employee_peer_percentiles")
+    op.drop_table("employee_peer_percentiles")
@@ -0,0 +1,25 @@
+"""add job watermark leases
+
+Revision ID: b81f5c2d9e47
+Revises: 6a2e9d4b7c15
+Create Date: 2026-10-17 13:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = "b81f5c2d9e47"
+down_revision: Union[str, None] = "6a2e9d4b7c15"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("job_watermarks", sa.Column("running_until", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("job_watermarks", "running_until")
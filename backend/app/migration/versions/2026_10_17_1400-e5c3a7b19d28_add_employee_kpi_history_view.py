@@ -0,0 +1,72 @@
+"""add employee kpi history view over live and packed years
+
+Revision ID: e5c3a7b19d28
+Revises: b81f5c2d9e47
+Create Date: 2026-10-17 14:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "e5c3a7b19d28"
+down_revision: Union[str, None] = "b81f5c2d9e47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# updated_datetime добавляется в конец: CREATE OR REPLACE VIEW не меняет прежние столбцы
+UNPACKED_VIEW_SQL = """
+CREATE OR REPLACE VIEW employee_kpis_unpacked AS
+SELECT
+    c.employee_id,
+    m.month::smallint AS month,
+    c.year,
+    m.kpi_value::double precision AS kpi_value,
+    c.updated_datetime
+FROM employee_kpi_years c
+CROSS JOIN LATERAL unnest(c.kpi_values) WITH ORDINALITY AS m(kpi_value, month)
+WHERE m.kpi_value IS NOT NULL
+"""
+
+OLD_UNPACKED_VIEW_SQL = """
+CREATE VIEW employee_kpis_unpacked AS
+SELECT c.employee_id, m.month::smallint AS month, c.year, m.kpi_value::double precision AS kpi_value
+FROM employee_kpi_years c
+CROSS JOIN LATERAL unnest(c.kpi_values) WITH ORDINALITY AS m(kpi_value, month)
+WHERE m.kpi_value IS NOT NULL
+"""
+
+# Строки секций employee_kpis и упакованные значения годов, секции которых удалены. У упакованных строк
+# нет id записи, поэтому id отрицательный и однозначно задаётся годом, месяцем и сотрудником
+HISTORY_VIEW_SQL = """
+CREATE VIEW employee_kpi_history AS
+SELECT k.id::bigint AS id, k.employee_id, k.month, k.year, k.kpi_value, k.updated_datetime
+FROM employee_kpis k
+UNION ALL
+SELECT
+    -((u.year::bigint * 16 + u.month) * 2147483648 + u.employee_id) AS id,
+    u.employee_id,
+    u.month,
+    u.year,
+    u.kpi_value,
+    u.updated_datetime
+FROM employee_kpis_unpacked u
+WHERE u.year NOT IN (
+    SELECT substring(p.relname FROM '\\d+$')::integer
+    FROM pg_inherits i
+    JOIN pg_class p ON p.oid = i.inhrelid
+    WHERE i.inhparent = 'employee_kpis'::regclass
+)
+"""
+
+
+def upgrade() -> None:
+    op.execute(UNPACKED_VIEW_SQL)
+    op.execute(HISTORY_VIEW_SQL)
+
+
+def downgrade() -> None:
+    op.execute("DROP VIEW employee_kpi_history")
+    op.execute("DROP VIEW employee_kpis_unpacked")
+    op.execute(OLD_UNPACKED_VIEW_SQL)
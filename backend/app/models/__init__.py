@@ -1,4 +1,19 @@
-from app.models.employee import Employee, EmployeeKPI, KPIMonth
-
-__all__ = ["Employee", "EmployeeKPI", "KPIMonth"]
+from app.models.employee import Employee, EmployeeKPI, EmployeeKPIYear, KPIMonth
+from app.models.event import HREvent
+from app.models.ingest import IngestFile
+from app.models.peers import EmployeePeerPercentile
+from app.models.rollup import KPICohortRollup
+from app.models.scoring import EmployeeRiskScore, JobWatermark
 
+__all__ = [
+    "Employee",
+    "EmployeeKPI",
+    "EmployeeKPIYear",
+    "EmployeePeerPercentile",
+    "EmployeeRiskScore",
+    "HREvent",
+    "IngestFile",
+    "JobWatermark",
+    "KPICohortRollup",
+    "KPIMonth",
+]
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
-from datetime import date
+from datetime import date, datetime
 from enum import IntEnum
-from typing import Optional
+from typing import List, Optional
 
-from sqlalchemy import Column, Integer, UniqueConstraint
-from sqlmodel import Field
+from sqlalchemy import REAL, Column, Computed, DateTime, ForeignKey, Index, Integer, String, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlmodel import Field, SQLModel
 
-from app.database import DomainModel
+from app.database import Base, DomainModel
+
+# ФИО для поиска: нижний регистр, ё -> е, пробелы схлопнуты (см. app.employees.search.normalize_name)
+FULL_NAME_NORMALIZED_SQL = "btrim(regexp_replace(replace(lower(full_name), 'ё', 'е'), '\\s+', ' ', 'g'))"
 
 
 class KPIMonth(IntEnum):
@@ -64,21 +68,88 @@ class Employee(DomainModel, table=True):
         default=None,
         description="Участвует ли сотрудник в корпоративных активностях",
     )
+    row_hash: Optional[str] = Field(
+        default=None,
+        max_length=32,
+        description="Хэш атрибутов сотрудника из последней загрузки CSV",
+    )
+
+    full_name_normalized: Optional[str] = Field(
+        default=None,
+        sa_column=Column(String(255), Computed(FULL_NAME_NORMALIZED_SQL, persisted=True)),
+        description="ФИО в нормализованном виде для поиска; вычисляется базой",
+    )
 
-class EmployeeKPI(DomainModel, table=True):
+    __table_args__ = (
+        # Пересчёт оценок риска ищет изменившихся сотрудников по updated_datetime
+        Index("ix_employees_updated_datetime", "updated_datetime"),
+        Index(
+            "ix_employees_full_name_trgm",
+            "full_name_normalized",
+            postgresql_using="gin",
+            postgresql_ops={"full_name_normalized": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_employees_full_name_prefix",
+            "full_name_normalized",
+            postgresql_ops={"full_name_normalized": "varchar_pattern_ops"},
+        ),
+    )
+
+
+class EmployeeKPI(Base, table=True):
     """
     Таблица со значениями выполнения KPI по месяцам.
+
+    Секционирована по `year` (секции `employee_kpis_<год>`, см. `app.kpis.storage`), поэтому год
+    входит в первичный ключ. Без полей автора и даты создания: строка хранит одно значение,
+    и служебные столбцы занимали бы больше места, чем оно само.
     """
 
     __tablename__ = "employee_kpis"
 
-    employee_id: int = Field(foreign_key="employees.id", nullable=False, index=True)
+    id: int | None = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
+    employee_id: int = Field(foreign_key="employees.id", nullable=False)
     month: KPIMonth = Field(
         sa_column=Column(Integer, nullable=False),
         description="Месяц KPI (номер 1-12)",
     )
-    year: int = Field(default=2025, nullable=False, description="Год KPI периода (по умолчанию 2025)")
+    year: int = Field(default=2025, primary_key=True, description="Год KPI периода (по умолчанию 2025)")
     kpi_value: float = Field(nullable=False, description="Значение выполнения KPI")
+    updated_datetime: datetime | None = Field(  # type: ignore
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"onupdate": datetime.now, "server_default": func.now()},
+    )
+
+    __table_args__ = (
+        UniqueConstraint("employee_id", "month", "year", name="uq_employee_month_year"),
+        # Агрегаты и тренды читают месяцы года без обращения к таблице
+        Index("ix_employee_kpis_month_year", "month", "year", postgresql_include=["employee_id", "kpi_value"]),
+        Index("ix_employee_kpis_updated_datetime", "updated_datetime"),
+        {"postgresql_partition_by": "RANGE (year)"},
+    )
 
-    __table_args__ = (UniqueConstraint("employee_id", "month", "year", name="uq_employee_month_year"),)
 
+class EmployeeKPIYear(SQLModel, table=True):
+    """
+    Компактное представление KPI: строка на сотрудника и год, 12 значений по месяцам (NULL - нет значения).
+    В виде строк `employee_kpis` доступно через представление `employee_kpis_unpacked`.
+    """
+
+    __tablename__ = "employee_kpi_years"
+
+    employee_id: int = Field(
+        sa_column=Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"), primary_key=True),
+        description="Сотрудник",
+    )
+    year: int = Field(primary_key=True, description="Год KPI")
+    kpi_values: List[Optional[float]] = Field(
+        sa_column=Column(ARRAY(REAL), nullable=False),
+        description="Значения KPI с января по декабрь",
+    )
+    updated_datetime: datetime | None = Field(  # type: ignore
+        default=None,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"onupdate": datetime.now, "server_default": func.now()},
+    )
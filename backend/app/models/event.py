@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict
+
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field, SQLModel
+
+
+class HREvent(SQLModel, table=True):
+    """
+    Кадровые события из HRIS (больничные, отпуска, переработки, обновления KPI). Таблица только
+    дополняется и секционирована по месяцу `occurred_at` (секции `hr_events_<ГГГГММ>`,
+    см. `app.events.writer`), поэтому момент события входит в первичный ключ.
+    Внешнего ключа на сотрудника нет: события могут прийти раньше загрузки сотрудника.
+    """
+
+    __tablename__ = "hr_events"
+
+    id: int | None = Field(
+        default=None,
+        sa_column=Column(
+            BigInteger,
+            primary_key=True,
+            server_default=text("nextval('hr_events_id_seq')"),
+        ),
+    )
+    occurred_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), primary_key=True),
+        description="Момент события в HRIS",
+    )
+    employee_id: int = Field(sa_column=Column(Integer, nullable=False), description="Сотрудник")
+    event_type: str = Field(sa_column=Column(String(32), nullable=False), description="Тип события")
+    received_at: datetime | None = Field(  # type: ignore
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=False, server_default=func.now()),
+        description="Момент приёма события API",
+    )
+    payload: Dict[str, Any] = Field(
+        default_factory=dict,
+        sa_column=Column(JSONB, nullable=False, server_default=text("'{}'::jsonb")),
+        description="Данные события (даты отпуска, часы переработки, значение KPI и т.п.)",
+    )
+
+    __table_args__ = (
+        Index("ix_hr_events_employee_occurred", "employee_id", "occurred_at"),
+        {"postgresql_partition_by": "RANGE (occurred_at)"},
+    )
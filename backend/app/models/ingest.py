@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, Column, UniqueConstraint
+from sqlmodel import Field
+
+from app.database import DomainModel
+
+
+class IngestFile(DomainModel, table=True):
+    """
+    Отпечатки загруженных CSV-файлов для пропуска повторной загрузки того же файла.
+    """
+
+    __tablename__ = "ingest_files"
+
+    file_sha256: str = Field(max_length=64, nullable=False, description="SHA-256 содержимого файла")
+    file_size: int = Field(sa_column=Column(BigInteger, nullable=False), description="Размер файла в байтах")
+    kpi_year: int = Field(nullable=False, description="Год KPI, с которым загружался файл")
+    rows_read: int = Field(default=0, nullable=False, description="Прочитано строк")
+    employees_inserted: int = Field(default=0, nullable=False, description="Добавлено сотрудников")
+    employees_changed: int = Field(default=0, nullable=False, description="Изменено сотрудников")
+    employees_unchanged: int = Field(default=0, nullable=False, description="Сотрудников без изменений")
+
+    __table_args__ = (UniqueConstraint("file_sha256", "kpi_year", name="uq_ingest_file_sha256_year"),)
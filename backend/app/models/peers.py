@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, ForeignKey, Index, Integer, UniqueConstraint
+from sqlmodel import Field
+
+from app.database import DomainModel
+
+
+class EmployeePeerPercentile(DomainModel, table=True):
+    """
+    Место последнего KPI сотрудника среди ближайших коллег из его группы сравнения.
+    """
+
+    __tablename__ = "employee_peer_percentiles"
+
+    employee_id: int = Field(
+        sa_column=Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"), nullable=False),
+        description="Сотрудник",
+    )
+    kpi_year: int = Field(nullable=False, description="Год KPI")
+    kpi_month: int = Field(nullable=False, description="Последний месяц с KPI сотрудника, с ним сравниваются коллеги")
+    kpi_value: float = Field(nullable=False, description="KPI сотрудника за этот месяц")
+    peer_percentile: float = Field(nullable=False, description="Процентиль KPI среди коллег, от 0 до 100")
+    peer_count: int = Field(nullable=False, description="Число коллег с KPI за этот месяц")
+    peer_kpi_median: float = Field(nullable=False, description="Медиана KPI коллег за этот месяц")
+
+    __table_args__ = (
+        UniqueConstraint("employee_id", "kpi_year", name="uq_peer_percentile_employee_year"),
+        Index("ix_employee_peer_percentiles_year_percentile", "kpi_year", "peer_percentile"),
+    )
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from sqlalchemy import UniqueConstraint
+from sqlmodel import Field
+
+from app.database import DomainModel
+
+
+class KPICohortRollup(DomainModel, table=True):
+    """
+    Предрассчитанные агрегаты KPI по месяцам в разрезе когорт сотрудников.
+    """
+
+    __tablename__ = "kpi_cohort_rollups"
+
+    year: int = Field(nullable=False, description="Год KPI")
+    month: int = Field(nullable=False, description="Месяц KPI (номер 1-12)")
+    dimension: str = Field(max_length=50, nullable=False, description="Признак, по которому выделена когорта")
+    cohort: str = Field(max_length=50, nullable=False, description="Значение признака")
+    employees: int = Field(nullable=False, description="Число сотрудников с KPI за месяц")
+    kpi_avg: float = Field(nullable=False, description="Среднее значение KPI")
+    kpi_median: float = Field(nullable=False, description="Медиана KPI")
+    kpi_p90: float = Field(nullable=False, description="90-й перцентиль KPI")
+
+    # Порядок столбцов совпадает с запросом дашборда: год и признак, затем все когорты и месяцы
+    __table_args__ = (UniqueConstraint("year", "dimension", "cohort", "month", name="uq_kpi_cohort_rollup"),)
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, UniqueConstraint
+from sqlmodel import Field
+
+from app.database import DomainModel
+
+
+class EmployeeRiskScore(DomainModel, table=True):
+    """
+    Последняя рассчитанная оценка риска выгорания сотрудника и признаки, из которых она получена.
+    """
+
+    __tablename__ = "employee_risk_scores"
+
+    employee_id: int = Field(
+        sa_column=Column(Integer, ForeignKey("employees.id", ondelete="CASCADE"), nullable=False),
+        description="Сотрудник",
+    )
+    kpi_year: int = Field(nullable=False, description="Год KPI, по которому считалась оценка")
+    risk_score: float = Field(nullable=False, description="Оценка риска выгорания от 0 до 1")
+    trend_slope: float = Field(nullable=False, description="Наклон тренда KPI по месяцам")
+    max_drop: float = Field(nullable=False, description="Наибольшее падение KPI между соседними месяцами")
+    volatility: float = Field(nullable=False, description="Стандартное отклонение KPI")
+    kpi_zscore: float = Field(nullable=False, description="z-оценка последнего KPI относительно предыдущих")
+    days_since_vacation: float = Field(nullable=False, description="Дней с последнего отпуска")
+    kpi_mean: float = Field(nullable=False, description="Среднее значение KPI")
+    kpi_months: int = Field(nullable=False, description="Число месяцев с KPI")
+    as_of: date = Field(nullable=False, description="Дата, на которую рассчитана оценка")
+
+    __table_args__ = (
+        UniqueConstraint("employee_id", "kpi_year", name="uq_risk_score_employee_year"),
+        Index("ix_employee_risk_scores_year_score", "kpi_year", "risk_score"),
+    )
+
+
+class JobWatermark(DomainModel, table=True):
+    """
+    Отметка времени, до которой фоновая задача уже обработала изменения.
+    """
+
+    __tablename__ = "job_watermarks"
+
+    job_name: str = Field(max_length=100, nullable=False, unique=True, description="Имя задачи")
+    watermark: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=True),
+        description="Изменения с updated_datetime не позже этой отметки уже обработаны",
+    )
+    running_until: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=True),
+        description="Задача занята выполнением в нескольких задачах Celery до этого момента",
+    )
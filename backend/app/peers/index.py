@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from app.config import setup_config
+from app.database import get_sync_engine
+from app.scoring.engine import MONTHS, KPIMatrix, load_kpi_matrix
+
+logger = logging.getLogger(__name__)
+
+# Не даёт двум публикациям одного года выбрать один номер версии (второй ключ - год)
+PEER_INDEX_LOCK_KEY = 7_301_008
+
+# Версия - каталог `peers-<год>-<версия>` с массивами, указатель на текущую - `peers-<год>.json`
+VERSION_NAME = "peers-{kpi_year}-{version:06d}"
+POINTER_NAME = "peers-{kpi_year}.json"
+ARRAYS = ("employee_ids", "bands", "vectors")
+
+# Группа сравнения - стаж, возраст и наличие подчинённых в одних интервалах; внутри группы
+# ближайшие ищутся по вектору профиля
+TENURE_BAND_EDGES = np.array([1.0, 3.0, 5.0, 10.0, 20.0])
+AGE_BAND_EDGES = np.array([25.0, 35.0, 45.0, 55.0])
+AGE_BANDS = len(AGE_BAND_EDGES) + 2  # последний интервал - возраст неизвестен
+
+# Масштабы фиксированы, как у признаков оценки риска: вектор сотрудника не зависит от остальных,
+# поэтому при частичной перестройке векторы прочих сотрудников не пересчитываются
+TENURE_SCALE = 5.0
+AGE_CENTER = 40.0
+AGE_SCALE = 10.0
+KPI_LEVEL_CENTER = 1.0
+KPI_LEVEL_SCALE = 0.2
+KPI_SHAPE_SCALE = 0.1
+# Стаж, возраст, подчинённые, средний KPI и отклонения 12 месяцев от среднего
+VECTOR_SIZE = 4 + MONTHS
+
+
+def profile_bands(matrix: KPIMatrix) -> np.ndarray:
+    tenure_band = np.digitize(matrix.tenure_years, TENURE_BAND_EDGES)
+    age_band = np.where(np.isnan(matrix.age), AGE_BANDS - 1, np.digitize(np.nan_to_num(matrix.age), AGE_BAND_EDGES))
+    return ((tenure_band * AGE_BANDS + age_band) * 2 + matrix.has_subordinates).astype(np.int16)
+
+
+def profile_vectors(matrix: KPIMatrix) -> np.ndarray:
+    """
+    Нормированные векторы профиля: стаж, возраст, подчинённые, уровень KPI и форма его истории
+    (отклонения месяцев от собственного среднего). Пропущенный месяц равен среднему сотрудника,
+    пропущенный возраст - середине шкалы.
+    """
+    observed = ~np.isnan(matrix.kpi)
+    count = observed.sum(axis=1)
+    total = np.where(observed, matrix.kpi, 0.0).sum(axis=1)
+    mean = np.where(count > 0, total / np.maximum(count, 1), KPI_LEVEL_CENTER)
+    vectors = np.empty((len(matrix), VECTOR_SIZE), dtype=np.float32)
+    vectors[:, 0] = matrix.tenure_years / TENURE_SCALE
+    vectors[:, 1] = np.where(np.isnan(matrix.age), 0.0, (matrix.age - AGE_CENTER) / AGE_SCALE)
+    vectors[:, 2] = matrix.has_subordinates
+    vectors[:, 3] = (mean - KPI_LEVEL_CENTER) / KPI_LEVEL_SCALE
+    vectors[:, 4:] = np.where(observed, matrix.kpi - mean[:, None], 0.0) / KPI_SHAPE_SCALE
+    return vectors
+
+
+class PeerIndex:
+    """
+    Векторы профилей, упорядоченные по группе сравнения и id, для точного поиска ближайших
+    коллег матричным произведением. Поиск идёт только по группе сотрудника, поэтому на миллионе
+    сотрудников запрос просматривает десятки тысяч строк; если в группе меньше `k` коллег -
+    по всему индексу.
+    """
+
+    def __init__(self, version: int, employee_ids: np.ndarray, bands: np.ndarray, vectors: np.ndarray) -> None:
+        self.version = version
+        self.employee_ids = employee_ids
+        self.bands = bands
+        self.vectors = vectors
+        self.norms = np.einsum("ij,ij->i", vectors, vectors)
+        self._id_order = np.argsort(employee_ids, kind="stable")
+        self._sorted_ids = employee_ids[self._id_order]
+        values, starts, counts = np.unique(bands, return_index=True, return_counts=True)
+        self._band_spans = {
+            int(band): (int(start), int(start + count)) for band, start, count in zip(values, starts, counts)
+        }
+
+    def __len__(self) -> int:
+        return len(self.employee_ids)
+
+    def row_of(self, employee_id: int) -> Optional[int]:
+        position = int(np.searchsorted(self._sorted_ids, employee_id))
+        if position < len(self._sorted_ids) and self._sorted_ids[position] == employee_id:
+            return int(self._id_order[position])
+        return None
+
+    def span(self, band: int, k: int) -> Tuple[int, int]:
+        start, end = self._band_spans[band]
+        return (start, end) if end - start > k else (0, len(self))
+
+    def nearest_block(self, rows: np.ndarray, start: int, end: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        `k` ближайших к строкам `rows` среди строк `[start, end)` одним матричным произведением:
+        номера строк (len(rows), k) по возрастанию расстояния и сами расстояния. Строка
+        не считается своим соседом.
+        """
+        queries = self.vectors[rows]
+        distances = self.norms[start:end][None, :] - 2.0 * (queries @ self.vectors[start:end].T)
+        distances += self.norms[rows][:, None]
+        inside = (rows >= start) & (rows < end)
+        distances[np.flatnonzero(inside), rows[inside] - start] = np.inf
+        k = min(k, end - start - 1)
+        top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        top_distances = np.take_along_axis(distances, top, axis=1)
+        order = np.argsort(top_distances, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_distances = np.take_along_axis(top_distances, order, axis=1)
+        return top + start, np.sqrt(np.maximum(top_distances, 0.0))
+
+    def nearest(self, row: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = self.span(int(self.bands[row]), k)
+        if end - start < 2:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        rows, distances = self.nearest_block(np.array([row]), start, end, k)
+        return rows[0], distances[0]
+
+    def iter_nearest(self, k: int, block_cells: int) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Ближайшие коллеги всех сотрудников пачками сотрудников одной группы: `(строки, соседи, расстояния)`.
+        Матрица расстояний пачки не больше `block_cells` элементов.
+        """
+        for band, (band_start, band_end) in self._band_spans.items():
+            start, end = self.span(band, k)
+            if end - start < 2:
+                continue
+            block_size = max(1, block_cells // (end - start))
+            for offset in range(band_start, band_end, block_size):
+                rows = np.arange(offset, min(offset + block_size, band_end))
+                neighbours, distances = self.nearest_block(rows, start, end, k)
+                yield rows, neighbours, distances
+
+
+def index_arrays(matrix: KPIMatrix) -> Dict[str, np.ndarray]:
+    return {
+        "employee_ids": matrix.employee_ids.astype(np.int32),
+        "bands": profile_bands(matrix),
+        "vectors": profile_vectors(matrix),
+    }
+
+
+def sort_order(arrays: Dict[str, np.ndarray]) -> np.ndarray:
+    return np.lexsort((arrays["employee_ids"], arrays["bands"]))
+
+
+def sort_arrays(arrays: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    order = sort_order(arrays)
+    return {name: values[order] for name, values in arrays.items()}
+
+
+def merge_arrays(
+    previous: Dict[str, np.ndarray], changed_ids: Sequence[int], fresh: Dict[str, np.ndarray]
+) -> Dict[str, np.ndarray]:
+    """
+    Заменяет в прежних массивах строки изменившихся сотрудников свежими. Сотрудники из `changed_ids`,
+    которых нет в `fresh`, удалены и из индекса уходят.
+    """
+    keep = ~np.isin(previous["employee_ids"], np.asarray(changed_ids, dtype=np.int32))
+    return sort_arrays({name: np.concatenate([previous[name][keep], fresh[name]]) for name in ARRAYS})
+
+
+def store_dir() -> Path:
+    return Path(setup_config().peers.peers_dir)
+
+
+def read_pointer(directory: Path, kpi_year: int) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads((directory / POINTER_NAME.format(kpi_year=kpi_year)).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+
+def load_arrays(path: Path) -> Dict[str, np.ndarray]:
+    return {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in ARRAYS}
+
+
+def remove_old_versions(directory: Path, kpi_year: int, current: int, keep: int) -> None:
+    for path in directory.glob(f"peers-{kpi_year}-*"):
+        if path.is_dir() and int(path.name.rsplit("-", 1)[1]) <= current - keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def publish_peer_index(
+    kpi_year: int,
+    employee_ids: Optional[Sequence[int]] = None,
+    directory: Optional[Path] = None,
+) -> Dict[str, Any]:
+    """
+    Публикует новую версию индекса коллег за `kpi_year`. С `employee_ids` из базы читаются только
+    эти сотрудники, а остальные строки берутся из текущей версии; без них или без текущей версии
+    индекс строится заново по всем сотрудникам.
+    """
+    peers_config = setup_config().peers
+    directory = directory or store_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+
+    with get_sync_engine().connect().execution_options(isolation_level="REPEATABLE READ") as connection:
+        connection.execute(
+            text("SELECT pg_advisory_xact_lock(:key, :kpi_year)"),
+            {"key": PEER_INDEX_LOCK_KEY, "kpi_year": kpi_year},
+        )
+        pointer = read_pointer(directory, kpi_year)
+        incremental = employee_ids is not None and pointer is not None
+        if incremental:
+            assert pointer is not None and employee_ids is not None
+            matrix = load_kpi_matrix(connection, kpi_year, date.today(), employee_ids=employee_ids)
+            arrays = merge_arrays(load_arrays(directory / pointer["path"]), employee_ids, index_arrays(matrix))
+        else:
+            arrays = sort_arrays(index_arrays(load_kpi_matrix(connection, kpi_year, date.today())))
+
+        version = (pointer["version"] if pointer else 0) + 1
+        path = directory / VERSION_NAME.format(kpi_year=kpi_year, version=version)
+        tmp_path = path.with_name(path.name + ".tmp")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        tmp_path.mkdir()
+        for name in ARRAYS:
+            np.save(tmp_path / f"{name}.npy", np.ascontiguousarray(arrays[name]))
+        os.replace(tmp_path, path)
+
+        pointer = {
+            "kpi_year": kpi_year,
+            "version": version,
+            "path": path.name,
+            "rows": len(arrays["employee_ids"]),
+            "created_datetime": datetime.now(timezone.utc).isoformat(),
+        }
+        pointer_path = directory / POINTER_NAME.format(kpi_year=kpi_year)
+        pointer_tmp_path = pointer_path.with_name(pointer_path.name + ".tmp")
+        pointer_tmp_path.write_text(json.dumps(pointer), encoding="utf-8")
+        os.replace(pointer_tmp_path, pointer_path)
+    remove_old_versions(directory, kpi_year, version, peers_config.peers_keep_versions)
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Опубликована версия %d индекса коллег за %d год (%s): %d сотрудников за %.2f c",
+        version,
+        kpi_year,
+        "частично" if incremental else "полностью",
+        pointer["rows"],
+        elapsed,
+    )
+    return {
+        "kpi_year": kpi_year,
+        "version": version,
+        "rows": pointer["rows"],
+        "incremental": incremental,
+        "elapsed": round(elapsed, 3),
+    }
+
+
+class PeerIndexStore:
+    """
+    Текущая версия индекса коллег за год в процессе API, как `FeatureStore` для признаков: указатель
+    проверяется не чаще раза в `PEERS_CHECK_SECONDS`, массивы отображаются в память.
+    """
+
+    def __init__(self, kpi_year: int, directory: Path, check_seconds: float) -> None:
+        self.kpi_year = kpi_year
+        self.directory = directory
+        self.check_seconds = check_seconds
+        self._index: Optional[PeerIndex] = None
+        self._pointer_mtime: Optional[int] = None
+        self._checked_at = float("-inf")
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_seconds:
+            return
+        self._checked_at = now
+        pointer_path = self.directory / POINTER_NAME.format(kpi_year=self.kpi_year)
+        try:
+            mtime = pointer_path.stat().st_mtime_ns
+            if mtime == self._pointer_mtime:
+                return
+            pointer = json.loads(pointer_path.read_text(encoding="utf-8"))
+            arrays = load_arrays(self.directory / pointer["path"])
+        except FileNotFoundError:
+            return
+        self._index = PeerIndex(pointer["version"], **arrays)
+        self._pointer_mtime = mtime
+        logger.info(
+            "Индекс коллег за %d год: версия %d, %d сотрудников", self.kpi_year, pointer["version"], len(self._index)
+        )
+
+    def index(self) -> Optional[PeerIndex]:
+        self._refresh()
+        return self._index
+
+
+@lru_cache
+def get_peer_index_store(kpi_year: int) -> PeerIndexStore:
+    return PeerIndexStore(kpi_year, store_dir(), setup_config().peers.peers_check_seconds)
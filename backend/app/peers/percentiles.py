@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import logging
+import time
+from datetime import date
+from typing import Any, Dict, List
+
+import numpy as np
+from sqlalchemy import Connection, text
+
+from app.config import setup_config
+from app.database import get_sync_engine
+from app.peers.index import PeerIndex, index_arrays, sort_order
+from app.scoring.engine import MONTHS, load_kpi_matrix
+
+logger = logging.getLogger(__name__)
+
+UPSERT_PERCENTILES_SQL = """
+INSERT INTO employee_peer_percentiles (
+    employee_id, kpi_year, kpi_month, kpi_value, peer_percentile, peer_count, peer_kpi_median
+)
+SELECT p.employee_id, :kpi_year, p.kpi_month, p.kpi_value, p.peer_percentile, p.peer_count, p.peer_kpi_median
+FROM unnest(
+    CAST(:employee_id AS integer[]),
+    CAST(:kpi_month AS integer[]),
+    CAST(:kpi_value AS double precision[]),
+    CAST(:peer_percentile AS double precision[]),
+    CAST(:peer_count AS integer[]),
+    CAST(:peer_kpi_median AS double precision[])
+) AS p(employee_id, kpi_month, kpi_value, peer_percentile, peer_count, peer_kpi_median)
+-- Сотрудник мог быть удалён после чтения матрицы
+JOIN employees e ON e.id = p.employee_id
+ON CONFLICT ON CONSTRAINT uq_peer_percentile_employee_year DO UPDATE
+SET
+    kpi_month = EXCLUDED.kpi_month,
+    kpi_value = EXCLUDED.kpi_value,
+    peer_percentile = EXCLUDED.peer_percentile,
+    peer_count = EXCLUDED.peer_count,
+    peer_kpi_median = EXCLUDED.peer_kpi_median,
+    updated_datetime = now()
+"""
+
+
+def last_observed_months(kpi: np.ndarray) -> np.ndarray:
+    """
+    Номер (с нуля) последнего месяца с KPI каждого сотрудника; -1, если KPI за год нет.
+    """
+    observed = ~np.isnan(kpi)
+    last = MONTHS - 1 - np.argmax(observed[:, ::-1], axis=1)
+    return np.where(observed.any(axis=1), last, -1)
+
+
+def peer_percentiles(
+    kpi: np.ndarray, months: np.ndarray, rows: np.ndarray, neighbours: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Процентили KPI строк `rows` среди их соседей `neighbours` за последний месяц строки:
+    доля коллег с меньшим KPI плюс половина равных. Коллеги без KPI за этот месяц не учитываются;
+    строки без KPI и без коллег с KPI отбрасываются.
+    """
+    month = months[rows]
+    own = kpi[rows, month]
+    peers = kpi[neighbours, month[:, None]]
+    valid = ~np.isnan(peers)
+    count = valid.sum(axis=1)
+    below = (valid & (peers < own[:, None])).sum(axis=1)
+    equal = (valid & (peers == own[:, None])).sum(axis=1)
+
+    # Медиана по отсортированным значениям: пропуски уходят в конец как +inf
+    ordered = np.sort(np.where(valid, peers, np.inf), axis=1)
+    lower = np.take_along_axis(ordered, np.maximum((count - 1) // 2, 0)[:, None], axis=1)[:, 0]
+    upper = np.take_along_axis(ordered, np.minimum(count // 2, peers.shape[1] - 1)[:, None], axis=1)[:, 0]
+
+    keep = (month >= 0) & (count > 0)
+    return {
+        "rows": rows[keep],
+        "kpi_month": month[keep] + 1,
+        "kpi_value": own[keep],
+        "peer_percentile": (100.0 * (below + 0.5 * equal) / np.maximum(count, 1))[keep],
+        "peer_count": count[keep],
+        "peer_kpi_median": ((lower + upper) / 2)[keep],
+    }
+
+
+def save_percentiles(
+    connection: Connection, kpi_year: int, employee_ids: np.ndarray, parts: List[Dict[str, np.ndarray]]
+) -> None:
+    """
+    Сохраняет процентили пачки сотрудников одним запросом через массивы.
+    """
+    columns = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+    params: Dict[str, Any] = {"kpi_year": kpi_year, "employee_id": employee_ids[columns.pop("rows")].tolist()}
+    for name, values in columns.items():
+        params[name] = values.tolist()
+    connection.execute(text(UPSERT_PERCENTILES_SQL), params)
+
+
+def compute_peer_percentiles(kpi_year: int) -> Dict[str, Any]:
+    """
+    Пересчитывает процентили KPI всех сотрудников среди `PEERS_GROUP_SIZE` ближайших коллег
+    и сохраняет их одной транзакцией, пачками по `SCORING_BATCH_SIZE`. Индекс строится в памяти
+    по тем же данным, что и процентили, а не берётся из опубликованной версии.
+    """
+    config = setup_config()
+    peers_config = config.peers
+    batch_size = config.scoring.scoring_batch_size
+    started = time.perf_counter()
+    with get_sync_engine().connect() as connection:
+        matrix = load_kpi_matrix(connection, kpi_year, date.today())
+    arrays = index_arrays(matrix)
+    order = sort_order(arrays)
+    index = PeerIndex(0, **{name: values[order] for name, values in arrays.items()})
+    kpi = matrix.kpi[order]
+    months = last_observed_months(kpi)
+
+    saved = 0
+    percentile_sum = 0.0
+    parts: List[Dict[str, np.ndarray]] = []
+    pending = 0
+    with get_sync_engine().begin() as connection:
+        for rows, neighbours, _ in index.iter_nearest(peers_config.peers_group_size, peers_config.peers_block_cells):
+            part = peer_percentiles(kpi, months, rows, neighbours)
+            if not len(part["rows"]):
+                continue
+            parts.append(part)
+            pending += len(part["rows"])
+            saved += len(part["rows"])
+            percentile_sum += float(part["peer_percentile"].sum())
+            if pending >= batch_size:
+                save_percentiles(connection, kpi_year, index.employee_ids, parts)
+                parts, pending = [], 0
+        if parts:
+            save_percentiles(connection, kpi_year, index.employee_ids, parts)
+
+    elapsed = time.perf_counter() - started
+    logger.info("Процентили KPI среди коллег за %d год: %d сотрудников за %.2f c", kpi_year, saved, elapsed)
+    return {
+        "kpi_year": kpi_year,
+        "employees": saved,
+        "mean_percentile": round(percentile_sum / saved, 3) if saved else None,
+        "elapsed": round(elapsed, 3),
+    }
@@ -0,0 +1,43 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, status
+
+from ..config import setup_config
+from .schema import EmployeePeersResponse, Peer
+
+peers_router = APIRouter(prefix="/employees", tags=["peers"])
+
+
+@peers_router.get(
+    "/{employee_id}/peers",
+    response_model=EmployeePeersResponse,
+    summary="Ближайшие коллеги сотрудника по профилю",
+)
+async def get_employee_peers(
+    employee_id: int,
+    k: int = Query(10, ge=1, le=100, description="Сколько коллег вернуть"),
+    kpi_year: Optional[int] = None,
+) -> EmployeePeersResponse:
+    """
+    Возвращает `k` коллег с самым похожим профилем (стаж, возраст, подчинённые, уровень и динамика KPI)
+    из группы сравнения сотрудника, по возрастанию расстояния. Ответ строится по текущей версии
+    индекса коллег, отображённой в память, без запроса к базе.
+    """
+    # Индекс тянет numpy: импортируется при первом запросе, а не при запуске API
+    from .index import get_peer_index_store
+
+    kpi_year = kpi_year or setup_config().scoring.scoring_kpi_year
+    index = get_peer_index_store(kpi_year).index()
+    row = index.row_of(employee_id) if index is not None else None
+    if index is None or row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Сотрудник не найден в индексе коллег")
+    rows, distances = index.nearest(row, k)
+    return EmployeePeersResponse(
+        employee_id=employee_id,
+        kpi_year=kpi_year,
+        version=index.version,
+        peers=[
+            Peer(employee_id=int(index.employee_ids[peer_row]), distance=float(distance))
+            for peer_row, distance in zip(rows, distances)
+        ],
+    )
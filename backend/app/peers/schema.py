@@ -0,0 +1,16 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class Peer(BaseModel):
+    employee_id: int
+    # Евклидово расстояние между нормированными профилями: меньше - похожее
+    distance: float
+
+
+class EmployeePeersResponse(BaseModel):
+    employee_id: int
+    kpi_year: int
+    version: int
+    peers: List[Peer]
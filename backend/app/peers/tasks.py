@@ -0,0 +1,22 @@
+from typing import Any, Dict, List, Optional
+
+from app.celery import celery_app
+from app.config import setup_config
+from app.peers.index import publish_peer_index
+from app.peers.percentiles import compute_peer_percentiles
+
+
+@celery_app.task(name="app.peers.refresh_peer_index")
+def refresh_peer_index_task(kpi_year: Optional[int] = None, employee_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    Публикует новую версию индекса коллег: с `employee_ids` - заменяя строки только этих сотрудников.
+    """
+    return publish_peer_index(kpi_year or setup_config().scoring.scoring_kpi_year, employee_ids)
+
+
+@celery_app.task(name="app.peers.compute_peer_percentiles")
+def compute_peer_percentiles_task(kpi_year: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Пересчитывает процентили KPI всех сотрудников среди ближайших коллег.
+    """
+    return compute_peer_percentiles(kpi_year or setup_config().scoring.scoring_kpi_year)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Dict, Optional, Sequence
+
+from sqlalchemy import Connection, text
+
+from app.common.cache import ROLLUPS_NAMESPACE, bump_cache_version
+from app.database import get_sync_engine
+from app.kpis.storage import kpi_source
+
+logger = logging.getLogger(__name__)
+
+ALL_MONTHS = list(range(1, 13))
+
+# Обновления агрегатов одних и тех же месяцев выполняются по одному
+ROLLUP_LOCK_KEY = 7_301_003
+
+COHORT_DIMENSIONS = (
+    "all",
+    "age_band",
+    "tenure_band",
+    "has_subordinates",
+    "has_disciplinary_action",
+    "participates_in_corporate_events",
+)
+
+DELETE_MONTHS_SQL = "DELETE FROM kpi_cohort_rollups WHERE year = :year AND month = ANY(:months)"
+
+# Условие k.year = :year оставляет одну секцию employee_kpis, а k.month = ANY(:months) читает только нужные
+# месяцы по покрывающему индексу ix_employee_kpis_month_year. Для года с удалённой секцией строки
+# берутся из упакованных значений (`kpi_source`), иначе полный пересчёт стёр бы его агрегаты.
+# Каждая строка KPI разворачивается в строку на каждый признак, после чего агрегаты всех когорт
+# считаются одной группировкой.
+INSERT_MONTHS_SQL = """
+INSERT INTO kpi_cohort_rollups (year, month, dimension, cohort, employees, kpi_avg, kpi_median, kpi_p90)
+SELECT
+    :year,
+    k.month,
+    d.dimension,
+    d.cohort,
+    count(*),
+    avg(k.kpi_value),
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY k.kpi_value),
+    percentile_cont(0.9) WITHIN GROUP (ORDER BY k.kpi_value)
+FROM {kpi_table} k
+JOIN employees e ON e.id = k.employee_id
+CROSS JOIN LATERAL (
+    VALUES
+        ('all', 'all'),
+        (
+            'age_band',
+            CASE
+                WHEN e.age IS NULL THEN 'unknown'
+                WHEN e.age < 25 THEN '<25'
+                WHEN e.age < 35 THEN '25-34'
+                WHEN e.age < 45 THEN '35-44'
+                WHEN e.age < 55 THEN '45-54'
+                ELSE '55+'
+            END
+        ),
+        (
+            'tenure_band',
+            CASE
+                WHEN e.tenure_years < 1 THEN '<1'
+                WHEN e.tenure_years < 3 THEN '1-3'
+                WHEN e.tenure_years < 5 THEN '3-5'
+                WHEN e.tenure_years < 10 THEN '5-10'
+                ELSE '10+'
+            END
+        ),
+        ('has_subordinates', e.has_subordinates::text),
+        ('has_disciplinary_action', coalesce(e.has_disciplinary_action::text, 'unknown')),
+        ('participates_in_corporate_events', coalesce(e.participates_in_corporate_events::text, 'unknown'))
+) AS d(dimension, cohort)
+WHERE k.month = ANY(:months) AND k.year = :year
+GROUP BY k.month, d.dimension, d.cohort
+"""
+
+
+def refresh_months(connection: Connection, year: int, months: Sequence[int]) -> int:
+    """
+    Пересчитывает агрегаты за указанные месяцы в текущей транзакции. Читатели до фиксации
+    видят прежние значения, поэтому таблица не бывает частично пустой.
+    """
+    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ROLLUP_LOCK_KEY})
+    params = {"year": year, "months": list(months)}
+    connection.execute(text(DELETE_MONTHS_SQL), params)
+    insert_sql = INSERT_MONTHS_SQL.format(kpi_table=kpi_source(connection, year))
+    return connection.execute(text(insert_sql), params).rowcount
+
+
+def refresh_kpi_rollups(year: int, months: Optional[Sequence[int]] = None) -> Dict[str, Any]:
+    """
+    Обновляет агрегаты KPI по когортам за `months` (по умолчанию - за все месяцы года).
+    """
+    months = sorted(set(months)) if months is not None else ALL_MONTHS
+    if not months:
+        return {"year": year, "months": [], "rows": 0}
+
+    started = time.perf_counter()
+    with get_sync_engine().begin() as connection:
+        rows = refresh_months(connection, year, months)
+    bump_cache_version(ROLLUPS_NAMESPACE)
+    elapsed = time.perf_counter() - started
+    logger.info("Агрегаты KPI за %d год, месяцы %s: %d строк за %.2f c", year, months, rows, elapsed)
+    return {"year": year, "months": months, "rows": rows, "elapsed": round(elapsed, 3)}
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..common.cache import ROLLUPS_NAMESPACE, cached
+from ..database import get_async_session
+from ..models import KPICohortRollup
+from .schema import CohortDimension, CohortMonthStats, CohortRollupResponse
+
+rollups_router = APIRouter(prefix="/rollups", tags=["rollups"])
+
+
+@rollups_router.get(
+    "/kpi",
+    response_model=CohortRollupResponse,
+    summary="Агрегаты KPI по месяцам в разрезе когорт",
+)
+@cached(ROLLUPS_NAMESPACE, ttl=600)
+async def get_kpi_rollups(
+    year: int = 2025,
+    dimension: CohortDimension = CohortDimension.ALL,
+    session: AsyncSession = Depends(get_async_session),
+) -> CohortRollupResponse:
+    """
+    Возвращает среднее, медиану и 90-й перцентиль KPI по месяцам для всех когорт выбранного признака.
+    Читает только предрассчитанную таблицу по её уникальному индексу.
+    """
+    statement = (
+        select(
+            KPICohortRollup.cohort,
+            KPICohortRollup.month,
+            KPICohortRollup.employees,
+            KPICohortRollup.kpi_avg,
+            KPICohortRollup.kpi_median,
+            KPICohortRollup.kpi_p90,
+        )
+        .where(KPICohortRollup.year == year, KPICohortRollup.dimension == dimension.value)
+        .order_by(KPICohortRollup.cohort, KPICohortRollup.month)
+    )
+    rows = (await session.exec(statement)).all()
+    return CohortRollupResponse(
+        year=year,
+        dimension=dimension,
+        items=[CohortMonthStats.model_validate(row, from_attributes=True) for row in rows],
+    )
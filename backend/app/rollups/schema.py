@@ -0,0 +1,28 @@
+from enum import Enum
+from typing import List
+
+from pydantic import BaseModel
+
+
+class CohortDimension(str, Enum):
+    ALL = "all"
+    AGE_BAND = "age_band"
+    TENURE_BAND = "tenure_band"
+    HAS_SUBORDINATES = "has_subordinates"
+    HAS_DISCIPLINARY_ACTION = "has_disciplinary_action"
+    PARTICIPATES_IN_CORPORATE_EVENTS = "participates_in_corporate_events"
+
+
+class CohortMonthStats(BaseModel):
+    cohort: str
+    month: int
+    employees: int
+    kpi_avg: float
+    kpi_median: float
+    kpi_p90: float
+
+
+class CohortRollupResponse(BaseModel):
+    year: int
+    dimension: CohortDimension
+    items: List[CohortMonthStats]
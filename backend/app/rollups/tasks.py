@@ -0,0 +1,12 @@
+from typing import Any, Dict, List, Optional
+
+from app.celery import celery_app
+from app.rollups.refresh import refresh_kpi_rollups
+
+
+@celery_app.task(name="app.rollups.refresh_kpi_rollups")
+def refresh_kpi_rollups_task(year: int, months: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    Обновляет агрегаты KPI по когортам за указанные месяцы (по умолчанию - за весь год).
+    """
+    return refresh_kpi_rollups(year, months)
@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Mapping, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import Connection, text
+
+from app.database import get_sync_engine
+from app.kpis.storage import compact_enabled, kpi_source
+
+logger = logging.getLogger(__name__)
+
+MONTHS = 12
+FETCH_BATCH_SIZE = 50_000
+
+# Неизвестная дата отпуска считается отпуском год назад
+DEFAULT_DAYS_SINCE_VACATION = 365.0
+
+# Масштабы признаков подобраны под значения KPI порядка 0..1.5. Они фиксированы, а не считаются
+# по выборке, поэтому оценка сотрудника не зависит от того, вместе с кем его пересчитывают.
+FEATURE_SCALES: Dict[str, float] = {
+    "trend_slope": 0.05,
+    "max_drop": 0.2,
+    "volatility": 0.15,
+    "kpi_zscore": 1.0,
+    "days_since_vacation": 365.0,
+}
+
+RISK_WEIGHTS: Dict[str, float] = {
+    "trend_slope": 0.8,
+    "max_drop": 0.6,
+    "volatility": 0.3,
+    "kpi_zscore": 0.7,
+    "days_since_vacation": 0.9,
+    "took_sick_leave": 0.5,
+    "has_disciplinary_action": 0.6,
+    "no_corporate_events": 0.4,
+    "has_subordinates": 0.2,
+}
+RISK_BIAS = -3.0
+
+KPI_MATRIX_TEMPLATE = """
+SELECT
+    e.id,
+    e.tenure_years,
+    e.age,
+    e.has_subordinates,
+    coalesce(e.took_sick_leave_2025, false),
+    coalesce(e.has_disciplinary_action, false),
+    coalesce(e.participates_in_corporate_events, true),
+    CAST(:as_of AS date) - e.last_vacation_date,
+    {month_columns}
+FROM employees e
+{kpi_join}
+{{where}}
+{group_by}
+ORDER BY e.id
+"""
+
+KPI_MATRIX_SQL = KPI_MATRIX_TEMPLATE.format(
+    month_columns=",\n    ".join(
+        f"max(k.kpi_value) FILTER (WHERE k.month = {month})" for month in range(1, MONTHS + 1)
+    ),
+    kpi_join="LEFT JOIN {kpi_table} k ON k.employee_id = e.id AND k.year = :year",
+    group_by="GROUP BY e.id",
+)
+
+# То же из employee_kpi_years: строка на сотрудника, без группировки 12 строк KPI
+COMPACT_KPI_MATRIX_SQL = KPI_MATRIX_TEMPLATE.format(
+    month_columns=",\n    ".join(f"c.kpi_values[{month}]" for month in range(1, MONTHS + 1)),
+    kpi_join="LEFT JOIN employee_kpi_years c ON c.employee_id = e.id AND c.year = :year",
+    group_by="",
+)
+
+
+@dataclass
+class KPIMatrix:
+    """
+    Плотное представление сотрудников и их KPI: строка - сотрудник, столбец - месяц.
+    Пропущенные значения KPI, возраста и давности отпуска - NaN.
+    """
+
+    employee_ids: np.ndarray
+    kpi: np.ndarray
+    tenure_years: np.ndarray
+    age: np.ndarray
+    has_subordinates: np.ndarray
+    took_sick_leave: np.ndarray
+    has_disciplinary_action: np.ndarray
+    participates_in_corporate_events: np.ndarray
+    days_since_vacation: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.employee_ids)
+
+
+@dataclass
+class RiskScores:
+    employee_ids: np.ndarray
+    score: np.ndarray
+    features: Dict[str, np.ndarray]
+
+
+def load_kpi_matrix(
+    connection: Connection,
+    year: int,
+    as_of: date,
+    min_id: Optional[int] = None,
+    max_id: Optional[int] = None,
+    employee_ids: Optional[Sequence[int]] = None,
+    compact: Optional[bool] = None,
+) -> KPIMatrix:
+    """
+    Загружает сотрудников и KPI за `year` одним запросом, разворачивая месяцы в столбцы на стороне БД.
+    Можно ограничить диапазоном идентификаторов `[min_id, max_id]` или явным списком `employee_ids`.
+
+    С `compact` (по умолчанию - при `KPI_COMPACT_ENABLED`) значения читаются из `employee_kpi_years`,
+    где хранятся как real с точностью около 7 знаков.
+    """
+    if compact is None:
+        compact = compact_enabled()
+    conditions = []
+    params = {"year": year, "as_of": as_of}
+    if min_id is not None:
+        conditions.append("e.id >= :min_id")
+        params["min_id"] = min_id
+    if max_id is not None:
+        conditions.append("e.id <= :max_id")
+        params["max_id"] = max_id
+    if employee_ids is not None:
+        conditions.append("e.id = ANY(:employee_ids)")
+        params["employee_ids"] = list(employee_ids)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    if compact:
+        sql = COMPACT_KPI_MATRIX_SQL.format(where=where)
+    else:
+        # Год с удалённой секцией читается из упакованных значений
+        sql = KPI_MATRIX_SQL.format(where=where, kpi_table=kpi_source(connection, year))
+    result = connection.execute(
+        text(sql),
+        params,
+        execution_options={"stream_results": True, "yield_per": FETCH_BATCH_SIZE},
+    )
+    blocks = [np.array(rows, dtype=object) for rows in result.partitions()]
+    data = np.concatenate(blocks) if blocks else np.empty((0, 8 + MONTHS), dtype=object)
+
+    def as_float(column: np.ndarray) -> np.ndarray:
+        return np.where(np.equal(column, None), np.nan, column).astype(np.float64)
+
+    return KPIMatrix(
+        employee_ids=data[:, 0].astype(np.int64),
+        tenure_years=data[:, 1].astype(np.float64),
+        age=as_float(data[:, 2]),
+        has_subordinates=data[:, 3].astype(bool),
+        took_sick_leave=data[:, 4].astype(bool),
+        has_disciplinary_action=data[:, 5].astype(bool),
+        participates_in_corporate_events=data[:, 6].astype(bool),
+        days_since_vacation=as_float(data[:, 7]),
+        kpi=np.where(np.equal(data[:, 8:], None), np.nan, data[:, 8:]).astype(np.float64),
+    )
+
+
+def compute_features(matrix: KPIMatrix) -> Dict[str, np.ndarray]:
+    """
+    Считает признаки для всех сотрудников сразу, без циклов по сотрудникам.
+
+    - `trend_slope` - наклон линейного тренда KPI по месяцам;
+    - `max_drop` - наибольшее падение KPI между соседними месяцами;
+    - `volatility` - стандартное отклонение KPI;
+    - `kpi_zscore` - z-оценка последнего KPI относительно предыдущих месяцев того же сотрудника;
+    - `days_since_vacation` - дней с последнего отпуска.
+    """
+    kpi = matrix.kpi
+    observed = ~np.isnan(kpi)
+    values = np.where(observed, kpi, 0.0)
+    count = observed.sum(axis=1)
+    safe_count = np.maximum(count, 1)
+
+    mean = values.sum(axis=1) / safe_count
+    centered = np.where(observed, kpi - mean[:, None], 0.0)
+    volatility = np.sqrt((centered**2).sum(axis=1) / safe_count)
+
+    months = np.arange(1, MONTHS + 1, dtype=np.float64)
+    month_mean = (observed * months).sum(axis=1) / safe_count
+    month_centered = np.where(observed, months - month_mean[:, None], 0.0)
+    denominator = (month_centered**2).sum(axis=1)
+    trend_slope = np.divide(
+        (month_centered * centered).sum(axis=1),
+        denominator,
+        out=np.zeros_like(denominator),
+        where=denominator > 0,
+    )
+
+    diffs = kpi[:, 1:] - kpi[:, :-1]
+    max_drop = np.clip(-np.where(np.isnan(diffs), np.inf, diffs).min(axis=1), 0.0, None)
+    max_drop[np.isinf(max_drop)] = 0.0
+
+    # Скользящие статистики по предыдущим месяцам через накопленные суммы
+    prior_count = np.cumsum(observed, axis=1)[:, :-1]
+    prior_sum = np.cumsum(values, axis=1)[:, :-1]
+    prior_sq_sum = np.cumsum(values**2, axis=1)[:, :-1]
+    safe_prior = np.maximum(prior_count, 1)
+    prior_mean = prior_sum / safe_prior
+    prior_std = np.sqrt(np.maximum(prior_sq_sum / safe_prior - prior_mean**2, 0.0))
+    valid = observed[:, 1:] & (prior_count >= 3) & (prior_std > 1e-9)
+    zscores = np.divide(values[:, 1:] - prior_mean, prior_std, out=np.zeros_like(prior_mean), where=valid)
+    # Берём z-оценку последнего месяца, для которого она определена
+    last_valid = (valid.shape[1] - 1) - np.argmax(valid[:, ::-1], axis=1)
+    kpi_zscore = np.where(valid.any(axis=1), zscores[np.arange(len(kpi)), last_valid], 0.0)
+
+    days_since_vacation = np.where(
+        np.isnan(matrix.days_since_vacation), DEFAULT_DAYS_SINCE_VACATION, matrix.days_since_vacation
+    )
+
+    return {
+        "trend_slope": trend_slope,
+        "max_drop": max_drop,
+        "volatility": volatility,
+        "kpi_zscore": kpi_zscore,
+        "days_since_vacation": days_since_vacation,
+        "kpi_mean": mean,
+        "kpi_months": count,
+    }
+
+
+def combine_risk(matrix: KPIMatrix, features: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Сводит признаки и флаги сотрудника в оценку риска выгорания от 0 до 1.
+    """
+    return risk_from_features(
+        features,
+        took_sick_leave=matrix.took_sick_leave,
+        has_disciplinary_action=matrix.has_disciplinary_action,
+        participates_in_corporate_events=matrix.participates_in_corporate_events,
+        has_subordinates=matrix.has_subordinates,
+    )
+
+
+def risk_from_features(
+    features: Mapping[str, np.ndarray],
+    took_sick_leave: np.ndarray,
+    has_disciplinary_action: np.ndarray,
+    participates_in_corporate_events: np.ndarray,
+    has_subordinates: np.ndarray,
+) -> np.ndarray:
+    """
+    То же по уже посчитанным признакам - например, из хранилища признаков, без матрицы KPI.
+    """
+    logit = np.full(len(took_sick_leave), RISK_BIAS)
+    # Рост риска дают падение тренда и отрицательная z-оценка, а не их абсолютные значения
+    logit += RISK_WEIGHTS["trend_slope"] * np.clip(-features["trend_slope"] / FEATURE_SCALES["trend_slope"], 0, 5)
+    logit += RISK_WEIGHTS["max_drop"] * np.clip(features["max_drop"] / FEATURE_SCALES["max_drop"], 0, 5)
+    logit += RISK_WEIGHTS["volatility"] * np.clip(features["volatility"] / FEATURE_SCALES["volatility"], 0, 5)
+    logit += RISK_WEIGHTS["kpi_zscore"] * np.clip(-features["kpi_zscore"] / FEATURE_SCALES["kpi_zscore"], 0, 5)
+    logit += RISK_WEIGHTS["days_since_vacation"] * np.clip(
+        features["days_since_vacation"] / FEATURE_SCALES["days_since_vacation"], 0, 3
+    )
+    logit += RISK_WEIGHTS["took_sick_leave"] * took_sick_leave
+    logit += RISK_WEIGHTS["has_disciplinary_action"] * has_disciplinary_action
+    logit += RISK_WEIGHTS["no_corporate_events"] * ~participates_in_corporate_events
+    logit += RISK_WEIGHTS["has_subordinates"] * has_subordinates
+    return 1.0 / (1.0 + np.exp(-logit))
+
+
+def compute_risk_scores(matrix: KPIMatrix) -> RiskScores:
+    features = compute_features(matrix)
+    return RiskScores(employee_ids=matrix.employee_ids, score=combine_risk(matrix, features), features=features)
+
+
+def score_employees(
+    year: int,
+    as_of: Optional[date] = None,
+    min_id: Optional[int] = None,
+    max_id: Optional[int] = None,
+) -> RiskScores:
+    """
+    Загружает данные из БД и считает оценки риска для всех сотрудников (или диапазона id).
+    """
+    as_of = as_of or date.today()
+    started = time.perf_counter()
+    with get_sync_engine().connect() as connection:
+        matrix = load_kpi_matrix(connection, year, as_of, min_id=min_id, max_id=max_id)
+    loaded = time.perf_counter()
+    scores = compute_risk_scores(matrix)
+    logger.info(
+        "Оценено сотрудников: %d (загрузка %.2f c, расчёт %.2f c)",
+        len(matrix),
+        loaded - started,
+        time.perf_counter() - loaded,
+    )
+    return scores
@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+import logging
+import time
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Connection, text
+
+from app.common.cache import SCORES_NAMESPACE, bump_cache_version
+from app.database import get_sync_engine
+from app.scoring.engine import RiskScores, compute_risk_scores, load_kpi_matrix
+
+logger = logging.getLogger(__name__)
+
+# Не даёт двум пересчётам идти одновременно (ключ загрузчика CSV - 7_301_001)
+SCORING_LOCK_KEY = 7_301_002
+SCORING_JOB_NAME = "employee_risk_scores:{kpi_year}"
+
+# Записи с updated_datetime меньше начала ещё не завершённой транзакции (например, слияния загрузчика)
+# могут стать видимы позже, поэтому отметка не продвигается дальше начала самой старой из них.
+# Часть изменений при этом пересчитается повторно, но ни одно не будет пропущено.
+SAFE_WATERMARK_SQL = """
+SELECT least(
+    now(),
+    (
+        SELECT min(xact_start)
+        FROM pg_stat_activity
+        WHERE datname = current_database() AND pid <> pg_backend_pid() AND xact_start IS NOT NULL
+    )
+)
+"""
+
+GET_WATERMARK_SQL = "SELECT watermark FROM job_watermarks WHERE job_name = :job_name"
+
+# Отметка не сдвигается назад: итоги шардированного пересчёта сводятся с отметкой времени его запуска,
+# а инкрементальный пересчёт после него мог уже сохранить более позднюю
+SAVE_WATERMARK_SQL = """
+INSERT INTO job_watermarks (job_name, watermark)
+VALUES (:job_name, :watermark)
+ON CONFLICT (job_name) DO UPDATE
+SET watermark = greatest(job_watermarks.watermark, EXCLUDED.watermark), updated_datetime = now()
+"""
+
+# Шардированный пересчёт идёт в нескольких задачах, поэтому вместо блокировки сессии задачу занимает
+# срок `running_until`: до сведения итогов (или его истечения) другие пересчёты пропускаются
+CLAIM_JOB_SQL = """
+INSERT INTO job_watermarks (job_name, running_until)
+VALUES (:job_name, now() + make_interval(secs => :lease_seconds))
+ON CONFLICT (job_name) DO UPDATE
+SET running_until = EXCLUDED.running_until, updated_datetime = now()
+WHERE job_watermarks.running_until IS NULL OR job_watermarks.running_until < now()
+RETURNING job_name
+"""
+
+JOB_RUNNING_SQL = "SELECT running_until > now() FROM job_watermarks WHERE job_name = :job_name"
+
+RELEASE_JOB_SQL = "UPDATE job_watermarks SET running_until = NULL, updated_datetime = now() WHERE job_name = :job_name"
+
+ALL_EMPLOYEES_SQL = "SELECT id FROM employees ORDER BY id"
+
+# Диапазоны id по `shard_size` сотрудников: шарды равны по числу сотрудников, даже если в id есть пропуски
+SHARD_RANGES_SQL = """
+SELECT min(id), max(id)
+FROM (SELECT id, (row_number() OVER (ORDER BY id) - 1) / :shard_size AS shard FROM employees) s
+GROUP BY shard
+ORDER BY shard
+"""
+
+# Порог, начиная с которого сотрудник попадает в счётчик высокого риска в итогах пересчёта
+HIGH_RISK_THRESHOLD = 0.7
+
+CHANGED_EMPLOYEES_SQL = """
+SELECT id FROM employees WHERE updated_datetime > :watermark
+UNION
+SELECT employee_id FROM employee_kpis WHERE updated_datetime > :watermark AND year = :kpi_year
+ORDER BY 1
+"""
+
+UPSERT_SCORES_SQL = """
+INSERT INTO employee_risk_scores (
+    employee_id, kpi_year, risk_score, trend_slope, max_drop, volatility,
+    kpi_zscore, days_since_vacation, kpi_mean, kpi_months, as_of
+)
+SELECT
+    s.employee_id, :kpi_year, s.risk_score, s.trend_slope, s.max_drop, s.volatility,
+    s.kpi_zscore, s.days_since_vacation, s.kpi_mean, s.kpi_months, :as_of
+FROM unnest(
+    CAST(:employee_id AS integer[]),
+    CAST(:risk_score AS double precision[]),
+    CAST(:trend_slope AS double precision[]),
+    CAST(:max_drop AS double precision[]),
+    CAST(:volatility AS double precision[]),
+    CAST(:kpi_zscore AS double precision[]),
+    CAST(:days_since_vacation AS double precision[]),
+    CAST(:kpi_mean AS double precision[]),
+    CAST(:kpi_months AS integer[])
+) AS s(
+    employee_id, risk_score, trend_slope, max_drop, volatility,
+    kpi_zscore, days_since_vacation, kpi_mean, kpi_months
+)
+-- Сотрудник мог быть удалён после чтения матрицы
+JOIN employees e ON e.id = s.employee_id
+ON CONFLICT ON CONSTRAINT uq_risk_score_employee_year DO UPDATE
+SET
+    risk_score = EXCLUDED.risk_score,
+    trend_slope = EXCLUDED.trend_slope,
+    max_drop = EXCLUDED.max_drop,
+    volatility = EXCLUDED.volatility,
+    kpi_zscore = EXCLUDED.kpi_zscore,
+    days_since_vacation = EXCLUDED.days_since_vacation,
+    kpi_mean = EXCLUDED.kpi_mean,
+    kpi_months = EXCLUDED.kpi_months,
+    as_of = EXCLUDED.as_of,
+    updated_datetime = now()
+"""
+
+
+def save_scores(connection: Connection, scores: RiskScores, kpi_year: int, as_of: date) -> None:
+    """
+    Сохраняет оценки пачки сотрудников одним запросом через массивы.
+    """
+    params: Dict[str, Any] = {
+        "kpi_year": kpi_year,
+        "as_of": as_of,
+        "employee_id": scores.employee_ids.tolist(),
+        "risk_score": scores.score.tolist(),
+    }
+    for name in ("trend_slope", "max_drop", "volatility", "kpi_zscore", "days_since_vacation", "kpi_mean"):
+        params[name] = scores.features[name].tolist()
+    params["kpi_months"] = scores.features["kpi_months"].tolist()
+    connection.execute(text(UPSERT_SCORES_SQL), params)
+
+
+def find_employees_to_score(connection: Connection, kpi_year: int, watermark: Optional[datetime]) -> np.ndarray:
+    """
+    Возвращает id сотрудников, у которых с `watermark` менялись атрибуты или KPI за `kpi_year`.
+    Без отметки возвращает всех сотрудников.
+    """
+    if watermark is None:
+        rows = connection.execute(text(ALL_EMPLOYEES_SQL))
+    else:
+        rows = connection.execute(text(CHANGED_EMPLOYEES_SQL), {"watermark": watermark, "kpi_year": kpi_year})
+    return np.fromiter((row[0] for row in rows), dtype=np.int64)
+
+
+def plan_shards(connection: Connection, shard_size: int) -> List[Tuple[int, int]]:
+    """
+    Делит всех сотрудников на диапазоны `[min_id, max_id]` примерно по `shard_size` человек.
+    """
+    rows = connection.execute(text(SHARD_RANGES_SQL), {"shard_size": shard_size})
+    return [(min_id, max_id) for min_id, max_id in rows]
+
+
+def is_job_running(connection: Connection, job_name: str) -> bool:
+    return bool(connection.execute(text(JOB_RUNNING_SQL), {"job_name": job_name}).scalar())
+
+
+def release_job(kpi_year: int) -> None:
+    """
+    Снимает занятость задачи шардированным пересчётом (после сведения итогов или сбоя chord).
+    """
+    with get_sync_engine().begin() as connection:
+        connection.execute(text(RELEASE_JOB_SQL), {"job_name": SCORING_JOB_NAME.format(kpi_year=kpi_year)})
+
+
+def start_sharded_recompute(kpi_year: int, shard_size: int, lease_seconds: float) -> Optional[Dict[str, Any]]:
+    """
+    Готовит полный пересчёт по шардам: отметку времени, с которой потом продолжат инкрементальные
+    запуски, и диапазоны id. Если шардов больше одного, занимает задачу на `lease_seconds` -
+    до сведения итогов в `merge_shard_results`. Возвращает None, если уже идёт другой пересчёт.
+    """
+    job_name = SCORING_JOB_NAME.format(kpi_year=kpi_year)
+    with get_sync_engine().connect() as connection:
+        if not connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": SCORING_LOCK_KEY}).scalar():
+            logger.info("Пересчёт оценок риска уже выполняется, пропускаю запуск")
+            connection.rollback()
+            return None
+        try:
+            watermark = connection.execute(text(SAFE_WATERMARK_SQL)).scalar()
+            shards = plan_shards(connection, shard_size)
+            if len(shards) > 1:
+                claimed = connection.execute(
+                    text(CLAIM_JOB_SQL), {"job_name": job_name, "lease_seconds": lease_seconds}
+                ).scalar()
+                if claimed is None:
+                    logger.info("Шардированный пересчёт оценок риска ещё не сведён, пропускаю запуск")
+                    connection.rollback()
+                    return None
+            connection.commit()
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCORING_LOCK_KEY})
+            connection.commit()
+    return {"watermark": watermark.isoformat() if watermark else None, "shards": shards}
+
+
+def score_shard(kpi_year: int, as_of: date, min_id: int, max_id: int) -> Dict[str, Any]:
+    """
+    Пересчитывает и сохраняет оценки сотрудников с id в `[min_id, max_id]` в одной транзакции,
+    поэтому повтор упавшего шарда просто перезаписывает его оценки.
+    """
+    started = time.perf_counter()
+    with get_sync_engine().begin() as connection:
+        scores = compute_risk_scores(load_kpi_matrix(connection, kpi_year, as_of, min_id=min_id, max_id=max_id))
+        if len(scores.employee_ids):
+            save_scores(connection, scores, kpi_year, as_of)
+    return {
+        "min_id": min_id,
+        "max_id": max_id,
+        "employees_scored": len(scores.employee_ids),
+        "score_sum": float(scores.score.sum()),
+        "high_risk": int((scores.score >= HIGH_RISK_THRESHOLD).sum()),
+        "elapsed": round(time.perf_counter() - started, 3),
+    }
+
+
+def merge_shard_results(kpi_year: int, results: Sequence[Dict[str, Any]], watermark: Optional[str]) -> Dict[str, Any]:
+    """
+    Сводит итоги шардов, сохраняет отметку времени полного пересчёта, освобождает задачу
+    и сбрасывает кэш оценок.
+    """
+    employees_scored = sum(result["employees_scored"] for result in results)
+    score_sum = sum(result["score_sum"] for result in results)
+    job_name = SCORING_JOB_NAME.format(kpi_year=kpi_year)
+    with get_sync_engine().begin() as connection:
+        if watermark is not None:
+            connection.execute(
+                text(SAVE_WATERMARK_SQL), {"job_name": job_name, "watermark": datetime.fromisoformat(watermark)}
+            )
+        connection.execute(text(RELEASE_JOB_SQL), {"job_name": job_name})
+    if employees_scored:
+        bump_cache_version(SCORES_NAMESPACE)
+
+    summary = {
+        "employees_scored": employees_scored,
+        "full": True,
+        "shards": len(results),
+        "high_risk": sum(result["high_risk"] for result in results),
+        "mean_score": round(score_sum / employees_scored, 6) if employees_scored else None,
+        "shard_seconds_max": max((result["elapsed"] for result in results), default=0.0),
+        "shard_seconds_total": round(sum(result["elapsed"] for result in results), 3),
+        "watermark": watermark,
+    }
+    logger.info(
+        "Пересчитаны оценки риска по %d шардам: %d сотрудников, самый долгий шард %.2f c",
+        summary["shards"],
+        employees_scored,
+        summary["shard_seconds_max"],
+    )
+    return summary
+
+
+def recompute_employees(kpi_year: int, employee_ids: Sequence[int], as_of: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Пересчитывает оценки перечисленных сотрудников - по уведомлениям об изменениях, без поиска
+    изменившихся по отметке времени. Отметку не двигает: плановый запуск по ней просто пересчитает
+    этих сотрудников ещё раз.
+    """
+    as_of = as_of or date.today()
+    started = time.perf_counter()
+    with get_sync_engine().begin() as connection:
+        scores = compute_risk_scores(load_kpi_matrix(connection, kpi_year, as_of, employee_ids=list(employee_ids)))
+        if len(scores.employee_ids):
+            save_scores(connection, scores, kpi_year, as_of)
+    if len(scores.employee_ids):
+        bump_cache_version(SCORES_NAMESPACE)
+    return {"employees_scored": len(scores.employee_ids), "elapsed": round(time.perf_counter() - started, 3)}
+
+
+def recompute_risk_scores(
+    kpi_year: int,
+    as_of: Optional[date] = None,
+    full: bool = False,
+    batch_size: int = 50_000,
+) -> Dict[str, Any]:
+    """
+    Пересчитывает оценки риска сотрудников, чьи данные изменились с прошлого запуска.
+
+    С `full=True` пересчитываются все сотрудники - это нужно, чтобы оценки учитывали
+    давность отпуска на текущую дату. Если пересчёт уже идёт (в том числе шардированный), запуск
+    пропускается.
+    """
+    as_of = as_of or date.today()
+    job_name = SCORING_JOB_NAME.format(kpi_year=kpi_year)
+    started = time.perf_counter()
+
+    with get_sync_engine().connect() as connection:
+        if not connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": SCORING_LOCK_KEY}).scalar():
+            logger.info("Пересчёт оценок риска уже выполняется, пропускаю запуск")
+            connection.rollback()
+            return {"skipped": True}
+        try:
+            if is_job_running(connection, job_name):
+                logger.info("Идёт шардированный пересчёт оценок риска, пропускаю запуск")
+                connection.rollback()
+                return {"skipped": True}
+            new_watermark = connection.execute(text(SAFE_WATERMARK_SQL)).scalar()
+            watermark = None if full else connection.execute(text(GET_WATERMARK_SQL), {"job_name": job_name}).scalar()
+            employee_ids = find_employees_to_score(connection, kpi_year, watermark)
+            connection.commit()
+
+            batches: List[np.ndarray] = np.array_split(employee_ids, max(1, -(-len(employee_ids) // batch_size)))
+            for batch in batches:
+                if not len(batch):
+                    continue
+                with get_sync_engine().begin() as batch_connection:
+                    matrix = load_kpi_matrix(batch_connection, kpi_year, as_of, employee_ids=batch.tolist())
+                    save_scores(batch_connection, compute_risk_scores(matrix), kpi_year, as_of)
+
+            connection.execute(text(SAVE_WATERMARK_SQL), {"job_name": job_name, "watermark": new_watermark})
+            connection.commit()
+            if len(employee_ids):
+                bump_cache_version(SCORES_NAMESPACE)
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCORING_LOCK_KEY})
+            connection.commit()
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Пересчитаны оценки риска: %d сотрудников за %.2f c (%s)",
+        len(employee_ids),
+        elapsed,
+        "полный" if watermark is None else f"изменения после {watermark.isoformat()}",
+    )
+    return {
+        "employees_scored": len(employee_ids),
+        "full": watermark is None,
+        "watermark": new_watermark.isoformat() if new_watermark else None,
+        "elapsed": round(elapsed, 3),
+    }
@@ -0,0 +1,37 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, status
+from sqlmodel import select
+
+from ..common.cache import SCORES_NAMESPACE, cached
+from ..config import setup_config
+from ..database import async_session_maker
+from ..models import EmployeeRiskScore
+from .schema import EmployeeRiskResponse
+
+risk_router = APIRouter(prefix="/employees", tags=["scoring"])
+
+
+@risk_router.get(
+    "/{employee_id}/risk",
+    response_model=EmployeeRiskResponse,
+    summary="Оценка риска выгорания сотрудника",
+)
+@cached(SCORES_NAMESPACE, ttl=300)
+async def get_employee_risk(employee_id: int, kpi_year: Optional[int] = None) -> EmployeeRiskResponse:
+    """
+    Возвращает последнюю рассчитанную оценку риска сотрудника и признаки, из которых она получена.
+    """
+    kpi_year = kpi_year or setup_config().scoring.scoring_kpi_year
+    async with async_session_maker() as session:
+        score = (
+            await session.exec(
+                select(EmployeeRiskScore).where(
+                    EmployeeRiskScore.employee_id == employee_id,
+                    EmployeeRiskScore.kpi_year == kpi_year,
+                )
+            )
+        ).first()
+    if score is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Оценка риска не найдена")
+    return EmployeeRiskResponse.model_validate(score, from_attributes=True)
@@ -0,0 +1,19 @@
+from datetime import date, datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class EmployeeRiskResponse(BaseModel):
+    employee_id: int
+    kpi_year: int
+    risk_score: float
+    trend_slope: float
+    max_drop: float
+    volatility: float
+    kpi_zscore: float
+    days_since_vacation: float
+    kpi_mean: float
+    kpi_months: int
+    as_of: date
+    updated_datetime: Optional[datetime] = None
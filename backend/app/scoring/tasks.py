@@ -0,0 +1,109 @@
+import logging
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from celery import chord, group
+from sqlalchemy.exc import OperationalError
+
+from app.celery import celery_app, celery_config
+from app.config import setup_config
+from app.features.store import publish_feature_store
+from app.scoring.recompute import (
+    merge_shard_results,
+    recompute_employees,
+    recompute_risk_scores,
+    release_job,
+    score_shard,
+    start_sharded_recompute,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="app.scoring.recompute_risk_scores")
+def recompute_risk_scores_task(kpi_year: Optional[int] = None, full: bool = False) -> Dict[str, Any]:
+    """
+    Пересчитывает оценки риска сотрудников, чьи атрибуты или KPI изменились с прошлого запуска.
+
+    Полный пересчёт, если сотрудников больше одного шарда (`SCORING_SHARD_SIZE`), делится на диапазоны id
+    и выполняется chord'ом на воркерах очередей `SCORING_CELERY_QUEUES`.
+    """
+    scoring_config = setup_config().scoring
+    kpi_year = kpi_year or scoring_config.scoring_kpi_year
+    if full:
+        plan = start_sharded_recompute(
+            kpi_year, scoring_config.scoring_shard_size, scoring_config.scoring_full_lease_seconds
+        )
+        if plan is None:
+            return {"skipped": True}
+        if len(plan["shards"]) > 1:
+            return dispatch_shards(kpi_year, plan["shards"], plan["watermark"])
+    summary = recompute_risk_scores(kpi_year=kpi_year, full=full, batch_size=scoring_config.scoring_batch_size)
+    return publish_features(kpi_year, summary)
+
+
+@celery_app.task(name="app.scoring.recompute_employee_scores")
+def recompute_employee_scores_task(kpi_year: int, employee_ids: List[int]) -> Dict[str, Any]:
+    """
+    Пересчитывает оценки риска перечисленных сотрудников (по уведомлениям об изменениях).
+    """
+    return recompute_employees(kpi_year, employee_ids)
+
+
+def publish_features(kpi_year: int, summary: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Публикует новую версию хранилища признаков, если пересчёт изменил оценки.
+    """
+    if summary.get("employees_scored") and setup_config().feature_store.feature_store_enabled:
+        summary["feature_store_version"] = publish_feature_store(kpi_year)["version"]
+    return summary
+
+
+def dispatch_shards(kpi_year: int, shards: List[Tuple[int, int]], watermark: Optional[str]) -> Dict[str, Any]:
+    """
+    Отправляет шарды по кругу в очереди пересчёта; итоги сводит `merge_risk_shards`, а если шард
+    не удался после всех повторов - задачу освобождает `fail_risk_shards`.
+    """
+    as_of = date.today().isoformat()
+    queues = celery_config.scoring_queues
+    header = group(
+        score_risk_shard.s(kpi_year, as_of, min_id, max_id).set(queue=queues[index % len(queues)])
+        for index, (min_id, max_id) in enumerate(shards)
+    )
+    result = chord(header)(merge_risk_shards.s(kpi_year, watermark).on_error(fail_risk_shards.s(kpi_year)))
+    logger.info("Полный пересчёт оценок риска: %d шардов в очередях %s", len(shards), ", ".join(queues))
+    return {"shards": len(shards), "merge_task_id": result.id}
+
+
+@celery_app.task(
+    name="app.scoring.score_risk_shard",
+    # Сообщение подтверждается после выполнения: если процесс воркера упал, шард вернётся в очередь
+    # и выполнится заново один, без перезапуска остальных
+    acks_late=True,
+    reject_on_worker_lost=True,
+    autoretry_for=(OperationalError,),
+    retry_backoff=True,
+    max_retries=3,
+)
+def score_risk_shard(kpi_year: int, as_of: str, min_id: int, max_id: int) -> Dict[str, Any]:
+    """
+    Пересчитывает оценки сотрудников с id в `[min_id, max_id]`.
+    """
+    return score_shard(kpi_year, date.fromisoformat(as_of), min_id, max_id)
+
+
+@celery_app.task(name="app.scoring.merge_risk_shards")
+def merge_risk_shards(results: List[Dict[str, Any]], kpi_year: int, watermark: Optional[str]) -> Dict[str, Any]:
+    """
+    Сводит итоги шардов полного пересчёта.
+    """
+    return publish_features(kpi_year, merge_shard_results(kpi_year, results, watermark))
+
+
+@celery_app.task(name="app.scoring.fail_risk_shards")
+def fail_risk_shards(request: Any, exc: Exception, traceback: Any, kpi_year: int) -> None:
+    """
+    Вызывается, если шард полного пересчёта не удался: освобождает задачу, не сдвигая отметку.
+    """
+    logger.error("Шардированный пересчёт оценок риска за %d год завершился ошибкой: %s", kpi_year, exc)
+    release_job(kpi_year)
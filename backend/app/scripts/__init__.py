@@ -1,2 +1 @@
 
-
@@ -0,0 +1,389 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, List, Tuple
+
+from sqlalchemy import Connection, text
+
+from app.common.metrics import record_load
+from app.database import get_sync_engine
+from app.kpis.storage import compact_enabled, ensure_kpi_partition, pack_kpi_year
+from app.scripts.load_csv import EMPLOYEE_COLUMNS
+from app.scripts.parse_pipeline import DEFAULT_CHUNK_BYTES, ParsedChunk, iter_parsed_chunks
+
+logger = logging.getLogger(__name__)
+
+EMPLOYEE_COLUMNS_SQL = ", ".join(EMPLOYEE_COLUMNS)
+
+# Ключ advisory-блокировки: слияния загрузок (CLI и Celery) выполняются по одному,
+# иначе параллельные загрузки могут создать сотрудников с одинаковым ФИО
+INGEST_LOCK_KEY = 7_301_001
+
+STAGING_DDL = """
+CREATE TEMP TABLE stg_employees (
+    line_no integer NOT NULL,
+    full_name varchar(255) NOT NULL,
+    tenure_years double precision NOT NULL,
+    age integer,
+    has_subordinates boolean NOT NULL,
+    last_vacation_date date,
+    took_sick_leave_2025 boolean,
+    has_disciplinary_action boolean,
+    participates_in_corporate_events boolean,
+    row_hash varchar(32) NOT NULL
+) ON COMMIT DROP;
+
+CREATE TEMP TABLE stg_employee_kpis (
+    line_no integer NOT NULL,
+    month smallint NOT NULL,
+    kpi_value double precision NOT NULL
+) ON COMMIT DROP;
+
+CREATE TEMP TABLE stg_matched (
+    line_no integer PRIMARY KEY,
+    employee_id integer,
+    old_hash varchar(32),
+    is_new boolean NOT NULL DEFAULT false,
+    attrs_changed boolean NOT NULL DEFAULT false
+) ON COMMIT DROP;
+
+CREATE TEMP TABLE stg_kpi_written (
+    employee_id integer NOT NULL,
+    month smallint NOT NULL
+) ON COMMIT DROP;
+"""
+
+# Правило дедупликации то же, что и у построчной загрузки: сотрудник определяется по ФИО,
+# из повторов внутри файла берётся первая строка, из одноимённых записей в базе - самая ранняя.
+MATCH_EMPLOYEES_SQL = """
+CREATE TEMP TABLE stg_first ON COMMIT DROP AS
+SELECT DISTINCT ON (full_name) *
+FROM stg_employees
+ORDER BY full_name, line_no;
+
+INSERT INTO stg_matched (line_no, employee_id, old_hash)
+SELECT f.line_no, e.id, e.row_hash
+FROM stg_first f
+LEFT JOIN LATERAL (
+    SELECT id, row_hash
+    FROM employees
+    WHERE employees.full_name = f.full_name
+    ORDER BY id
+    LIMIT 1
+) e ON true;
+"""
+
+INSERT_NEW_EMPLOYEES_SQL = f"""
+WITH inserted AS (
+    INSERT INTO employees ({EMPLOYEE_COLUMNS_SQL}, row_hash)
+    SELECT {", ".join(f"f.{column}" for column in EMPLOYEE_COLUMNS)}, f.row_hash
+    FROM stg_first f
+    JOIN stg_matched m USING (line_no)
+    WHERE m.employee_id IS NULL
+    ORDER BY f.line_no
+    RETURNING id, full_name
+)
+UPDATE stg_matched m
+SET employee_id = i.id, is_new = true
+FROM inserted i
+JOIN stg_first f USING (full_name)
+WHERE m.line_no = f.line_no
+"""
+
+UPDATE_CHANGED_EMPLOYEES_SQL = f"""
+WITH updated AS (
+    UPDATE employees e
+    SET {", ".join(f"{column} = f.{column}" for column in EMPLOYEE_COLUMNS)},
+        row_hash = f.row_hash,
+        updated_datetime = now()
+    FROM stg_first f
+    JOIN stg_matched m USING (line_no)
+    WHERE e.id = m.employee_id
+      AND NOT m.is_new
+      AND m.old_hash IS DISTINCT FROM f.row_hash
+    RETURNING e.id
+)
+UPDATE stg_matched m
+SET attrs_changed = true
+FROM updated u
+WHERE m.employee_id = u.id
+"""
+
+INSERT_NEW_KPIS_SQL = """
+INSERT INTO employee_kpis (employee_id, month, year, kpi_value)
+SELECT m.employee_id, k.month, :kpi_year, k.kpi_value
+FROM stg_employee_kpis k
+JOIN stg_matched m USING (line_no)
+WHERE m.is_new
+ON CONFLICT ON CONSTRAINT uq_employee_month_year DO NOTHING
+"""
+
+# Неизменившиеся значения отсекаются до ON CONFLICT, чтобы не блокировать и не переписывать строки
+UPSERT_CHANGED_KPIS_SQL = """
+WITH upserted AS (
+    INSERT INTO employee_kpis (employee_id, month, year, kpi_value)
+    SELECT m.employee_id, k.month, :kpi_year, k.kpi_value
+    FROM stg_employee_kpis k
+    JOIN stg_matched m USING (line_no)
+    WHERE NOT EXISTS (
+        SELECT 1
+        FROM employee_kpis x
+        WHERE x.employee_id = m.employee_id
+          AND x.month = k.month
+          AND x.year = :kpi_year
+          AND x.kpi_value = k.kpi_value
+    )
+    ON CONFLICT ON CONSTRAINT uq_employee_month_year DO UPDATE
+    SET kpi_value = EXCLUDED.kpi_value, updated_datetime = now()
+    WHERE employee_kpis.kpi_value IS DISTINCT FROM EXCLUDED.kpi_value
+    RETURNING employee_id, month
+)
+INSERT INTO stg_kpi_written (employee_id, month)
+SELECT employee_id, month FROM upserted
+"""
+
+COUNT_CHANGED_EMPLOYEES_SQL = """
+SELECT
+    count(*) FILTER (WHERE NOT m.is_new),
+    count(*) FILTER (WHERE NOT m.is_new AND (m.attrs_changed OR w.employee_id IS NOT NULL))
+FROM stg_matched m
+LEFT JOIN (SELECT DISTINCT employee_id FROM stg_kpi_written) w USING (employee_id)
+"""
+
+# Месяцы, агрегаты которых изменились: KPI новых сотрудников, перезаписанные KPI
+# и все KPI сотрудников с изменившимися атрибутами (они могли перейти в другую когорту)
+AFFECTED_MONTHS_SQL = """
+SELECT k.month
+FROM stg_employee_kpis k
+JOIN stg_matched m USING (line_no)
+WHERE m.is_new
+UNION
+SELECT month FROM stg_kpi_written
+UNION
+SELECT x.month
+FROM employee_kpis x
+JOIN stg_matched m ON m.employee_id = x.employee_id
+WHERE m.attrs_changed AND x.year = :kpi_year
+ORDER BY 1
+"""
+
+# Сотрудники, KPI которых записаны этой загрузкой: их строки в employee_kpi_years переупаковываются
+WRITTEN_EMPLOYEES_SQL = "SELECT employee_id FROM stg_matched WHERE is_new UNION SELECT employee_id FROM stg_kpi_written"
+
+FILE_LOADED_SQL = """
+SELECT 1 FROM ingest_files WHERE file_sha256 = :file_sha256 AND kpi_year = :kpi_year
+"""
+
+RECORD_FILE_SQL = """
+INSERT INTO ingest_files (
+    file_sha256, file_size, kpi_year, rows_read, employees_inserted, employees_changed, employees_unchanged
+)
+VALUES (
+    :file_sha256, :file_size, :kpi_year, :rows_read, :employees_inserted, :employees_changed, :employees_unchanged
+)
+ON CONFLICT ON CONSTRAINT uq_ingest_file_sha256_year DO UPDATE
+SET rows_read = EXCLUDED.rows_read,
+    employees_inserted = EXCLUDED.employees_inserted,
+    employees_changed = EXCLUDED.employees_changed,
+    employees_unchanged = EXCLUDED.employees_unchanged,
+    updated_datetime = now()
+"""
+
+
+@dataclass
+class LoadStats:
+    """
+    Итоги загрузки CSV.
+    """
+
+    rows_read: int = 0
+    rows_skipped: int = 0
+    errors: int = 0
+    employees_inserted: int = 0
+    employees_changed: int = 0
+    employees_unchanged: int = 0
+    kpis_written: int = 0
+    file_already_loaded: bool = False
+    elapsed: float = 0.0
+    months_changed: List[int] = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_read / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def file_fingerprint(csv_path: Path) -> Tuple[str, int]:
+    """
+    SHA-256 и размер файла, вычисленные за один проход чтения.
+    """
+    with csv_path.open("rb") as csv_file:
+        digest = hashlib.file_digest(csv_file, "sha256").hexdigest()
+    return digest, csv_path.stat().st_size
+
+
+def copy_payload(connection: Connection, employees_file: BinaryIO, kpis_file: BinaryIO) -> None:
+    """
+    Отправляет закодированные данные в staging-таблицы через COPY.
+    """
+    cursor = connection.connection.driver_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY stg_employees (line_no, {EMPLOYEE_COLUMNS_SQL}, row_hash) "
+            "FROM STDIN WITH (FORMAT csv, ENCODING 'UTF8')",
+            employees_file,
+        )
+        cursor.copy_expert(
+            "COPY stg_employee_kpis (line_no, month, kpi_value) FROM STDIN WITH (FORMAT csv)",
+            kpis_file,
+        )
+    finally:
+        cursor.close()
+
+
+def copy_chunk(connection: Connection, parsed: ParsedChunk) -> None:
+    copy_payload(connection, io.BytesIO(parsed.employees_csv), io.BytesIO(parsed.kpis_csv))
+
+
+def report_chunk(parsed: ParsedChunk, stats: LoadStats) -> None:
+    """
+    Логирует пропущенные и ошибочные строки чанка с номерами строк и обновляет счётчики.
+    """
+    stats.rows_read += parsed.rows_read
+    stats.rows_skipped += len(parsed.skipped_lines)
+    stats.errors += len(parsed.errors)
+    for line_no in parsed.skipped_lines:
+        logger.warning("Строка %d: пропущена строка без ФИО", line_no)
+    for error in parsed.errors:
+        logger.warning("%s", error)
+
+
+def create_staging_tables(connection: Connection) -> None:
+    connection.exec_driver_sql(STAGING_DDL)
+
+
+def merge_staging(connection: Connection, kpi_year: int, stats: LoadStats, incremental: bool = False) -> None:
+    """
+    Переносит данные из staging-таблиц в `employees` и `employee_kpis` set-based запросами.
+
+    Без `incremental` добавляются только новые сотрудники и их KPI. С `incremental`
+    у существующих сотрудников обновляются изменившиеся атрибуты (по `row_hash`)
+    и значения KPI, а неизменившиеся строки не затрагиваются.
+    """
+    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": INGEST_LOCK_KEY})
+    ensure_kpi_partition(connection, kpi_year)
+    connection.exec_driver_sql("ANALYZE stg_employees")
+    connection.exec_driver_sql("ANALYZE stg_employee_kpis")
+    connection.exec_driver_sql(MATCH_EMPLOYEES_SQL)
+    stats.employees_inserted += connection.execute(text(INSERT_NEW_EMPLOYEES_SQL)).rowcount
+
+    if not incremental:
+        stats.kpis_written += connection.execute(text(INSERT_NEW_KPIS_SQL), {"kpi_year": kpi_year}).rowcount
+    else:
+        connection.execute(text(UPDATE_CHANGED_EMPLOYEES_SQL))
+        stats.kpis_written += connection.execute(text(UPSERT_CHANGED_KPIS_SQL), {"kpi_year": kpi_year}).rowcount
+        matched, changed = connection.execute(text(COUNT_CHANGED_EMPLOYEES_SQL)).one()
+        stats.employees_changed += changed
+        stats.employees_unchanged += matched - changed
+
+    stats.months_changed = list(connection.execute(text(AFFECTED_MONTHS_SQL), {"kpi_year": kpi_year}).scalars())
+    if compact_enabled():
+        pack_kpi_year(connection, kpi_year, WRITTEN_EMPLOYEES_SQL)
+
+
+def is_file_loaded(connection: Connection, file_sha256: str, kpi_year: int) -> bool:
+    return (
+        connection.execute(text(FILE_LOADED_SQL), {"file_sha256": file_sha256, "kpi_year": kpi_year}).first()
+        is not None
+    )
+
+
+def record_loaded_file(
+    connection: Connection, file_sha256: str, file_size: int, kpi_year: int, stats: LoadStats
+) -> None:
+    connection.execute(
+        text(RECORD_FILE_SQL),
+        {
+            "file_sha256": file_sha256,
+            "file_size": file_size,
+            "kpi_year": kpi_year,
+            "rows_read": stats.rows_read,
+            "employees_inserted": stats.employees_inserted,
+            "employees_changed": stats.employees_changed,
+            "employees_unchanged": stats.employees_unchanged,
+        },
+    )
+
+
+def bulk_load_csv_data(
+    csv_path: Path,
+    kpi_year: int = 2025,
+    workers: int = 1,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    incremental: bool = False,
+    force: bool = False,
+) -> LoadStats:
+    """
+    Загружает CSV через COPY во временные таблицы и одним слиянием переносит данные в основные.
+
+    Файл разбирается чанками по `chunk_bytes` (при `workers > 1` - в пуле процессов),
+    поэтому память ограничена несколькими чанками и не зависит от размера файла.
+    Уже загруженный с тем же годом файл (по SHA-256) пропускается, если не указан `force`.
+    """
+    stats = LoadStats()
+    started = time.perf_counter()
+    file_sha256, file_size = file_fingerprint(csv_path)
+
+    with get_sync_engine().begin() as connection:
+        if not force and is_file_loaded(connection, file_sha256, kpi_year):
+            logger.info("Файл %s (sha256 %s) уже загружен за %d год, пропускаю", csv_path, file_sha256, kpi_year)
+            stats.file_already_loaded = True
+            stats.elapsed = time.perf_counter() - started
+            return stats
+
+        create_staging_tables(connection)
+        for parsed in iter_parsed_chunks(csv_path, workers=workers, chunk_bytes=chunk_bytes, encode_copy=True):
+            report_chunk(parsed, stats)
+            copy_chunk(connection, parsed)
+            logger.info(
+                "Отправлено в staging %d строк (%.0f строк/с)",
+                stats.rows_read,
+                stats.rows_read / max(time.perf_counter() - started, 1e-9),
+            )
+        merge_staging(connection, kpi_year, stats, incremental=incremental)
+        record_loaded_file(connection, file_sha256, file_size, kpi_year, stats)
+
+    stats.elapsed = time.perf_counter() - started
+    log_stats(stats)
+    return stats
+
+
+def log_stats(stats: LoadStats) -> None:
+    """
+    Пишет итоги загрузки в журнал и в счётчики метрик загрузчика.
+    """
+    logger.info(
+        "Прочитано строк: %d, сотрудников добавлено: %d, изменено: %d, без изменений: %d, "
+        "записано KPI: %d, пропущено строк: %d, ошибок: %d за %.1f c (%.0f строк/с)",
+        stats.rows_read,
+        stats.employees_inserted,
+        stats.employees_changed,
+        stats.employees_unchanged,
+        stats.kpis_written,
+        stats.rows_skipped,
+        stats.errors,
+        stats.elapsed,
+        stats.rows_per_second,
+    )
+    record_load(
+        "copy",
+        rows_read=stats.rows_read,
+        employees_inserted=stats.employees_inserted,
+        employees_changed=stats.employees_changed,
+        kpis_written=stats.kpis_written,
+        elapsed=stats.elapsed,
+    )
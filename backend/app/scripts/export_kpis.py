@@ -0,0 +1,45 @@
+import argparse
+import logging
+from typing import Iterable, Optional
+
+from app.config import setup_config
+from app.export.snapshots import EXPORT_FORMATS, export_kpi_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args(args: Optional[Iterable[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Выгрузка сотрудников и KPI за год в Parquet/Arrow для обучения")
+    parser.add_argument("--year", type=int, default=None, help="Год KPI (по умолчанию SCORING_KPI_YEAR)")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Полный снимок вместо изменений с прошлой выгрузки (прежние файлы года удаляются)",
+    )
+    parser.add_argument("--output", default=None, help="Каталог выгрузки (по умолчанию EXPORT_DIR)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Строк в пачке (по умолчанию EXPORT_BATCH_SIZE)")
+    parser.add_argument(
+        "--format",
+        dest="export_format",
+        choices=EXPORT_FORMATS,
+        default=None,
+        help="Формат файлов (по умолчанию EXPORT_FORMAT)",
+    )
+    return parser.parse_args(args)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    args = parse_args()
+    summary = export_kpi_snapshot(
+        args.year or setup_config().scoring.scoring_kpi_year,
+        full=args.full,
+        export_dir=args.output,
+        batch_size=args.batch_size,
+        export_format=args.export_format,
+    )
+    logger.info("Итог выгрузки: %s", summary)
+
+
+if __name__ == "__main__":
+    main()
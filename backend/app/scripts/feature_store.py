@@ -0,0 +1,25 @@
+import argparse
+import logging
+from typing import Iterable, Optional
+
+from app.config import setup_config
+from app.features.store import publish_feature_store
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args(args: Optional[Iterable[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Публикация новой версии хранилища признаков из оценок риска")
+    parser.add_argument("--kpi-year", type=int, default=None, help="Год KPI (по умолчанию SCORING_KPI_YEAR)")
+    return parser.parse_args(args)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    args = parse_args()
+    summary = publish_feature_store(args.kpi_year or setup_config().scoring.scoring_kpi_year)
+    logger.info("Итог публикации: %s", summary)
+
+
+if __name__ == "__main__":
+    main()
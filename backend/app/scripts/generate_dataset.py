@@ -0,0 +1,174 @@
+import argparse
+import csv
+import logging
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Заголовок в том же виде, что и в выгрузке HR (см. REQUIRED_HEADERS и MONTH_COLUMN_NAMES в load_csv)
+HEADER: List[str] = [
+    "ФИО",
+    "Стаж",
+    "Возраст",
+    "В подчиненнии сотрудники",
+    "Отпуск (когда ходил в последний раз)",
+    "Больничный (брал или нет в 2025 году)",
+    "Выговор (да/нет)",
+    "Участие в активностях корпоративных",
+    "Январь",
+    "Февраль",
+    "Март",
+    "Апрель",
+    "Май",
+    "Июнь",
+    "Июль",
+    "Август",
+    "Сентябрь",
+    "Октябрь",
+    "Ноябрь",
+    "Декабрь",
+]
+
+DATASET_SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+SURNAMES = (
+    "Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов", "Михайлов",
+    "Новиков", "Фёдоров", "Морозов", "Волков", "Алексеев", "Лебедев", "Семёнов", "Егоров",
+    "Павлов", "Козлов", "Степанов", "Николаев", "Орлов", "Андреев", "Макаров", "Никитин",
+    "Захаров", "Зайцев", "Соловьёв", "Борисов", "Яковлев", "Григорьев", "Романов", "Воробьёв",
+)  # fmt: skip
+MALE_NAMES = (
+    "Александр", "Дмитрий", "Максим", "Сергей", "Андрей", "Алексей", "Артём", "Илья",
+    "Кирилл", "Михаил", "Никита", "Матвей", "Роман", "Егор", "Арсений", "Иван",
+)  # fmt: skip
+FEMALE_NAMES = (
+    "Анастасия", "Мария", "Анна", "Виктория", "Екатерина", "Наталья", "Марина", "Полина",
+    "Дарья", "Алина", "Ксения", "Елена", "Ольга", "Татьяна", "Ирина", "Светлана",
+)  # fmt: skip
+PATRONYMIC_ROOTS = (
+    "Александров", "Дмитриев", "Сергеев", "Андреев", "Алексеев", "Михайлов", "Иванов", "Николаев",
+    "Петров", "Владимиров", "Юрьев", "Викторов", "Олегов", "Павлов", "Игорев", "Евгеньев",
+)  # fmt: skip
+
+# Последний отпуск - не раньше этого числа дней до 1 января следующего года
+MAX_DAYS_SINCE_VACATION = 900
+
+
+def full_name(index: int) -> str:
+    """
+    Уникальное для каждого `index` ФИО: индекс раскладывается по спискам фамилий, имён и отчеств,
+    а после исчерпания комбинаций к фамилии добавляется номер.
+    """
+    index, surname_index = divmod(index, len(SURNAMES))
+    index, name_index = divmod(index, len(MALE_NAMES))
+    index, patronymic_index = divmod(index, len(PATRONYMIC_ROOTS))
+    generation, female = divmod(index, 2)
+
+    surname = SURNAMES[surname_index]
+    patronymic = PATRONYMIC_ROOTS[patronymic_index]
+    if female:
+        surname, name, patronymic = surname + "а", FEMALE_NAMES[name_index], patronymic + "на"
+    else:
+        name, patronymic = MALE_NAMES[name_index], patronymic + "ич"
+    if generation:
+        surname = f"{surname}-{generation + 1}"
+    return f"{surname} {name} {patronymic}"
+
+
+def tenure(rng: random.Random) -> str:
+    years, months = rng.randint(0, 35), rng.randint(0, 11)
+    if not years:
+        return f"{months} месяцев"
+    return f"{years} лет {months} месяцев"
+
+
+def kpi_value(rng: random.Random, base: float) -> str:
+    # Пропуски в выгрузке встречаются как пустые ячейки и как "нет"
+    roll = rng.random()
+    if roll < 0.03:
+        return ""
+    if roll < 0.04:
+        return "нет"
+    value = min(max(rng.gauss(base, 0.12), 0.0), 1.5)
+    return f"{value:.2f}".replace(".", ",")
+
+
+def generate_rows(rows: int, kpi_year: int = 2025, seed: int = 0) -> Iterator[List[str]]:
+    """
+    Строки синтетической выгрузки. При одинаковых `rows`, `kpi_year` и `seed` результат совпадает.
+    """
+    rng = random.Random(seed)
+    year_end = date(kpi_year + 1, 1, 1)
+    for index in range(rows):
+        last_vacation = year_end - timedelta(days=rng.randint(1, MAX_DAYS_SINCE_VACATION))
+        base = rng.uniform(0.6, 1.1)
+        yield [
+            full_name(index),
+            tenure(rng),
+            str(rng.randint(20, 65)),
+            "Руководитель" if rng.random() < 0.15 else "Нет",
+            f"{last_vacation.isoformat()} 00:00:00" if rng.random() < 0.95 else "нет",
+            "да" if rng.random() < 0.3 else "нет",
+            "да" if rng.random() < 0.05 else "нет",
+            "да" if rng.random() < 0.5 else "нет",
+            *(kpi_value(rng, base) for _ in range(12)),
+        ]
+
+
+def write_dataset(output_path: Path, rows: int, kpi_year: int = 2025, seed: int = 0) -> Path:
+    """
+    Записывает CSV построчно, поэтому память не зависит от числа строк.
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with output_path.open("w", encoding="utf-8", newline="") as output_file:
+        writer = csv.writer(output_file)
+        writer.writerow(HEADER)
+        writer.writerows(generate_rows(rows, kpi_year, seed))
+    return output_path
+
+
+def parse_rows(value: str) -> int:
+    return DATASET_SIZES.get(value.lower()) or int(value)
+
+
+def parse_args(args: Optional[Iterable[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Генерация синтетической выгрузки сотрудников в формате HR CSV")
+    parser.add_argument(
+        "--rows",
+        type=parse_rows,
+        default=DATASET_SIZES["10k"],
+        help="Число строк: число или один из размеров 10k, 100k, 1m (по умолчанию 10k)",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        required=True,
+        help="Путь к создаваемому CSV файлу",
+    )
+    parser.add_argument(
+        "--kpi-year",
+        type=int,
+        default=2025,
+        help="Год, относительно которого генерируются даты отпуска (по умолчанию 2025)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Начальное значение генератора случайных чисел (по умолчанию 0)",
+    )
+    return parser.parse_args(args)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    args = parse_args()
+    write_dataset(args.output, args.rows, args.kpi_year, args.seed)
+    logger.info("Записано %d строк в %s", args.rows, args.output)
+
+
+if __name__ == "__main__":
+    main()
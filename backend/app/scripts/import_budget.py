@@ -0,0 +1,129 @@
+import argparse
+import logging
+import re
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Бюджеты времени импорта в миллисекундах (без запуска самого интерпретатора)
+DEFAULT_BUDGETS_MS: Dict[str, float] = {
+    "app.main": 1500.0,
+    "app.celery": 300.0,
+    "app.scripts.load_csv": 800.0,
+}
+
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)\s*$")
+
+
+@dataclass
+class ImportProfile:
+    """
+    Разбор вывода `-X importtime`: суммарное время модулей верхнего уровня
+    и модули с наибольшим собственным временем импорта.
+    """
+
+    total_us: int
+    heaviest: List[Tuple[str, int]]
+
+
+def parse_import_time(stderr: str) -> ImportProfile:
+    total_us = 0
+    heaviest: List[Tuple[str, int]] = []
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match is None:
+            continue
+        heaviest.append((match.group(4), int(match.group(1))))
+        # Вложенные импорты уже учтены в cumulative модуля верхнего уровня
+        if match.group(3) == " ":
+            total_us += int(match.group(2))
+    heaviest.sort(key=lambda item: item[1], reverse=True)
+    return ImportProfile(total_us=total_us, heaviest=heaviest)
+
+
+def profile_import(statement: str) -> ImportProfile:
+    # Отдельный процесс без кэша модулей - так стартуют под uvicorn, воркер Celery и CLI
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Не удалось выполнить `{statement}`:\n{result.stderr[-2000:]}")
+    return parse_import_time(result.stderr)
+
+
+def measure_import_ms(module: str, repeats: int) -> Tuple[float, ImportProfile]:
+    """
+    Время импорта модуля за вычетом старта интерпретатора. Берётся минимум по повторам,
+    чтобы шум соседних процессов не давал ложных срабатываний.
+    """
+    best: Optional[Tuple[float, ImportProfile]] = None
+    for _ in range(repeats):
+        baseline = profile_import("pass")
+        profile = profile_import(f"import {module}")
+        elapsed_ms = max(profile.total_us - baseline.total_us, 0) / 1000
+        if best is None or elapsed_ms < best[0]:
+            best = (elapsed_ms, profile)
+    assert best is not None
+    return best
+
+
+def parse_budget(value: str) -> Tuple[str, float]:
+    module, separator, budget = value.partition("=")
+    if not separator:
+        raise argparse.ArgumentTypeError(f"Ожидается модуль=миллисекунды, получено: {value}")
+    return module, float(budget)
+
+
+def parse_args(args: Optional[Iterable[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Проверка бюджета времени импорта при холодном старте")
+    parser.add_argument(
+        "--budget",
+        type=parse_budget,
+        action="append",
+        default=[],
+        metavar="MODULE=MS",
+        help="Бюджет для модуля в миллисекундах, можно указать несколько раз (заменяет бюджеты по умолчанию)",
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=3,
+        help="Сколько раз импортировать каждый модуль (по умолчанию 3)",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=5,
+        help="Сколько самых тяжёлых импортов показать для модуля, превысившего бюджет (по умолчанию 5)",
+    )
+    return parser.parse_args(args)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    args = parse_args()
+    budgets = dict(args.budget) or DEFAULT_BUDGETS_MS
+
+    over_budget = 0
+    for module, budget_ms in budgets.items():
+        elapsed_ms, profile = measure_import_ms(module, args.repeats)
+        if elapsed_ms <= budget_ms:
+            logger.info("%s: %.0f мс (бюджет %.0f мс)", module, elapsed_ms, budget_ms)
+            continue
+        over_budget += 1
+        logger.error("%s: %.0f мс - превышен бюджет %.0f мс", module, elapsed_ms, budget_ms)
+        for name, self_us in profile.heaviest[: args.top]:
+            logger.error("    %s: %.0f мс", name, self_us / 1000)
+
+    if over_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import logging
+from typing import Iterable, Optional
+
+from app.database import get_sync_engine
+from app.kpis.storage import drop_kpi_year, ensure_kpi_partition, partition_years, repack_kpi_year
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args(args: Optional[Iterable[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Обслуживание секций и компактного хранения KPI")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="Вывести годы, для которых есть секции employee_kpis")
+
+    ensure = commands.add_parser("ensure", help="Создать секцию employee_kpis за год заранее")
+    ensure.add_argument("--year", type=int, required=True, help="Год KPI")
+
+    pack = commands.add_parser("pack", help="Переупаковать KPI года в employee_kpi_years")
+    pack.add_argument("--year", type=int, required=True, help="Год KPI")
+
+    drop = commands.add_parser("drop", help="Удалить секцию employee_kpis за год (значения остаются упакованными)")
+    drop.add_argument("--year", type=int, required=True, help="Год KPI")
+    drop.add_argument(
+        "--with-compact",
+        action="store_true",
+        help="Удалить и упакованные значения года из employee_kpi_years",
+    )
+    return parser.parse_args(args)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    args = parse_args()
+
+    if args.command == "pack":
+        repack_kpi_year(args.year)
+        return
+
+    with get_sync_engine().begin() as connection:
+        if args.command == "list":
+            logger.info("Секции employee_kpis по годам: %s", partition_years(connection))
+        elif args.command == "ensure":
+            if not ensure_kpi_partition(connection, args.year):
+                logger.info("Секция за %d год уже существует", args.year)
+        elif args.command == "drop":
+            summary = drop_kpi_year(connection, args.year, args.with_compact)
+            logger.info("Удаление KPI за %d год: %s", args.year, summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,20 @@ from __future__ import annotations
 
 import argparse
 import csv
+import hashlib
 import logging
 import re
+import time
 from datetime import date, datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Iterable, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from sqlmodel import Session, select
 
-from app.database import session_maker, sync_engine
+from app.common.metrics import record_load
+from app.database import get_sync_engine
+from app.kpis.storage import compact_enabled, ensure_kpi_partition, pack_kpi_year
 from app.models import Employee, EmployeeKPI, KPIMonth
 
 logger = logging.getLogger(__name__)
@@ -30,17 +35,67 @@ MONTH_COLUMN_NAMES: Dict[str, KPIMonth] = {
     "декабрь": KPIMonth.DECEMBER,
 }
 
+REQUIRED_HEADERS = [
+    "фио",
+    "стаж",
+    "возраст",
+    "в подчиненнии сотрудники",
+    "отпуск (когда ходил в последний раз)",
+    "больничный (брал или нет в 2025 году)",
+    "выговор (да/нет)",
+    "участие в активностях корпоративных",
+]
+
+KPI_MONTH_NUMBERS: List[Tuple[str, int]] = [(name, int(month)) for name, month in MONTH_COLUMN_NAMES.items()]
+
+EMPLOYEE_COLUMNS: Tuple[str, ...] = (
+    "full_name",
+    "tenure_years",
+    "age",
+    "has_subordinates",
+    "last_vacation_date",
+    "took_sick_leave_2025",
+    "has_disciplinary_action",
+    "participates_in_corporate_events",
+)
+
+# Разобранная строка: (номер строки в файле, значения EMPLOYEE_COLUMNS, [(месяц, KPI), ...])
+ParsedRow = Tuple[int, Tuple[Any, ...], List[Tuple[int, float]]]
+
+WHITESPACE_RE = re.compile(r"\s+")
+TENURE_YEARS_RE = re.compile(r"(\d+)\s*(?:лет|год|года)")
+TENURE_MONTHS_RE = re.compile(r"(\d+)\s*месяц")
+
+# Значения стажа, дат и флагов сильно повторяются между строками, поэтому разбор кэшируется
+PARSER_CACHE_SIZE = 8192
+
 DEFAULT_CSV_PATH = Path(__file__).resolve().parents[2] / "Dannye-dlia-khakatona_no_city.csv"
 
 
+class RowParseError(ValueError):
+    """
+    Ошибка разбора строки CSV с указанием номера строки в файле.
+    """
+
+    def __init__(self, line_no: int, message: str) -> None:
+        super().__init__(line_no, message)
+        self.line_no = line_no
+        self.message = message
+
+    def __str__(self) -> str:
+        return f"Строка {self.line_no}: {self.message}"
+
+
+@lru_cache(maxsize=PARSER_CACHE_SIZE)
 def normalize_header(value: str) -> str:
-    return re.sub(r"\s+", " ", value.strip().lower())
+    return WHITESPACE_RE.sub(" ", value.strip().lower())
 
 
 def normalize_value(value: Optional[str]) -> str:
     return (value or "").strip()
 
 
+@lru_cache(maxsize=PARSER_CACHE_SIZE)
 def parse_bool(value: str) -> Optional[bool]:
     normalized = value.strip().lower()
     if not normalized or normalized == "нет":
@@ -57,16 +112,17 @@ def parse_subordinates(value: str) -> bool:
     return "руковод" in normalized
 
 
+@lru_cache(maxsize=PARSER_CACHE_SIZE)
 def parse_tenure(value: str) -> float:
     text = value.replace("\n", " ").replace(",", " ").strip().lower()
     years = 0.0
     months = 0.0
 
-    year_match = re.search(r"(\d+)\s*(?:лет|год|года)", text)
+    year_match = TENURE_YEARS_RE.search(text)
     if year_match:
         years = float(year_match.group(1))
 
-    month_match = re.search(r"(\d+)\s*месяц", text)
+    month_match = TENURE_MONTHS_RE.search(text)
     if month_match:
         months = float(month_match.group(1))
 
@@ -86,6 +142,7 @@ def parse_optional_int(value: str) -> Optional[int]:
     return int(float(value))
 
 
+@lru_cache(maxsize=PARSER_CACHE_SIZE)
 def parse_optional_date(value: str) -> Optional[date]:
     value = value.strip()
     if not value or value.lower() == "нет":
@@ -98,6 +155,7 @@ def parse_optional_date(value: str) -> Optional[date]:
     raise ValueError(f"Не удалось преобразовать дату: {value}")
 
 
+@lru_cache(maxsize=PARSER_CACHE_SIZE)
 def parse_kpi_value(value: str) -> Optional[float]:
     value = value.strip()
     if not value or value.lower() == "нет":
@@ -105,49 +163,93 @@ def parse_kpi_value(value: str) -> Optional[float]:
     return float(value.replace(",", "."))
 
 
+def validate_headers(fieldnames: Optional[Iterable[str]]) -> None:
+    if not fieldnames:
+        raise ValueError("CSV файл не содержит заголовок")
+
+    normalized_headers = {normalize_header(name) for name in fieldnames if name}
+    for header in REQUIRED_HEADERS:
+        if header not in normalized_headers:
+            raise KeyError(f"Не найден обязательный столбец '{header}'")
+
+
+def parse_employee_fields(row: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Преобразует нормализованную строку CSV в значения полей `Employee`.
+    """
+    return {
+        "full_name": row.get("фио", ""),
+        "tenure_years": parse_tenure(row.get("стаж", "")),
+        "age": parse_optional_int(row.get("возраст", "")),
+        "has_subordinates": parse_subordinates(row.get("в подчиненнии сотрудники", "")),
+        "last_vacation_date": parse_optional_date(row.get("отпуск (когда ходил в последний раз)", "")),
+        "took_sick_leave_2025": parse_bool(row.get("больничный (брал или нет в 2025 году)", "")),
+        "has_disciplinary_action": parse_bool(row.get("выговор (да/нет)", "")),
+        "participates_in_corporate_events": parse_bool(row.get("участие в активностях корпоративных", "")),
+    }
+
+
+def parse_kpi_fields(row: Dict[str, str]) -> List[Tuple[KPIMonth, float]]:
+    """
+    Возвращает заполненные значения KPI строки в виде пар (месяц, значение).
+    """
+    kpis = []
+    for column_name, month_enum in MONTH_COLUMN_NAMES.items():
+        value = row.get(column_name)
+        if value is None:
+            continue
+        kpi_value = parse_kpi_value(value)
+        if kpi_value is None:
+            continue
+        kpis.append((month_enum, kpi_value))
+    return kpis
+
+
+def parse_record(row: Dict[str, str], line_no: int) -> ParsedRow:
+    """
+    Разбирает нормализованную строку CSV в кортежи для пакетной загрузки.
+    """
+    try:
+        fields = parse_employee_fields(row)
+        kpis = []
+        for column_name, month in KPI_MONTH_NUMBERS:
+            value = row.get(column_name)
+            kpi_value = parse_kpi_value(value) if value is not None else None
+            if kpi_value is not None:
+                kpis.append((month, kpi_value))
+    except ValueError as exc:
+        raise RowParseError(line_no, str(exc)) from exc
+    return line_no, tuple(fields[column] for column in EMPLOYEE_COLUMNS), kpis
+
+
+def fingerprint_values(values: Tuple[Any, ...]) -> str:
+    """
+    Хэш атрибутов сотрудника для определения изменившихся строк при повторной загрузке.
+    """
+    return hashlib.md5("\x1f".join(map(str, values)).encode("utf-8")).hexdigest()
+
+
 def load_csv_data(
     csv_path: Path,
     kpi_year: int = 2025,
 ) -> None:
+    started = time.perf_counter()
+    rows_read = employees_inserted = kpis_written = 0
     with csv_path.open("r", encoding="utf-8") as csv_file:
         reader = csv.DictReader(csv_file)
-        if not reader.fieldnames:
-            raise ValueError("CSV файл не содержит заголовок")
-
-        normalized_headers = {normalize_header(name) for name in reader.fieldnames if name}
-
-        required_headers = [
-            "фио",
-            "стаж",
-            "возраст",
-            "в подчиненнии сотрудники",
-            "отпуск (когда ходил в последний раз)",
-            "больничный (брал или нет в 2025 году)",
-            "выговор (да/нет)",
-            "участие в активностях корпоративных",
-        ]
-        for header in required_headers:
-            if header not in normalized_headers:
-                raise KeyError(f"Не найден обязательный столбец '{header}'")
-
-        with Session(sync_engine) as session:
+        validate_headers(reader.fieldnames)
+
+        with Session(get_sync_engine()) as session:
+            ensure_kpi_partition(session.connection(), kpi_year)
             for raw_row in reader:
+                rows_read += 1
                 row = {normalize_header(k): normalize_value(v) for k, v in raw_row.items() if k}
                 full_name = row.get("фио", "")
                 if not full_name:
                     logger.warning("Пропущена строка без ФИО: %s", raw_row)
                     continue
 
-                employee = Employee(
-                    full_name=full_name,
-                    tenure_years=parse_tenure(row.get("стаж", "")),
-                    age=parse_optional_int(row.get("возраст", "")),
-                    has_subordinates=parse_subordinates(row.get("в подчиненнии сотрудники", "")),
-                    last_vacation_date=parse_optional_date(row.get("отпуск (когда ходил в последний раз)", "")),
-                    took_sick_leave_2025=parse_bool(row.get("больничный (брал или нет в 2025 году)", "")),
-                    has_disciplinary_action=parse_bool(row.get("выговор (да/нет)", "")),
-                    participates_in_corporate_events=parse_bool(row.get("участие в активностях корпоративных", "")),
-                )
+                employee = Employee(**parse_employee_fields(row))
 
                 existing_employee = session.exec(
                     select(Employee).where(Employee.full_name == employee.full_name)
@@ -159,14 +261,10 @@ def load_csv_data(
 
                 session.add(employee)
                 session.flush()
+                employees_inserted += 1
 
-                for column_name, month_enum in MONTH_COLUMN_NAMES.items():
-                    value = row.get(column_name)
-                    if value is None:
-                        continue
-                    kpi_value = parse_kpi_value(value)
-                    if kpi_value is None:
-                        continue
+                for month_enum, kpi_value in parse_kpi_fields(row):
+                    kpis_written += 1
                     session.add(
                         EmployeeKPI(
                             employee_id=employee.id,
@@ -176,8 +274,19 @@ def load_csv_data(
                         )
                     )
 
+            if compact_enabled():
+                pack_kpi_year(session.connection(), kpi_year)
             session.commit()
 
+    record_load(
+        "orm",
+        rows_read=rows_read,
+        employees_inserted=employees_inserted,
+        employees_changed=0,
+        kpis_written=kpis_written,
+        elapsed=time.perf_counter() - started,
+    )
+
 
 def parse_args(args: Optional[Iterable[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Загрузка данных сотрудников из CSV в базу данных")
@@ -193,6 +302,32 @@ def parse_args(args: Optional[Iterable[str]] = None) -> argparse.Namespace:
         default=2025,
         help="Значение года для KPI записей (по умолчанию 2025)",
     )
+    parser.add_argument(
+        "--mode",
+        choices=("orm", "bulk", "incremental"),
+        default="orm",
+        help=(
+            "Режим загрузки: построчно через ORM, пакетно через COPY или инкрементально "
+            "с обновлением изменившихся строк (по умолчанию orm)"
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Число процессов для разбора CSV в режимах bulk и incremental (по умолчанию 1 - без пула)",
+    )
+    parser.add_argument(
+        "--chunk-mb",
+        type=int,
+        default=8,
+        help="Размер чанка файла в мегабайтах для разбора и COPY (по умолчанию 8)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Загрузить файл, даже если он уже загружался (для режимов bulk и incremental)",
+    )
     return parser.parse_args(args)
 
 
@@ -205,10 +340,31 @@ def main() -> None:
         raise FileNotFoundError(f"CSV файл не найден: {csv_path}")
 
     logger.info("Начинаю загрузку данных из %s", csv_path)
-    load_csv_data(csv_path=csv_path, kpi_year=args.kpi_year)
+    if args.mode in ("bulk", "incremental"):
+        # Импорт здесь, так как bulk_load сам использует парсеры из этого модуля
+        from app.scripts.bulk_load import bulk_load_csv_data
+
+        stats = bulk_load_csv_data(
+            csv_path=csv_path,
+            kpi_year=args.kpi_year,
+            workers=args.workers,
+            chunk_bytes=args.chunk_mb * 1024 * 1024,
+            incremental=args.mode == "incremental",
+            force=args.force,
+        )
+        months_changed: Optional[List[int]] = stats.months_changed
+    else:
+        load_csv_data(csv_path=csv_path, kpi_year=args.kpi_year)
+        # Построчная загрузка не отслеживает изменённые месяцы, поэтому пересчитывается весь год
+        months_changed = None
     logger.info("Загрузка завершена")
+    # Кэш и агрегаты нужны только после загрузки, их импорт не замедляет запуск и --help
+    from app.common.cache import EMPLOYEES_NAMESPACE, bump_cache_version
+    from app.rollups.refresh import refresh_kpi_rollups
+
+    bump_cache_version(EMPLOYEES_NAMESPACE)
+    refresh_kpi_rollups(args.kpi_year, months_changed)
 
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import csv
+import io
+import mmap
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Deque, Iterator, List, Optional, Sequence, Tuple
+
+from app.scripts.load_csv import (
+    MONTH_COLUMN_NAMES,
+    REQUIRED_HEADERS,
+    ParsedRow,
+    RowParseError,
+    fingerprint_values,
+    normalize_header,
+    normalize_value,
+    parse_record,
+    validate_headers,
+)
+
+DEFAULT_CHUNK_BYTES = 8 * 1024 * 1024
+# Сколько разобранных чанков может ждать записи, прежде чем разбор приостановится
+DEFAULT_QUEUE_SIZE = 4
+SCAN_BLOCK_BYTES = 8 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class CsvChunk:
+    """
+    Диапазон байт файла, начинающийся и заканчивающийся на границе записи CSV.
+    """
+
+    start: int
+    end: int
+    first_line: int
+
+
+@dataclass
+class ParsedChunk:
+    """
+    Результат разбора одного чанка.
+    """
+
+    chunk: CsvChunk
+    rows: List[ParsedRow] = field(default_factory=list)
+    rows_read: int = 0
+    rows_parsed: int = 0
+    skipped_lines: List[int] = field(default_factory=list)
+    errors: List[RowParseError] = field(default_factory=list)
+    # Готовые данные для COPY ... WITH (FORMAT csv), если чанк кодировался в процессе пула
+    employees_csv: bytes = b""
+    kpis_csv: bytes = b""
+
+
+def encode_copy_rows(rows: Sequence[ParsedRow]) -> Tuple[bytes, bytes]:
+    """
+    Кодирует разобранные строки в CSV (UTF-8) для COPY в `stg_employees` и `stg_employee_kpis`.
+    """
+    employees_buffer = io.StringIO()
+    kpis_buffer = io.StringIO()
+    employees_writer = csv.writer(employees_buffer)
+    kpis_writer = csv.writer(kpis_buffer)
+    for line_no, values, kpis in rows:
+        employees_writer.writerow((line_no, *values, fingerprint_values(values)))
+        kpis_writer.writerows((line_no, month, kpi_value) for month, kpi_value in kpis)
+    return employees_buffer.getvalue().encode("utf-8"), kpis_buffer.getvalue().encode("utf-8")
+
+
+def _count(mm: mmap.mmap, start: int, end: int, needle: bytes) -> int:
+    total = 0
+    for offset in range(start, end, SCAN_BLOCK_BYTES):
+        total += mm[offset : min(offset + SCAN_BLOCK_BYTES, end)].count(needle)
+    return total
+
+
+def _record_end(mm: mmap.mmap, start: int, quotes: int) -> int:
+    """
+    Возвращает позицию после ближайшего перевода строки, который не находится внутри кавычек.
+
+    `quotes` - число кавычек между началом записи и `start`.
+    """
+    pos = start
+    while True:
+        newline = mm.find(b"\n", pos)
+        if newline == -1:
+            return len(mm)
+        quotes += mm[pos:newline].count(b'"')
+        pos = newline + 1
+        if quotes % 2 == 0:
+            return pos
+
+
+def read_header(csv_path: Path) -> Tuple[List[str], int]:
+    """
+    Возвращает нормализованный заголовок файла и смещение первой строки данных.
+    """
+    with csv_path.open("rb") as csv_file, mmap.mmap(csv_file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data_start = _record_end(mm, 0, 0)
+        header_text = mm[:data_start].decode("utf-8")
+
+    fieldnames = next(csv.reader(io.StringIO(header_text)), [])
+    validate_headers(fieldnames)
+    return [normalize_header(name) for name in fieldnames], data_start
+
+
+def split_csv_chunks(csv_path: Path, data_start: int, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> List[CsvChunk]:
+    """
+    Делит файл на диапазоны примерно по `chunk_bytes`, выравнивая границы по концам записей.
+
+    Перевод строки считается концом записи, если число кавычек от начала чанка до него чётное,
+    поэтому многострочные значения в кавычках не разрываются.
+    """
+    chunks: List[CsvChunk] = []
+    if csv_path.stat().st_size == 0:
+        return chunks
+
+    with csv_path.open("rb") as csv_file, mmap.mmap(csv_file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        size = len(mm)
+        start = data_start
+        line = _count(mm, 0, data_start, b"\n") + 1
+        while start < size:
+            target = min(start + chunk_bytes, size)
+            end = size if target >= size else _record_end(mm, target, _count(mm, start, target, b'"'))
+            chunks.append(CsvChunk(start=start, end=end, first_line=line))
+            line += _count(mm, start, end, b"\n")
+            start = end
+    return chunks
+
+
+def parse_chunk(
+    csv_path: Path,
+    chunk: CsvChunk,
+    fieldnames: Sequence[str],
+    encode_copy: bool = False,
+) -> ParsedChunk:
+    """
+    Разбирает один чанк. Выполняется в процессах пула, поэтому не пишет в лог,
+    а возвращает ошибки с номерами строк вызывающей стороне.
+
+    С `encode_copy=True` строки сразу кодируются для COPY, и между процессами
+    передаются два буфера вместо множества кортежей.
+    """
+    wanted = set(REQUIRED_HEADERS) | set(MONTH_COLUMN_NAMES)
+    columns = [(name, index) for index, name in enumerate(fieldnames) if name in wanted]
+
+    with csv_path.open("rb") as csv_file:
+        csv_file.seek(chunk.start)
+        text = csv_file.read(chunk.end - chunk.start).decode("utf-8")
+
+    result = ParsedChunk(chunk=chunk)
+    reader = csv.reader(io.StringIO(text, newline=""))
+    line_no = chunk.first_line
+    for values in reader:
+        row_line_no, line_no = line_no, chunk.first_line + reader.line_num
+        if not values:
+            continue
+        result.rows_read += 1
+        row = {name: normalize_value(values[index]) if index < len(values) else "" for name, index in columns}
+        if not row.get("фио"):
+            result.skipped_lines.append(row_line_no)
+            continue
+        try:
+            result.rows.append(parse_record(row, row_line_no))
+        except RowParseError as exc:
+            result.errors.append(exc)
+
+    result.rows_parsed = len(result.rows)
+    if encode_copy:
+        result.employees_csv, result.kpis_csv = encode_copy_rows(result.rows)
+        result.rows = []
+    return result
+
+
+def _produce(
+    csv_path: Path,
+    chunks: List[CsvChunk],
+    fieldnames: List[str],
+    workers: int,
+    encode_copy: bool,
+    output: "queue.Queue[Optional[ParsedChunk] | BaseException]",
+    stop: threading.Event,
+) -> None:
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending: Deque[Future[ParsedChunk]] = deque()
+            chunk_iter = iter(chunks)
+            for chunk in chunk_iter:
+                pending.append(pool.submit(parse_chunk, csv_path, chunk, fieldnames, encode_copy))
+                if len(pending) >= workers * 2:
+                    break
+            while pending and not stop.is_set():
+                result = pending.popleft().result()
+                next_chunk = next(chunk_iter, None)
+                if next_chunk is not None:
+                    pending.append(pool.submit(parse_chunk, csv_path, next_chunk, fieldnames, encode_copy))
+                # Блокируется, если запись отстаёт: так разбор не уходит далеко вперёд
+                output.put(result)
+            for future in pending:
+                future.cancel()
+        output.put(None)
+    except BaseException as exc:  # noqa: BLE001 - пробрасываем в поток-потребитель
+        output.put(exc)
+
+
+def iter_parsed_chunks(
+    csv_path: Path,
+    workers: int = 1,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    encode_copy: bool = False,
+) -> Iterator[ParsedChunk]:
+    """
+    Разбирает CSV по чанкам и отдаёт результаты в порядке следования в файле.
+
+    При `workers > 1` чанки разбираются в `ProcessPoolExecutor`, а готовые результаты передаются
+    потребителю через ограниченную очередь, так что память не растёт вместе с размером файла.
+    """
+    fieldnames, data_start = read_header(csv_path)
+    chunks = split_csv_chunks(csv_path, data_start, chunk_bytes)
+
+    if workers <= 1:
+        for chunk in chunks:
+            yield parse_chunk(csv_path, chunk, fieldnames, encode_copy)
+        return
+
+    output: "queue.Queue[Optional[ParsedChunk] | BaseException]" = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    producer = threading.Thread(
+        target=_produce,
+        args=(csv_path, chunks, fieldnames, workers, encode_copy, output, stop),
+        name="csv-parse-producer",
+        daemon=True,
+    )
+    producer.start()
+    try:
+        while True:
+            item = output.get()
+            if item is None:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        # Освобождаем место в очереди, чтобы производитель мог завершиться
+        while producer.is_alive():
+            try:
+                output.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        producer.join()
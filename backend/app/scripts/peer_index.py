@@ -0,0 +1,36 @@
+import argparse
+import logging
+from typing import Iterable, Optional
+
+from app.config import setup_config
+from app.peers.index import publish_peer_index
+from app.peers.percentiles import compute_peer_percentiles
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args(args: Optional[Iterable[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Публикация индекса коллег и расчёт процентилей KPI среди коллег")
+    parser.add_argument("--kpi-year", type=int, default=None, help="Год KPI (по умолчанию SCORING_KPI_YEAR)")
+    parser.add_argument(
+        "--employee-ids",
+        type=int,
+        nargs="+",
+        default=None,
+        help="Заменить в текущей версии индекса только этих сотрудников",
+    )
+    parser.add_argument("--percentiles", action="store_true", help="После публикации пересчитать процентили")
+    return parser.parse_args(args)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    args = parse_args()
+    kpi_year = args.kpi_year or setup_config().scoring.scoring_kpi_year
+    logger.info("Итог публикации: %s", publish_peer_index(kpi_year, args.employee_ids))
+    if args.percentiles:
+        logger.info("Итог расчёта процентилей: %s", compute_peer_percentiles(kpi_year))
+
+
+if __name__ == "__main__":
+    main()
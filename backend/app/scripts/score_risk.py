@@ -0,0 +1,76 @@
+import argparse
+import csv
+import logging
+from datetime import date
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+from app.scoring.engine import RiskScores, score_employees
+
+logger = logging.getLogger(__name__)
+
+FEATURE_COLUMNS = ("trend_slope", "max_drop", "volatility", "kpi_zscore", "days_since_vacation")
+
+
+def write_scores(scores: RiskScores, output_path: Path) -> None:
+    """
+    Сохраняет оценки и признаки всех сотрудников в CSV.
+    """
+    columns = [scores.employee_ids, np.round(scores.score, 6)]
+    columns.extend(np.round(scores.features[name], 6) for name in FEATURE_COLUMNS)
+    with output_path.open("w", encoding="utf-8", newline="") as output_file:
+        writer = csv.writer(output_file)
+        writer.writerow(("employee_id", "risk_score", *FEATURE_COLUMNS))
+        writer.writerows(zip(*(column.tolist() for column in columns)))
+
+
+def log_top(scores: RiskScores, top: int) -> None:
+    order = np.argsort(-scores.score, kind="stable")[:top]
+    for index in order:
+        logger.info("Сотрудник %d: риск %.3f", scores.employee_ids[index], scores.score[index])
+
+
+def parse_args(args: Optional[Iterable[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Расчёт оценки риска выгорания сотрудников")
+    parser.add_argument(
+        "--kpi-year",
+        type=int,
+        default=2025,
+        help="Год KPI для расчёта (по умолчанию 2025)",
+    )
+    parser.add_argument(
+        "--as-of",
+        type=date.fromisoformat,
+        default=None,
+        help="Дата, на которую считается давность отпуска, YYYY-MM-DD (по умолчанию сегодня)",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=20,
+        help="Сколько сотрудников с наибольшим риском вывести в лог (по умолчанию 20)",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Путь к CSV-файлу для сохранения оценок всех сотрудников",
+    )
+    return parser.parse_args(args)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    args = parse_args()
+
+    scores = score_employees(year=args.kpi_year, as_of=args.as_of)
+    log_top(scores, args.top)
+    if args.output:
+        write_scores(scores, args.output)
+        logger.info("Оценки сохранены в %s", args.output)
+
+
+if __name__ == "__main__":
+    main()
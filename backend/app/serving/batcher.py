@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Generic, List, Optional, Sequence, TypeVar
+
+from app.common.metrics import record_predict_batch
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class _Pending(Generic[T, R]):
+    item: T
+    size: int
+    future: "asyncio.Future[R]"
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Собирает одновременные запросы в пачки и выполняет каждую одним вызовом `handler` в отдельном потоке,
+    чтобы цикл событий не ждал расчёта. Пачка закрывается, когда набралось `max_items` элементов
+    или с первого запроса прошло `max_wait_ms`. Пока считается одна пачка, копится следующая,
+    поэтому под нагрузкой пачки растут, а число вызовов модели - нет.
+    """
+
+    def __init__(self, handler: Callable[[Sequence[T]], Sequence[R]], max_items: int, max_wait_ms: float) -> None:
+        self.handler = handler
+        self.max_items = max_items
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional["asyncio.Queue[_Pending[T, R]]"] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        # Запросы, взятые из очереди, но ещё не получившие результат
+        self._taken: List[_Pending[T, R]] = []
+        # Один поток: пачки выполняются по очереди, а numpy отпускает GIL на время расчёта
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="predict")
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        pending_items, self._taken = self._taken, []
+        if self._queue is not None:
+            while not self._queue.empty():
+                pending_items.append(self._queue.get_nowait())
+        for pending in pending_items:
+            if not pending.future.done():
+                pending.future.set_exception(RuntimeError("Сервис прогнозов остановлен"))
+        # Дожидаемся пачки, которая ещё считается в потоке, не блокируя цикл событий
+        await asyncio.to_thread(self._executor.shutdown, True)
+
+    async def submit(self, item: T, size: int = 1) -> R:
+        """
+        Ставит `item` в очередь и ждёт его результат. `size` - сколько элементов пачки он занимает
+        (например, число сотрудников в пакетном запросе).
+        """
+        if self._queue is None:
+            raise RuntimeError("Сервис прогнозов не запущен")
+        future: "asyncio.Future[R]" = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_Pending(item, size, future))
+        return await future
+
+    async def _collect(self) -> List[_Pending[T, R]]:
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        first = await self._queue.get()
+        self._taken = batch = [first]
+        size = first.size
+        deadline = loop.time() + self.max_wait
+        while size < self.max_items:
+            if self._queue.empty():
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                pending = self._queue.get_nowait()
+            batch.append(pending)
+            size += pending.size
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Клиент мог разорвать соединение, пока запрос ждал в очереди
+            self._taken = batch = [pending for pending in batch if not pending.future.cancelled()]
+            if not batch:
+                continue
+            started = time.perf_counter()
+            try:
+                results: Sequence[Any] = await loop.run_in_executor(
+                    self._executor, self.handler, [pending.item for pending in batch]
+                )
+            except Exception as exc:
+                logger.exception("Ошибка расчёта пачки прогнозов из %d запросов", len(batch))
+                for pending in batch:
+                    if not pending.future.done():
+                        pending.future.set_exception(exc)
+                self._taken = []
+                continue
+            record_predict_batch(len(batch), sum(pending.size for pending in batch), time.perf_counter() - started)
+            for pending, result in zip(batch, results):
+                if not pending.future.done():
+                    pending.future.set_result(result)
+            self._taken = []
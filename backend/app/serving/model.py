@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import logging
+import pickle
+from pathlib import Path
+from typing import Any, List, Optional, Protocol, Sequence
+
+import numpy as np
+
+from app.features.store import get_feature_store
+from app.scoring.engine import risk_from_features
+
+logger = logging.getLogger(__name__)
+
+# Порядок столбцов матрицы признаков, которую получает внешняя модель
+MODEL_FEATURES = (
+    "tenure_years",
+    "age",
+    "days_since_vacation",
+    "trend_slope",
+    "max_drop",
+    "volatility",
+    "kpi_zscore",
+    "kpi_mean",
+    "kpi_months",
+    "has_subordinates",
+    "took_sick_leave",
+    "has_disciplinary_action",
+    "participates_in_corporate_events",
+)
+
+
+class BurnoutModel(Protocol):
+    name: str
+
+    def predict(self, records: np.ndarray) -> np.ndarray:
+        """
+        Вероятности выгорания для записей хранилища признаков (`FEATURE_DTYPE`), по одной на запись.
+        """
+
+
+class FormulaModel:
+    """
+    Модель по умолчанию, пока нет обученной: та же формула, что и у пересчёта оценок риска.
+    """
+
+    name = "formula"
+
+    def predict(self, records: np.ndarray) -> np.ndarray:
+        return risk_from_features(
+            records,
+            took_sick_leave=records["took_sick_leave"],
+            has_disciplinary_action=records["has_disciplinary_action"],
+            participates_in_corporate_events=records["participates_in_corporate_events"],
+            has_subordinates=records["has_subordinates"],
+        )
+
+
+class PickledModel:
+    """
+    Обученная модель с интерфейсом scikit-learn (`predict_proba` или `predict`) из файла pickle.
+    Файл загружается как есть, поэтому брать его можно только из доверенного источника.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.name = path.name
+        with path.open("rb") as file:
+            self._estimator: Any = pickle.load(file)
+
+    def predict(self, records: np.ndarray) -> np.ndarray:
+        matrix = np.column_stack([records[name].astype(np.float32) for name in MODEL_FEATURES])
+        if hasattr(self._estimator, "predict_proba"):
+            return self._estimator.predict_proba(matrix)[:, 1]
+        return np.asarray(self._estimator.predict(matrix), dtype=np.float64)
+
+
+def load_model(path: Optional[str]) -> BurnoutModel:
+    if not path:
+        logger.info("SERVING_MODEL_PATH не задан, прогнозы считаются формулой оценки риска")
+        return FormulaModel()
+    model = PickledModel(Path(path))
+    logger.info("Загружена модель выгорания %s", model.name)
+    return model
+
+
+def predict_requests(model: BurnoutModel, requests: Sequence[Any]) -> List[List[Optional[float]]]:
+    """
+    Считает прогнозы для пачки запросов `(kpi_year, employee_ids)` одним вызовом модели на год:
+    признаки всех сотрудников пачки берутся из хранилища признаков, после расчёта результаты
+    раскладываются обратно по запросам. Для сотрудников без признаков - None.
+    """
+    results: List[List[Optional[float]]] = [[] for _ in requests]
+    for kpi_year in {kpi_year for kpi_year, _ in requests}:
+        indexes = [index for index, (year, _) in enumerate(requests) if year == kpi_year]
+        # Без приведения к int64: id вне диапазона хранилище не найдёт, а не уронит всю пачку
+        ids = [employee_id for index in indexes for employee_id in requests[index][1]]
+        snapshot = get_feature_store(kpi_year).snapshot()
+        if snapshot is None:
+            for index in indexes:
+                results[index] = [None] * len(requests[index][1])
+            continue
+        rows, found = snapshot.locate(ids)
+        predictions = np.full(len(ids), np.nan)
+        if found.any():
+            predictions[found] = model.predict(snapshot.records[rows[found]])
+        offset = 0
+        for index in indexes:
+            size = len(requests[index][1])
+            chunk = predictions[offset : offset + size]
+            results[index] = [None if np.isnan(value) else float(value) for value in chunk]
+            offset += size
+    return results
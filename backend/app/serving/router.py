@@ -0,0 +1,47 @@
+from fastapi import APIRouter, HTTPException, Request, status
+
+from ..config import setup_config
+from .schema import BatchPredictRequest, BatchPredictResponse, EmployeePrediction, PredictRequest, PredictResponse
+from .service import PredictionService
+
+predict_router = APIRouter(prefix="/predict", tags=["predict"])
+
+
+def get_prediction_service(request: Request) -> PredictionService:
+    return request.app.state.prediction_service
+
+
+@predict_router.post("", response_model=PredictResponse, summary="Прогноз выгорания сотрудника")
+async def predict(request: Request, body: PredictRequest) -> PredictResponse:
+    """
+    Вероятность выгорания сотрудника по модели. Одновременные запросы считаются одной пачкой.
+    """
+    service = get_prediction_service(request)
+    kpi_year = body.kpi_year or setup_config().scoring.scoring_kpi_year
+    (probability,) = await service.predict(kpi_year, [body.employee_id])
+    if probability is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Признаки сотрудника не найдены")
+    return PredictResponse(
+        employee_id=body.employee_id,
+        kpi_year=kpi_year,
+        model=service.model.name,
+        burnout_probability=probability,
+    )
+
+
+@predict_router.post("/batch", response_model=BatchPredictResponse, summary="Прогноз выгорания для списка сотрудников")
+async def predict_batch(request: Request, body: BatchPredictRequest) -> BatchPredictResponse:
+    """
+    Вероятности выгорания для многих сотрудников за один запрос; для сотрудников без признаков - null.
+    """
+    service = get_prediction_service(request)
+    kpi_year = body.kpi_year or setup_config().scoring.scoring_kpi_year
+    probabilities = await service.predict(kpi_year, body.employee_ids)
+    return BatchPredictResponse(
+        kpi_year=kpi_year,
+        model=service.model.name,
+        predictions=[
+            EmployeePrediction(employee_id=employee_id, burnout_probability=probability)
+            for employee_id, probability in zip(body.employee_ids, probabilities)
+        ],
+    )
@@ -0,0 +1,37 @@
+from typing import Annotated, List, Optional
+
+from pydantic import BaseModel, Field
+
+from ..common.schema import MAX_EMPLOYEE_ID
+
+# Верхняя граница пакетного запроса: больше - через выгрузку или хранилище признаков
+MAX_BATCH_EMPLOYEES = 10_000
+
+
+class PredictRequest(BaseModel):
+    employee_id: int = Field(ge=1, le=MAX_EMPLOYEE_ID)
+    kpi_year: Optional[int] = None
+
+
+class BatchPredictRequest(BaseModel):
+    employee_ids: List[Annotated[int, Field(ge=1, le=MAX_EMPLOYEE_ID)]] = Field(
+        min_length=1, max_length=MAX_BATCH_EMPLOYEES
+    )
+    kpi_year: Optional[int] = None
+
+
+class EmployeePrediction(BaseModel):
+    employee_id: int
+    # None - для сотрудника нет признаков за год
+    burnout_probability: Optional[float] = None
+
+
+class PredictResponse(EmployeePrediction):
+    kpi_year: int
+    model: str
+
+
+class BatchPredictResponse(BaseModel):
+    kpi_year: int
+    model: str
+    predictions: List[EmployeePrediction]
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+
+from app.config import setup_config
+from app.serving.batcher import MicroBatcher
+
+if TYPE_CHECKING:
+    # Модель тянет numpy и хранилище признаков: импортируются при запуске сервиса, а не при импорте API
+    from app.serving.model import BurnoutModel
+
+logger = logging.getLogger(__name__)
+
+PredictRequest = Tuple[int, Sequence[int]]
+
+
+class PredictionService:
+    """
+    Модель, загруженная один раз на процесс, и очередь, объединяющая запросы прогнозов в пачки.
+    """
+
+    def __init__(self, model: BurnoutModel, max_items: int, max_wait_ms: float) -> None:
+        self.model = model
+        self.batcher: MicroBatcher[PredictRequest, List[Optional[float]]] = MicroBatcher(
+            self._predict_batch, max_items=max_items, max_wait_ms=max_wait_ms
+        )
+
+    def _predict_batch(self, requests: Sequence[PredictRequest]) -> List[List[Optional[float]]]:
+        from app.serving.model import predict_requests
+
+        return predict_requests(self.model, requests)
+
+    async def start(self) -> None:
+        await self.batcher.start()
+
+    async def stop(self) -> None:
+        await self.batcher.stop()
+
+    async def predict(self, kpi_year: int, employee_ids: Sequence[int]) -> List[Optional[float]]:
+        return await self.batcher.submit((kpi_year, list(employee_ids)), size=len(employee_ids))
+
+
+async def start_prediction_service() -> PredictionService:
+    from app.serving.model import load_model
+
+    serving_config = setup_config().serving
+    service = PredictionService(
+        load_model(serving_config.serving_model_path),
+        max_items=serving_config.serving_batch_max_items,
+        max_wait_ms=serving_config.serving_batch_max_wait_ms,
+    )
+    await service.start()
+    return service
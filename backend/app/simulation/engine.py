@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, fields
+from datetime import date
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from app.changes.listener import ChangeSet
+from app.config import setup_config
+from app.database import get_sync_engine
+from app.scoring.engine import MONTHS, KPIMatrix, combine_risk, compute_features, load_kpi_matrix, risk_from_features
+from app.scoring.recompute import HIGH_RISK_THRESHOLD
+from app.simulation.schema import (
+    CohortFilter,
+    RiskDistribution,
+    Scenario,
+    ScenarioResult,
+    SimulationRequest,
+    SimulationResponse,
+)
+
+logger = logging.getLogger(__name__)
+
+HISTOGRAM_EDGES = np.linspace(0.0, 1.0, 11)
+FLAGS = ("took_sick_leave", "has_disciplinary_action", "participates_in_corporate_events", "has_subordinates")
+
+
+@dataclass(frozen=True)
+class Baseline:
+    """
+    Матрица KPI всех сотрудников за год, её признаки и оценки риска - общая основа сценариев.
+    Не изменяется: сценарии работают с копиями строк когорты.
+    """
+
+    kpi_year: int
+    as_of: date
+    matrix: KPIMatrix
+    features: Dict[str, np.ndarray]
+    scores: np.ndarray
+    loaded_at: float
+
+
+def load_baseline(kpi_year: int, as_of: date) -> Baseline:
+    started = time.perf_counter()
+    with get_sync_engine().connect() as connection:
+        matrix = load_kpi_matrix(connection, kpi_year, as_of)
+    features = compute_features(matrix)
+    baseline = Baseline(kpi_year, as_of, matrix, features, combine_risk(matrix, features), time.monotonic())
+    logger.info(
+        "Основа сценариев за %d год: %d сотрудников за %.2f c", kpi_year, len(matrix), time.perf_counter() - started
+    )
+    return baseline
+
+
+def take_rows(matrix: KPIMatrix, index: np.ndarray) -> KPIMatrix:
+    return KPIMatrix(**{field.name: getattr(matrix, field.name)[index] for field in fields(matrix)})
+
+
+def cohort_rows(matrix: KPIMatrix, cohort: CohortFilter) -> np.ndarray:
+    """
+    Номера строк матрицы, попавших в когорту. Сотрудники с неизвестным возрастом не проходят
+    условия по возрасту.
+    """
+    mask = np.ones(len(matrix), dtype=bool)
+    if cohort.employee_ids is not None:
+        mask &= np.isin(matrix.employee_ids, np.asarray(cohort.employee_ids, dtype=np.int64))
+    if cohort.min_tenure_years is not None:
+        mask &= matrix.tenure_years >= cohort.min_tenure_years
+    if cohort.max_tenure_years is not None:
+        mask &= matrix.tenure_years <= cohort.max_tenure_years
+    if cohort.min_age is not None:
+        mask &= matrix.age >= cohort.min_age
+    if cohort.max_age is not None:
+        mask &= matrix.age <= cohort.max_age
+    for flag in FLAGS:
+        value = getattr(cohort, flag)
+        if value is not None:
+            mask &= getattr(matrix, flag) == value
+    return np.flatnonzero(mask)
+
+
+def _simulate_chunk(baseline: Baseline, rows: np.ndarray, scenarios: Sequence[Scenario]) -> np.ndarray:
+    """
+    Оценки риска когорты для каждого сценария, матрица (сценарий, сотрудник). Строки всех сценариев
+    сложены в один массив и считаются одним вызовом; признаки KPI пересчитываются только
+    для сценариев, меняющих KPI, остальные берут их из основы.
+    """
+    count, size = len(scenarios), len(rows)
+    features = {name: np.tile(values[rows], count) for name, values in baseline.features.items()}
+    flags = {flag: np.tile(getattr(baseline.matrix, flag)[rows], count) for flag in FLAGS}
+
+    perturbed = [index for index, scenario in enumerate(scenarios) if scenario.kpi is not None]
+    if perturbed:
+        scale = np.ones((len(perturbed), 1, MONTHS))
+        shift = np.zeros((len(perturbed), 1, MONTHS))
+        for position, index in enumerate(perturbed):
+            kpi = scenarios[index].kpi
+            assert kpi is not None
+            months = np.asarray(kpi.months) - 1
+            scale[position, 0, months] = kpi.scale
+            shift[position, 0, months] = kpi.shift
+        matrix = take_rows(baseline.matrix, np.tile(rows, len(perturbed)))
+        matrix.kpi = (baseline.matrix.kpi[rows][None, :, :] * scale + shift).reshape(-1, MONTHS)
+        recomputed = compute_features(matrix)
+        for position, index in enumerate(perturbed):
+            for name, values in recomputed.items():
+                features[name][index * size : (index + 1) * size] = values[position * size : (position + 1) * size]
+
+    for index, scenario in enumerate(scenarios):
+        block = slice(index * size, (index + 1) * size)
+        if scenario.days_since_vacation is not None:
+            features["days_since_vacation"][block] = scenario.days_since_vacation
+        for flag in FLAGS:
+            value = getattr(scenario, flag)
+            if value is not None:
+                flags[flag][block] = value
+
+    return risk_from_features(features, **flags).reshape(count, size)
+
+
+def simulate(baseline: Baseline, rows: np.ndarray, scenarios: Sequence[Scenario]) -> np.ndarray:
+    """
+    Оценки риска когорты `rows` по сценариям. Сценарии считаются частями не больше
+    `SIMULATION_MAX_ROWS` строк, чтобы промежуточные массивы не росли с их числом.
+    """
+    max_rows = setup_config().simulation.simulation_max_rows
+    chunk = max(1, max_rows // max(len(rows), 1))
+    return np.concatenate(
+        [_simulate_chunk(baseline, rows, scenarios[start : start + chunk]) for start in range(0, len(scenarios), chunk)]
+    )
+
+
+def distribution(scores: np.ndarray) -> RiskDistribution:
+    return RiskDistribution(
+        mean=float(scores.mean()),
+        median=float(np.median(scores)),
+        p90=float(np.quantile(scores, 0.9)),
+        high_risk_share=float((scores >= HIGH_RISK_THRESHOLD).mean()),
+        histogram=np.histogram(scores, bins=HISTOGRAM_EDGES)[0].tolist(),
+    )
+
+
+def compare(name: str, baseline: np.ndarray, base_distribution: RiskDistribution, scores: np.ndarray) -> ScenarioResult:
+    scenario_distribution = distribution(scores)
+    was_high = baseline >= HIGH_RISK_THRESHOLD
+    is_high = scores >= HIGH_RISK_THRESHOLD
+    return ScenarioResult(
+        name=name,
+        distribution=scenario_distribution,
+        mean_delta=scenario_distribution.mean - base_distribution.mean,
+        median_delta=scenario_distribution.median - base_distribution.median,
+        high_risk_share_delta=scenario_distribution.high_risk_share - base_distribution.high_risk_share,
+        moved_to_high_risk=int((is_high & ~was_high).sum()),
+        moved_from_high_risk=int((was_high & ~is_high).sum()),
+    )
+
+
+def run_simulation(baseline: Baseline, request: SimulationRequest) -> Optional[SimulationResponse]:
+    """
+    Считает сценарии запроса по основе; ничего не пишет в базу. None - в когорту никто не попал.
+    """
+    rows = cohort_rows(baseline.matrix, request.cohort)
+    if not len(rows):
+        return None
+    base_scores = baseline.scores[rows]
+    base_distribution = distribution(base_scores)
+    results = simulate(baseline, rows, request.scenarios)
+    return SimulationResponse(
+        kpi_year=baseline.kpi_year,
+        as_of=baseline.as_of,
+        employees=len(rows),
+        high_risk_threshold=HIGH_RISK_THRESHOLD,
+        histogram_edges=HISTOGRAM_EDGES.tolist(),
+        baseline=base_distribution,
+        scenarios=[
+            compare(scenario.name, base_scores, base_distribution, scores)
+            for scenario, scores in zip(request.scenarios, results)
+        ],
+    )
+
+
+class BaselineCache:
+    """
+    Основы сценариев процесса API по годам. Основа загружается при первом запросе за год
+    и используется, пока не изменились сотрудники или KPI (по уведомлениям слушателя изменений),
+    не сменилась дата и не прошло `SIMULATION_BASELINE_TTL_SECONDS`.
+    """
+
+    def __init__(self) -> None:
+        self._baselines: Dict[int, Baseline] = {}
+        self._locks: Dict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    def _fresh(self, kpi_year: int, today: date) -> Optional[Baseline]:
+        baseline = self._baselines.get(kpi_year)
+        ttl = setup_config().simulation.simulation_baseline_ttl_seconds
+        if baseline is None or baseline.as_of != today or time.monotonic() - baseline.loaded_at > ttl:
+            return None
+        return baseline
+
+    async def get(self, kpi_year: int) -> Baseline:
+        today = date.today()
+        baseline = self._fresh(kpi_year, today)
+        if baseline is not None:
+            return baseline
+        # Одновременные запросы ждут одну загрузку, а не читают матрицу из базы каждый
+        async with self._locks[kpi_year]:
+            baseline = self._fresh(kpi_year, today)
+            if baseline is None:
+                baseline = await asyncio.to_thread(load_baseline, kpi_year, today)
+                self._baselines[kpi_year] = baseline
+        return baseline
+
+    async def on_changes(self, changes: ChangeSet) -> None:
+        """
+        Подписчик слушателя изменений: следующий запрос загрузит основу заново.
+        """
+        self._baselines.clear()
+
+
+baseline_cache = BaselineCache()
@@ -0,0 +1,31 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException, status
+
+from ..config import setup_config
+from .schema import SimulationRequest, SimulationResponse
+
+simulation_router = APIRouter(prefix="/simulations", tags=["simulation"])
+
+
+@simulation_router.post(
+    "/risk",
+    response_model=SimulationResponse,
+    summary="Сценарии «что если» для риска выгорания когорты",
+)
+async def simulate_risk(body: SimulationRequest) -> SimulationResponse:
+    """
+    Пересчитывает риск сотрудников когорты для каждого сценария (изменение KPI, отпуска, флагов)
+    и возвращает сдвиг распределения относительно текущих данных. Считается по матрице KPI
+    в памяти процесса, в базу ничего не пишется.
+    """
+    # Расчёт тянет numpy: импортируется при первом запросе, а не при запуске API
+    from .engine import baseline_cache, run_simulation
+
+    kpi_year = body.kpi_year or setup_config().scoring.scoring_kpi_year
+    baseline = await baseline_cache.get(kpi_year)
+    # Расчёт векторный, но на всей компании занимает десятки миллисекунд - не в цикле событий
+    response = await asyncio.to_thread(run_simulation, baseline, body)
+    if response is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="В когорту не попал ни один сотрудник")
+    return response
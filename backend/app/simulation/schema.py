@@ -0,0 +1,91 @@
+from datetime import date
+from typing import Annotated, List, Optional
+
+from pydantic import BaseModel, Field
+
+from ..common.schema import MAX_EMPLOYEE_ID
+
+# Сценариев в одном запросе: все считаются одним расчётом по матрице когорты
+MAX_SCENARIOS = 50
+
+
+class CohortFilter(BaseModel):
+    """
+    Отбор сотрудников по полям `Employee`; незаданные условия не применяются.
+    """
+
+    employee_ids: Optional[List[Annotated[int, Field(ge=1, le=MAX_EMPLOYEE_ID)]]] = Field(
+        default=None, max_length=100_000
+    )
+    min_tenure_years: Optional[float] = None
+    max_tenure_years: Optional[float] = None
+    min_age: Optional[int] = None
+    max_age: Optional[int] = None
+    has_subordinates: Optional[bool] = None
+    took_sick_leave: Optional[bool] = None
+    has_disciplinary_action: Optional[bool] = None
+    participates_in_corporate_events: Optional[bool] = None
+
+
+class KPIPerturbation(BaseModel):
+    """
+    Новое значение KPI = значение * `scale` + `shift` для выбранных месяцев; пропущенные месяцы
+    остаются пропущенными. Снижение цели KPI на 10% - `scale` = 1 / 0.9.
+    """
+
+    months: List[Annotated[int, Field(ge=1, le=12)]] = Field(default_factory=lambda: list(range(1, 13)), min_length=1)
+    scale: float = Field(default=1.0, ge=0)
+    shift: float = 0.0
+
+
+class Scenario(BaseModel):
+    """
+    Изменения для всех сотрудников когорты. Флаги и давность отпуска задаются значением,
+    незаданные поля остаются как есть.
+    """
+
+    name: str = Field(min_length=1, max_length=100)
+    kpi: Optional[KPIPerturbation] = None
+    # 0 - все сотрудники когорты только что вернулись из отпуска
+    days_since_vacation: Optional[float] = Field(default=None, ge=0)
+    took_sick_leave: Optional[bool] = None
+    has_disciplinary_action: Optional[bool] = None
+    participates_in_corporate_events: Optional[bool] = None
+    has_subordinates: Optional[bool] = None
+
+
+class SimulationRequest(BaseModel):
+    kpi_year: Optional[int] = None
+    cohort: CohortFilter = Field(default_factory=CohortFilter)
+    scenarios: List[Scenario] = Field(min_length=1, max_length=MAX_SCENARIOS)
+
+
+class RiskDistribution(BaseModel):
+    mean: float
+    median: float
+    p90: float
+    # Доля сотрудников с оценкой не ниже порога высокого риска
+    high_risk_share: float
+    # Число сотрудников в интервалах `histogram_edges`
+    histogram: List[int]
+
+
+class ScenarioResult(BaseModel):
+    name: str
+    distribution: RiskDistribution
+    mean_delta: float
+    median_delta: float
+    high_risk_share_delta: float
+    moved_to_high_risk: int
+    moved_from_high_risk: int
+
+
+class SimulationResponse(BaseModel):
+    kpi_year: int
+    # Дата, на которую считается давность отпуска
+    as_of: date
+    employees: int
+    high_risk_threshold: float
+    histogram_edges: List[float]
+    baseline: RiskDistribution
+    scenarios: List[ScenarioResult]
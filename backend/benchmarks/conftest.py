@@ -0,0 +1,117 @@
+"""
+Общие фикстуры бенчмарков.
+
+Бенчмарки работают с отдельной базой `burnout_bench_<pid>` на сервере Postgres из настроек
+окружения (DB_HOST, POSTGRES_USER, ...): база создаётся и мигрируется перед запуском и удаляется после.
+Имя базы подставляется в окружение до импорта `app`, так как настройки читаются при импорте.
+"""
+
+import asyncio
+import os
+from pathlib import Path
+from typing import Iterator
+
+import psycopg2
+import pytest
+from psycopg2 import sql
+
+BENCH_DB_NAME = f"burnout_bench_{os.getpid()}"
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+# Размер набора для бенчмарков загрузки и чтения; 1M строк - через BENCH_ROWS=1m
+BENCH_ROWS = os.environ.get("BENCH_ROWS", "10k")
+
+os.environ["POSTGRES_DB"] = BENCH_DB_NAME
+# Кэш ответов отключён, чтобы бенчмарки чтения измеряли запросы к базе
+os.environ["CACHE_ENABLED"] = "false"
+
+
+def _admin_connection():
+    connection = psycopg2.connect(
+        host=os.environ.get("DB_HOST", "localhost"),
+        port=int(os.environ.get("POSTGRES_CONNECTION_PORT", "5432")),
+        user=os.environ.get("POSTGRES_USER", "postgres"),
+        password=os.environ.get("POSTGRES_PASSWORD", "postgres"),
+        dbname="postgres",
+    )
+    connection.autocommit = True
+    return connection
+
+
+@pytest.fixture(scope="session")
+def bench_database() -> Iterator[str]:
+    from alembic import command
+    from alembic.config import Config as AlembicConfig
+
+    try:
+        admin = _admin_connection()
+    except psycopg2.OperationalError as exc:
+        pytest.skip(f"Postgres для бенчмарков недоступен: {exc}")
+
+    with admin.cursor() as cursor:
+        cursor.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(BENCH_DB_NAME)))
+    try:
+        command.upgrade(AlembicConfig(str(BACKEND_DIR / "alembic.ini")), "head")
+        yield BENCH_DB_NAME
+    finally:
+        from app.database import dispose_sync_engine
+
+        dispose_sync_engine()
+        with admin.cursor() as cursor:
+            cursor.execute(sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(sql.Identifier(BENCH_DB_NAME)))
+        admin.close()
+
+
+@pytest.fixture(scope="session")
+def dataset_path(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    from app.scripts.generate_dataset import parse_rows, write_dataset
+
+    rows = parse_rows(BENCH_ROWS)
+    return write_dataset(tmp_path_factory.mktemp("datasets") / f"employees_{rows}.csv", rows)
+
+
+@pytest.fixture(scope="session")
+def small_dataset_path(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """
+    Набор для построчной загрузки через ORM, которая на больших файлах идёт минутами.
+    """
+    from app.scripts.generate_dataset import write_dataset
+
+    return write_dataset(tmp_path_factory.mktemp("datasets") / "employees_small.csv", 1_000)
+
+
+def truncate_tables() -> None:
+    from sqlalchemy import text
+
+    from app.database import get_sync_engine
+
+    with get_sync_engine().begin() as connection:
+        connection.execute(
+            text(
+                "TRUNCATE employees, employee_kpis, employee_risk_scores, job_watermarks, "
+                "kpi_cohort_rollups, ingest_files, employee_kpi_years RESTART IDENTITY"
+            )
+        )
+
+
+@pytest.fixture(scope="session")
+def loaded_database(bench_database: str, dataset_path: Path) -> str:
+    """
+    База с загруженным набором `dataset_path` для бенчмарков чтения.
+    """
+    from app.rollups.refresh import refresh_kpi_rollups
+    from app.scripts.bulk_load import bulk_load_csv_data
+
+    truncate_tables()
+    bulk_load_csv_data(dataset_path, force=True)
+    refresh_kpi_rollups(2025, None)
+    return bench_database
+
+
+@pytest.fixture(scope="session")
+def event_loop_runner() -> Iterator[asyncio.AbstractEventLoop]:
+    """
+    Отдельный цикл событий: pytest-benchmark вызывает измеряемую функцию синхронно.
+    """
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
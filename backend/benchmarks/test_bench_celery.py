@@ -0,0 +1,34 @@
+from typing import Iterator
+
+import pytest
+
+from app.celery import get_celery_app
+
+
+@pytest.fixture(scope="module")
+def celery_worker() -> Iterator[None]:
+    """
+    Воркер в потоке процесса бенчмарков с брокером из CELERY_BROKER_URL.
+    """
+    from celery.contrib.testing.worker import start_worker
+    from kombu.exceptions import OperationalError
+
+    # Задачи регистрируются до старта воркера, иначе он не примет их сообщения
+    import app.common.tasks  # noqa: F401
+
+    celery_app = get_celery_app()
+    try:
+        with celery_app.connection_for_write() as connection:
+            connection.ensure_connection(max_retries=1)
+    except OperationalError as exc:
+        pytest.skip(f"Брокер Celery недоступен: {exc}")
+
+    with start_worker(celery_app, pool="solo", perform_ping_check=False, shutdown_timeout=10):
+        yield
+
+
+def test_heartbeat_round_trip(benchmark, celery_worker: None) -> None:
+    from app.common.tasks import sample_heartbeat
+
+    # Отправка, выполнение и чтение результата из бэкенда
+    assert benchmark(lambda: sample_heartbeat.delay().get(timeout=10)) == "ok"
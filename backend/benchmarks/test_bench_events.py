@@ -0,0 +1,57 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Iterator
+
+import httpx
+import orjson
+import pytest
+
+from app.main import app
+
+EVENTS_PER_REQUEST = 50_000
+
+
+@pytest.fixture(scope="module")
+def client(bench_database: str, event_loop_runner: asyncio.AbstractEventLoop) -> Iterator[httpx.AsyncClient]:
+    lifespan = app.router.lifespan_context(app)
+    event_loop_runner.run_until_complete(lifespan.__aenter__())
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120)
+    yield client
+    event_loop_runner.run_until_complete(client.aclose())
+    event_loop_runner.run_until_complete(lifespan.__aexit__(None, None, None))
+
+
+@pytest.fixture(scope="module")
+def events_body() -> bytes:
+    started = datetime.now(timezone.utc) - timedelta(days=30)
+    event_types = ("sick_leave", "vacation", "overtime", "kpi_update")
+    return b"".join(
+        orjson.dumps(
+            {
+                "employee_id": index % 10_000 + 1,
+                "event_type": event_types[index % len(event_types)],
+                "occurred_at": (started + timedelta(seconds=index)).isoformat(),
+                "payload": {"hours": index % 12},
+            }
+        )
+        + b"\n"
+        for index in range(EVENTS_PER_REQUEST)
+    )
+
+
+def _post_events(loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient, body: bytes) -> httpx.Response:
+    # Тело отдаётся кусками, как его присылает HRIS: обработчик не должен собирать его целиком
+    async def chunks() -> AsyncIterator[bytes]:
+        for offset in range(0, len(body), 64 * 1024):
+            yield body[offset : offset + 64 * 1024]
+
+    response = loop.run_until_complete(
+        client.post("/events", content=chunks(), headers={"Content-Type": "application/x-ndjson"})
+    )
+    response.raise_for_status()
+    return response
+
+
+def test_ingest_events_ndjson(benchmark, client: httpx.AsyncClient, event_loop_runner, events_body: bytes) -> None:
+    response = benchmark.pedantic(_post_events, args=(event_loop_runner, client, events_body), rounds=3)
+    assert response.json()["accepted"] == EVENTS_PER_REQUEST
@@ -0,0 +1,40 @@
+from pathlib import Path
+
+import pytest
+
+from app.scripts.bulk_load import bulk_load_csv_data
+from app.scripts.load_csv import load_csv_data
+
+from .conftest import truncate_tables
+
+
+@pytest.mark.usefixtures("bench_database")
+def test_load_orm(benchmark, small_dataset_path: Path) -> None:
+    benchmark.pedantic(load_csv_data, args=(small_dataset_path,), setup=truncate_tables, rounds=3)
+
+
+@pytest.mark.usefixtures("bench_database")
+@pytest.mark.parametrize("workers", [1, 4])
+def test_load_bulk(benchmark, dataset_path: Path, workers: int) -> None:
+    stats = benchmark.pedantic(
+        bulk_load_csv_data,
+        args=(dataset_path,),
+        kwargs={"workers": workers, "chunk_bytes": 1024 * 1024, "force": True},
+        setup=truncate_tables,
+        rounds=3,
+    )
+    assert stats.errors == 0
+
+
+@pytest.mark.usefixtures("bench_database")
+def test_reload_incremental_unchanged(benchmark, dataset_path: Path) -> None:
+    truncate_tables()
+    bulk_load_csv_data(dataset_path, force=True)
+    # Повторная загрузка того же файла: хэши строк совпадают, и запись в основные таблицы не нужна
+    stats = benchmark.pedantic(
+        bulk_load_csv_data,
+        args=(dataset_path,),
+        kwargs={"incremental": True, "force": True},
+        rounds=3,
+    )
+    assert stats.employees_changed == 0
@@ -0,0 +1,57 @@
+import csv
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+from app.scripts.load_csv import normalize_header, normalize_value, parse_record, parse_tenure
+from app.scripts.parse_pipeline import encode_copy_rows, parse_chunk, read_header, split_csv_chunks
+
+
+@pytest.fixture(scope="module")
+def normalized_rows(dataset_path: Path) -> List[Dict[str, str]]:
+    with dataset_path.open("r", encoding="utf-8") as csv_file:
+        reader = csv.DictReader(csv_file)
+        return [
+            {normalize_header(key): normalize_value(value) for key, value in row.items()}
+            for _, row in zip(range(10_000), reader)
+        ]
+
+
+def test_parse_tenure(benchmark) -> None:
+    values = [f"{years} лет {months} месяцев" for years in range(40) for months in range(12)]
+
+    def run() -> None:
+        parse_tenure.cache_clear()
+        for value in values:
+            parse_tenure(value)
+
+    benchmark(run)
+
+
+def test_parse_record(benchmark, normalized_rows: List[Dict[str, str]]) -> None:
+    def run() -> int:
+        return sum(1 for line_no, row in enumerate(normalized_rows, start=2) if parse_record(row, line_no))
+
+    assert benchmark(run) == len(normalized_rows)
+
+
+def test_split_csv_chunks(benchmark, dataset_path: Path) -> None:
+    _, data_start = read_header(dataset_path)
+    chunks = benchmark(split_csv_chunks, dataset_path, data_start, 1024 * 1024)
+    assert chunks
+
+
+def test_parse_chunk(benchmark, dataset_path: Path) -> None:
+    fieldnames, data_start = read_header(dataset_path)
+    (chunk,) = split_csv_chunks(dataset_path, data_start, dataset_path.stat().st_size)
+    parsed = benchmark(parse_chunk, dataset_path, chunk, fieldnames)
+    assert parsed.rows_parsed == parsed.rows_read
+
+
+def test_encode_copy_rows(benchmark, dataset_path: Path) -> None:
+    fieldnames, data_start = read_header(dataset_path)
+    (chunk,) = split_csv_chunks(dataset_path, data_start, dataset_path.stat().st_size)
+    rows = parse_chunk(dataset_path, chunk, fieldnames).rows
+    employees_csv, _ = benchmark(encode_copy_rows, rows)
+    assert employees_csv
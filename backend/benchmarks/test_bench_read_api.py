@@ -0,0 +1,100 @@
+import asyncio
+from typing import Any, Iterator
+
+import httpx
+import pytest
+
+from app.main import app
+
+
+@pytest.fixture(scope="module")
+def client(loaded_database: str, event_loop_runner: asyncio.AbstractEventLoop) -> Iterator[httpx.AsyncClient]:
+    lifespan = app.router.lifespan_context(app)
+    event_loop_runner.run_until_complete(lifespan.__aenter__())
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    yield client
+    event_loop_runner.run_until_complete(client.aclose())
+    event_loop_runner.run_until_complete(lifespan.__aexit__(None, None, None))
+
+
+def _get(loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient, url: str, **params: Any) -> httpx.Response:
+    response = loop.run_until_complete(client.get(url, params=params))
+    response.raise_for_status()
+    return response
+
+
+def test_list_employees_first_page(benchmark, client: httpx.AsyncClient, event_loop_runner) -> None:
+    response = benchmark(_get, event_loop_runner, client, "/employees", limit=100)
+    assert len(response.json()["items"]) == 100
+
+
+def test_list_employees_deep_page(benchmark, client: httpx.AsyncClient, event_loop_runner) -> None:
+    # Keyset-пагинация: страница в конце выборки не должна быть дороже первой
+    first_id = _get(event_loop_runner, client, "/employees", limit=1).json()["items"][0]["id"]
+    benchmark(_get, event_loop_runner, client, "/employees", after_id=first_id + 5_000, limit=100)
+
+
+def test_stream_employees_ndjson(benchmark, client: httpx.AsyncClient, event_loop_runner) -> None:
+    response = benchmark(_get, event_loop_runner, client, "/employees", format="ndjson")
+    assert response.content.count(b"\n") > 0
+
+
+def test_employee_kpis(benchmark, client: httpx.AsyncClient, event_loop_runner) -> None:
+    employee_id = _get(event_loop_runner, client, "/employees", limit=1).json()["items"][0]["id"]
+    response = benchmark(_get, event_loop_runner, client, f"/employees/{employee_id}/kpis")
+    assert response.json()["items"]
+
+
+def test_kpi_rollups(benchmark, client: httpx.AsyncClient, event_loop_runner) -> None:
+    benchmark(_get, event_loop_runner, client, "/rollups/kpi", year=2025)
+
+
+def test_search_employees(benchmark, client: httpx.AsyncClient, event_loop_runner) -> None:
+    full_name = _get(event_loop_runner, client, "/employees", limit=1).json()["items"][0]["full_name"]
+    # Опечатка и другой регистр: поиск должен находить сотрудника по сходству
+    query = full_name[:3] + full_name[4:].upper()
+    response = benchmark(_get, event_loop_runner, client, "/employees/search", q=query, limit=20)
+    assert response.json()["items"]
+
+
+def test_autocomplete_employees(benchmark, client: httpx.AsyncClient, event_loop_runner) -> None:
+    from app.employees.search import name_index
+
+    # Индекс автодополнения строится в фоне после старта приложения
+    while name_index.index is None:
+        event_loop_runner.run_until_complete(asyncio.sleep(0.1))
+    full_name = _get(event_loop_runner, client, "/employees", limit=1).json()["items"][0]["full_name"]
+    response = benchmark(_get, event_loop_runner, client, "/employees/autocomplete", prefix=full_name[:4])
+    assert response.json()["items"]
+
+
+def test_simulate_risk_scenarios(benchmark, client: httpx.AsyncClient, event_loop_runner) -> None:
+    scenarios = [{"name": f"kpi {scale:.2f}", "kpi": {"scale": scale}} for scale in (0.8, 0.9, 1.1, 1.2)]
+    scenarios += [
+        {"name": "vacation", "days_since_vacation": 0},
+        {"name": "sick leave", "took_sick_leave": True},
+        {"name": "corporate events", "participates_in_corporate_events": True},
+        {"name": "kpi targets -10%, vacation", "kpi": {"scale": 1 / 0.9}, "days_since_vacation": 0},
+    ]
+    body = {"kpi_year": 2025, "scenarios": scenarios}
+
+    def post() -> httpx.Response:
+        response = event_loop_runner.run_until_complete(client.post("/simulations/risk", json=body))
+        response.raise_for_status()
+        return response
+
+    # Первый запрос загружает основу из базы; измеряются запросы по основе в памяти
+    post()
+    response = benchmark(post)
+    assert len(response.json()["scenarios"]) == len(scenarios)
+
+
+def test_employee_peers(benchmark, client: httpx.AsyncClient, event_loop_runner) -> None:
+    from app.peers.index import publish_peer_index
+
+    publish_peer_index(2025)
+    employee_id = _get(event_loop_runner, client, "/employees", limit=1).json()["items"][0]["id"]
+    # Первый запрос отображает новую версию индекса в память; измеряется поиск по ней
+    _get(event_loop_runner, client, f"/employees/{employee_id}/peers", kpi_year=2025)
+    response = benchmark(_get, event_loop_runner, client, f"/employees/{employee_id}/peers", kpi_year=2025, k=20)
+    assert len(response.json()["peers"]) == 20
@@ -0,0 +1,134 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+from app.common import cache
+from app.common.cache import LocalLRU, ResponseCache
+from app.config import CacheConfig
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture()
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(cache.time, "monotonic", fake)
+    return fake
+
+
+def test_lru_evicts_least_recently_used(clock: FakeClock) -> None:
+    lru = LocalLRU(max_items=2)
+    lru.set("a", 1, ttl=60)
+    lru.set("b", 2, ttl=60)
+    # Чтение делает запись самой свежей, поэтому вытесняется "b"
+    assert lru.get("a") == (True, 1)
+    lru.set("c", 3, ttl=60)
+
+    assert lru.get("b") == (False, None)
+    assert lru.get("a") == (True, 1)
+    assert lru.get("c") == (True, 3)
+
+
+def test_lru_overwrite_refreshes_position(clock: FakeClock) -> None:
+    lru = LocalLRU(max_items=2)
+    lru.set("a", 1, ttl=60)
+    lru.set("b", 2, ttl=60)
+    lru.set("a", 10, ttl=60)
+    lru.set("c", 3, ttl=60)
+
+    assert lru.get("a") == (True, 10)
+    assert lru.get("b") == (False, None)
+
+
+def test_lru_expires_entries(clock: FakeClock) -> None:
+    lru = LocalLRU(max_items=10)
+    lru.set("a", 1, ttl=5)
+    clock.now += 4
+    assert lru.get("a") == (True, 1)
+    clock.now += 2
+
+    assert lru.get("a") == (False, None)
+    assert "a" not in lru._items
+
+
+def test_lru_disabled() -> None:
+    lru = LocalLRU(max_items=0)
+    lru.set("a", 1, ttl=60)
+
+    assert lru.get("a") == (False, None)
+
+
+def test_lru_caches_none(clock: FakeClock) -> None:
+    lru = LocalLRU(max_items=1)
+    lru.set("a", None, ttl=60)
+
+    assert lru.get("a") == (True, None)
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis") -> None:
+        self.redis = redis
+        self.commands: List[Tuple[str, Tuple[Any, ...]]] = []
+
+    def set(self, key: str, value: bytes, px: int) -> None:
+        self.commands.append(("set", (key, value)))
+
+    def delete(self, key: str) -> None:
+        self.commands.append(("delete", (key,)))
+
+    async def execute(self) -> None:
+        for command, args in self.commands:
+            await getattr(self.redis, command)(*args)
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.data: Dict[str, bytes] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self.data.get(key)
+
+    async def set(self, key: str, value: bytes, nx: bool = False, px: Optional[int] = None) -> bool:
+        if nx and key in self.data:
+            return False
+        self.data[key] = value
+        return True
+
+    async def delete(self, key: str) -> None:
+        self.data.pop(key, None)
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+
+@pytest.fixture()
+def response_cache() -> ResponseCache:
+    instance = ResponseCache(CacheConfig(cache_enabled=False, cache_redis_url=""))
+    instance.redis = FakeRedis()
+    return instance
+
+
+async def test_stores_value_and_releases_lock(response_cache: ResponseCache) -> None:
+    async def compute() -> Dict[str, int]:
+        return {"value": 1}
+
+    assert await response_cache.get_or_compute("scores", "key", 60, compute) == {"value": 1}
+    assert list(response_cache.redis.data) == ["cache:scores:v0:key"]
+    assert response_cache.stats.misses == 1
+
+
+async def test_releases_lock_when_compute_fails(response_cache: ResponseCache) -> None:
+    async def compute() -> Dict[str, int]:
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await response_cache.get_or_compute("scores", "key", 60, compute)
+
+    assert response_cache.redis.data == {}
+    assert response_cache._inflight == {}
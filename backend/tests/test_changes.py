@@ -0,0 +1,157 @@
+from typing import List, Optional, Tuple
+
+import orjson
+import pytest
+
+from app.changes.handlers import _refresh_rollups, changed_employees
+from app.changes.listener import ChangeListener, ChangeSet
+from app.config import setup_config
+
+
+def notification(**event: object) -> str:
+    return orjson.dumps(event).decode()
+
+
+def test_employee_ids() -> None:
+    changes = ChangeSet()
+    changes.add(notification(table="employees", op="update", ids=[1, 2]))
+    changes.add(notification(table="employees", op="insert", ids=[2, 3]))
+
+    assert changes.employee_ids == {1, 2, 3}
+    assert changes.updated_employee_ids == {1, 2}
+    assert not changes.employees_all
+    assert not changes.employees_updated_all
+    assert changes.events == 2
+    assert changes
+
+
+def test_employees_without_ids() -> None:
+    changes = ChangeSet()
+    changes.add(notification(table="employees", op="update"))
+
+    assert changes.employees_all
+    assert changes.employees_updated_all
+    assert changes.employee_ids == set()
+
+
+def test_bulk_employee_insert_is_not_an_update() -> None:
+    changes = ChangeSet()
+    changes.add(notification(table="employees", op="insert"))
+    changes.add(notification(table="employees", op="delete", ids=[4]))
+
+    assert changes.employees_all
+    assert not changes.employees_updated_all
+    assert changes.updated_employee_ids == set()
+
+
+def test_kpi_ids_and_periods() -> None:
+    changes = ChangeSet()
+    changes.add(notification(table="employee_kpis", op="insert", ids=[5], periods=[202501, 202502]))
+    changes.add(notification(table="employee_kpis", op="delete", ids=[6], periods=[202412]))
+
+    assert changes.kpi_employee_ids == {5, 6}
+    assert changes.kpi_periods == {(2025, 1), (2025, 2), (2024, 12)}
+    assert changes.kpi_years() == {2024, 2025}
+    assert not changes.kpis_all
+    assert not changes.kpi_periods_all
+    assert not changes.employees_all
+
+
+def test_kpi_truncate() -> None:
+    changes = ChangeSet()
+    changes.add(notification(table="employee_kpis", op="truncate"))
+
+    assert changes.kpis_all
+    assert changes.kpi_periods_all
+
+
+def test_kpi_year_dropped() -> None:
+    # Уведомление drop_kpi_year: без id, но с периодами года
+    changes = ChangeSet()
+    changes.add(notification(table="employee_kpis", op="drop", periods=[2023 * 100 + month for month in range(1, 13)]))
+
+    assert changes.kpis_all
+    assert not changes.kpi_periods_all
+    assert changes.kpi_years() == {2023}
+
+
+def test_unknown_table_is_counted() -> None:
+    changes = ChangeSet()
+    changes.add(notification(table="other", op="insert", ids=[1]))
+
+    assert changes.events == 1
+    assert changes.employee_ids == set()
+    assert changes.kpi_employee_ids == set()
+
+
+def test_empty_change_set() -> None:
+    assert not ChangeSet()
+
+
+def test_mark_all_changed() -> None:
+    listener = ChangeListener("test", leader=True)
+    listener._pending.add(notification(table="employees", op="update", ids=[1]))
+    listener._mark_all_changed()
+
+    changes = listener._pending
+    assert changes.employees_all and changes.employees_updated_all
+    assert changes.kpis_all and changes.kpi_periods_all
+    assert changes
+    assert listener._first_event_at is not None
+
+
+def test_changed_employees_by_ids() -> None:
+    changes = ChangeSet()
+    changes.add(notification(table="employees", op="update", ids=[1]))
+    changes.add(notification(table="employee_kpis", op="insert", ids=[2], periods=[202503]))
+
+    assert changed_employees(changes, 2025) == (False, {1, 2})
+
+
+def test_changed_employees_of_other_year() -> None:
+    changes = ChangeSet()
+    changes.add(notification(table="employee_kpis", op="update", ids=[3], periods=[202401]))
+
+    assert changed_employees(changes, 2025) == (False, set())
+    assert changed_employees(changes, 2024) == (False, {3})
+
+
+def test_changed_employees_without_kpi_ids() -> None:
+    changes = ChangeSet()
+    changes.add(notification(table="employee_kpis", op="update", periods=[202401]))
+
+    assert changed_employees(changes, 2025) == (False, set())
+    assert changed_employees(changes, 2024) == (True, set())
+
+
+def test_changed_employees_all() -> None:
+    changes = ChangeSet()
+    changes.add(notification(table="employees", op="update"))
+
+    assert changed_employees(changes, 2025) == (True, set())
+
+
+@pytest.fixture()
+def rollup_refreshes(monkeypatch: pytest.MonkeyPatch) -> List[Tuple[int, Optional[List[int]]]]:
+    from app.rollups.tasks import refresh_kpi_rollups_task
+
+    calls: List[Tuple[int, Optional[List[int]]]] = []
+    monkeypatch.setattr(refresh_kpi_rollups_task, "delay", lambda year, months: calls.append((year, months)))
+    return calls
+
+
+def test_new_employees_refresh_only_their_months(rollup_refreshes: List[Tuple[int, Optional[List[int]]]]) -> None:
+    changes = ChangeSet()
+    changes.add(notification(table="employees", op="insert", ids=[1, 2]))
+    changes.add(notification(table="employee_kpis", op="insert", ids=[1, 2], periods=[202503, 202504]))
+    _refresh_rollups(changes)
+
+    assert [(year, sorted(months)) for year, months in rollup_refreshes] == [(2025, [3, 4])]
+
+
+def test_attribute_update_refreshes_all_months(rollup_refreshes: List[Tuple[int, Optional[List[int]]]]) -> None:
+    changes = ChangeSet()
+    changes.add(notification(table="employees", op="update", ids=[1]))
+    _refresh_rollups(changes)
+
+    assert rollup_refreshes == [(setup_config().scoring.scoring_kpi_year, None)]
@@ -0,0 +1,65 @@
+from array import array
+from typing import List
+
+from app.employees.search import PackedStrings, PrefixIndex, escape_like, normalize_name
+
+
+def make_index(names: List[str]) -> PrefixIndex:
+    # Как PREFIX_INDEX_SQL: сортировка по байтам нормализованного ФИО, затем по id
+    rows = sorted(
+        ((normalize_name(name).encode(), employee_id, name) for employee_id, name in enumerate(names, start=1)),
+    )
+    return PrefixIndex(
+        array("i", [employee_id for _, employee_id, _ in rows]),
+        PackedStrings([key for key, _, _ in rows]),
+        PackedStrings([name.encode() for _, _, name in rows]),
+        version=1,
+    )
+
+
+def test_normalize_name() -> None:
+    assert normalize_name("  Пётр   ИВАНОВ\tСергеевич ") == "петр иванов сергеевич"
+    assert normalize_name("Ёлкин") == "елкин"
+
+
+def test_escape_like() -> None:
+    assert escape_like("50%_a\\b") == "50\\%\\_a\\\\b"
+
+
+def test_packed_strings() -> None:
+    values = ["Иванов".encode(), b"", "Ли".encode()]
+    packed = PackedStrings(values)
+
+    assert len(packed) == 3
+    assert [packed[index] for index in range(len(packed))] == values
+
+
+def test_packed_strings_empty() -> None:
+    assert len(PackedStrings([])) == 0
+
+
+def test_complete_returns_matches_in_order() -> None:
+    index = make_index(["Иванова Анна", "Иванов Пётр", "Петров Иван", "Иванов Алексей", "Ивин Олег"])
+
+    assert index.complete("иванов", limit=10) == [(4, "Иванов Алексей"), (2, "Иванов Пётр"), (1, "Иванова Анна")]
+
+
+def test_complete_normalizes_prefix() -> None:
+    index = make_index(["Иванов Пётр", "Ёлкин Павел"])
+
+    assert index.complete("  ИВАНОВ   ПЁ", limit=10) == [(1, "Иванов Пётр")]
+    assert index.complete("елк", limit=10) == [(2, "Ёлкин Павел")]
+
+
+def test_complete_limit() -> None:
+    index = make_index([f"Сидоров {number}" for number in range(10)])
+
+    assert [employee_id for employee_id, _ in index.complete("сидоров", limit=3)] == [1, 2, 3]
+
+
+def test_complete_without_matches() -> None:
+    index = make_index(["Иванов Пётр", "Петров Иван"])
+
+    assert index.complete("яковлев", limit=10) == []
+    assert index.complete("абв", limit=10) == []
+    assert make_index([]).complete("иванов", limit=10) == []
@@ -0,0 +1,128 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, List, Sequence
+
+import orjson
+import pytest
+from fastapi import HTTPException
+
+from app.events.router import iter_lines, parse_event
+from app.events.writer import EventRow, EventWriter, _Batch, month_bounds
+
+NOW = datetime(2026, 3, 15, 12, 0, tzinfo=timezone.utc)
+MIN_OCCURRED_AT = NOW - timedelta(days=400)
+MAX_OCCURRED_AT = NOW + timedelta(days=1)
+
+
+class FakeRequest:
+    def __init__(self, chunks: Sequence[bytes]) -> None:
+        self.chunks = chunks
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        for chunk in self.chunks:
+            yield chunk
+
+
+async def read_lines(chunks: Sequence[bytes], max_line_bytes: int = 1024) -> List[bytes]:
+    return [line async for line in iter_lines(FakeRequest(chunks), max_line_bytes)]
+
+
+async def test_iter_lines_joins_lines_split_across_chunks() -> None:
+    lines = await read_lines([b'{"a"', b": 1}\n{", b'"b": 2}\n\n{"c": 3}'])
+
+    assert lines == [b'{"a": 1}', b'{"b": 2}', b"", b'{"c": 3}']
+
+
+async def test_iter_lines_without_trailing_line() -> None:
+    assert await read_lines([b"one\n", b"two\n"]) == [b"one", b"two"]
+    assert await read_lines([]) == []
+
+
+async def test_iter_lines_rejects_long_line() -> None:
+    with pytest.raises(HTTPException) as error:
+        await read_lines([b"short\n" + b"x" * 20, b"y" * 20], max_line_bytes=32)
+
+    assert error.value.status_code == 413
+
+
+def event_line(**overrides: object) -> bytes:
+    event = {
+        "employee_id": 42,
+        "event_type": "vacation",
+        "occurred_at": "2026-03-01T10:00:00+03:00",
+        "payload": {"days": 14},
+    }
+    event.update(overrides)
+    return orjson.dumps(event)
+
+
+def parse(line: bytes) -> EventRow:
+    return parse_event(line, MIN_OCCURRED_AT, MAX_OCCURRED_AT)
+
+
+def test_parse_event() -> None:
+    occurred_at, employee_id, event_type, payload = parse(event_line())
+
+    assert occurred_at == datetime(2026, 3, 1, 7, 0, tzinfo=timezone.utc)
+    assert (employee_id, event_type) == (42, "vacation")
+    assert orjson.loads(payload) == {"days": 14}
+
+
+def test_parse_event_without_timezone_is_utc() -> None:
+    occurred_at, *_ = parse(event_line(occurred_at="2026-03-01T10:00:00"))
+
+    assert occurred_at == datetime(2026, 3, 1, 10, 0, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"occurred_at": "2026-03-17T00:00:00Z"},
+        {"occurred_at": "2024-01-01T00:00:00Z"},
+        {"employee_id": 0},
+        {"employee_id": 2**31},
+        {"event_type": "promotion"},
+        {"payload": {"comment": "a\u0000b"}},
+        {"payload": {"items": [{"a\u0000": 1}]}},
+        {"payload": [1, 2]},
+    ],
+)
+def test_parse_event_rejects(overrides: dict) -> None:
+    with pytest.raises(ValueError):
+        parse(event_line(**overrides))
+
+
+def test_parse_event_rejects_invalid_json() -> None:
+    with pytest.raises(ValueError):
+        parse(b'{"employee_id": 1,')
+
+
+def test_month_bounds() -> None:
+    assert month_bounds(2025, 12) == (
+        datetime(2025, 12, 1, tzinfo=timezone.utc),
+        datetime(2026, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+def make_batch(employee_id: int) -> _Batch:
+    row = (NOW, employee_id, "vacation", "{}")
+    return _Batch([row], asyncio.get_running_loop().create_future())
+
+
+async def test_failed_merged_copy_is_retried_per_batch() -> None:
+    written: List[List[EventRow]] = []
+
+    async def write(rows: List[EventRow]) -> None:
+        if any(employee_id == 2 for _, employee_id, _, _ in rows):
+            raise RuntimeError("COPY failed")
+        written.append(rows)
+
+    writer = EventWriter()
+    writer._write = write
+    batches = [make_batch(1), make_batch(2), make_batch(3)]
+    await writer._write_batches(batches)
+
+    assert [[row[1] for row in rows] for rows in written] == [[1], [3]]
+    assert batches[0].future.result() is None
+    assert isinstance(batches[1].future.exception(), RuntimeError)
+    assert batches[2].future.result() is None
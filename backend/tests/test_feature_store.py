@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.features.router import features_router
+from app.features.store import FEATURE_DTYPE, FeatureSnapshot
+
+
+@pytest.fixture()
+def snapshot() -> FeatureSnapshot:
+    records = np.zeros(3, dtype=FEATURE_DTYPE)
+    records["employee_id"] = [2, 5, 9]
+    return FeatureSnapshot(1, records)
+
+
+def test_lookup(snapshot: FeatureSnapshot) -> None:
+    record = snapshot.lookup(5)
+
+    assert record is not None
+    assert record["employee_id"] == 5
+    assert snapshot.lookup(6) is None
+    assert snapshot.lookup(10) is None
+
+
+@pytest.mark.parametrize("employee_id", [0, -5, 2**32 + 5, 2**31 + 5, 2**63 - 1, 2**70])
+def test_lookup_out_of_range(snapshot: FeatureSnapshot, employee_id: int) -> None:
+    # Без проверки диапазона 2**32 + 5 после приведения к int32 находил сотрудника 5
+    assert snapshot.lookup(employee_id) is None
+
+
+def test_locate_mixed_ids(snapshot: FeatureSnapshot) -> None:
+    rows, found = snapshot.locate([9, 2**32 + 9, 2, 2**70, 3])
+
+    assert found.tolist() == [True, False, True, False, False]
+    assert snapshot.employee_ids[rows[found]].tolist() == [9, 2]
+
+
+def test_locate_empty() -> None:
+    rows, found = FeatureSnapshot(1, np.zeros(0, dtype=FEATURE_DTYPE)).locate([1, 2])
+
+    assert found.tolist() == [False, False]
+    assert len(FeatureSnapshot(1, np.zeros(1, dtype=FEATURE_DTYPE)).locate([])[1]) == 0
+
+
+@pytest.mark.parametrize("employee_id", [0, 2**32 + 5, 2**70])
+def test_features_endpoint_rejects_out_of_range_ids(employee_id: int) -> None:
+    app = FastAPI()
+    app.include_router(features_router)
+
+    response = TestClient(app).get(f"/employees/{employee_id}/features")
+
+    assert response.status_code == 422
@@ -0,0 +1,59 @@
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from app.ingest import tasks
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.deleted: List[str] = []
+
+    def delete(self, key: str) -> None:
+        self.deleted.append(key)
+
+
+class FakeBackend:
+    def __init__(self) -> None:
+        self.client = FakeRedis()
+        self.results: Dict[str, Tuple[Any, str]] = {}
+
+    def store_result(self, task_id: str, result: Any, state: str) -> None:
+        self.results[task_id] = (result, state)
+
+
+@pytest.fixture()
+def backend(monkeypatch: pytest.MonkeyPatch) -> FakeBackend:
+    fake = FakeBackend()
+    monkeypatch.setattr(tasks, "celery_app", SimpleNamespace(backend=fake))
+    return fake
+
+
+def test_start_failure_marks_job_failed(tmp_path: Path, backend: FakeBackend) -> None:
+    csv_path = tmp_path / "job.csv"
+    csv_path.write_text("имя,фамилия\nИван,Иванов\n", encoding="utf-8")
+
+    with pytest.raises(KeyError):
+        tasks.start_csv_ingest("job", str(csv_path), 2025, True, True)
+
+    result, state = backend.results["job"]
+    assert state == "FAILURE"
+    assert isinstance(result, KeyError)
+    assert not csv_path.exists()
+    assert backend.client.deleted == [tasks.PROGRESS_KEY.format(job_id="job")]
+
+
+def test_chunk_failure_removes_upload(tmp_path: Path, backend: FakeBackend) -> None:
+    csv_path = tmp_path / "job.csv"
+    csv_path.write_text("data", encoding="utf-8")
+    payload_dir = tasks._payload_dir(csv_path)
+    payload_dir.mkdir()
+    (payload_dir / "0.employees.csv").write_text("1", encoding="utf-8")
+
+    tasks.fail_csv_ingest(None, RuntimeError("boom"), None, "job", str(csv_path))
+
+    assert not csv_path.exists()
+    assert not payload_dir.exists()
+    assert backend.client.deleted == [tasks.PROGRESS_KEY.format(job_id="job")]
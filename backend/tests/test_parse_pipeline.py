@@ -0,0 +1,137 @@
+import csv
+import io
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+from app.scripts.load_csv import REQUIRED_HEADERS
+from app.scripts.parse_pipeline import iter_parsed_chunks, parse_chunk, read_header, split_csv_chunks
+
+HEADER = [name.capitalize() for name in REQUIRED_HEADERS] + ["Январь", "Февраль"]
+
+
+def make_row(index: int) -> List[str]:
+    # Стаж и отметка об отпуске содержат переводы строк и кавычки внутри значений в кавычках
+    tenure = f"{index % 7} лет\n{index % 12} месяцев" if index % 3 == 0 else f"{index % 7} лет"
+    vacation = "2024-05-01" if index % 4 else ""
+    subordinates = 'руководитель\n"отдела"' if index % 5 == 0 else "нет"
+    return [
+        f"Сотрудник {index}",
+        tenure,
+        str(20 + index % 40),
+        subordinates,
+        vacation,
+        "да" if index % 2 else "нет",
+        "нет",
+        "да",
+        f"{index % 10 / 10:.1f}",
+        "" if index % 6 == 0 else "1,2",
+    ]
+
+
+@pytest.fixture()
+def csv_path(tmp_path: Path) -> Path:
+    rows = [make_row(index) for index in range(40)]
+    rows[7][0] = ""
+    rows[11][2] = "не число"
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows([HEADER, *rows])
+    path = tmp_path / "employees.csv"
+    path.write_bytes(buffer.getvalue().encode("utf-8"))
+    return path
+
+
+def expected_records(path: Path) -> List[Tuple[int, List[str]]]:
+    """
+    Записи файла с номером строки, с которой начинается каждая запись.
+    """
+    records = []
+    with path.open("r", encoding="utf-8", newline="") as csv_file:
+        reader = csv.reader(csv_file)
+        next(reader)
+        line_no = reader.line_num + 1
+        for values in reader:
+            records.append((line_no, values))
+            line_no = reader.line_num + 1
+    return records
+
+
+def test_read_header(csv_path: Path) -> None:
+    fieldnames, data_start = read_header(csv_path)
+
+    assert fieldnames == REQUIRED_HEADERS + ["январь", "февраль"]
+    assert csv_path.read_bytes()[:data_start].decode("utf-8") == ",".join(HEADER) + "\n"
+
+
+def test_chunks_end_on_record_boundaries(csv_path: Path) -> None:
+    _, data_start = read_header(csv_path)
+    data = csv_path.read_bytes()
+    records = [values for _, values in expected_records(csv_path)]
+
+    for chunk_bytes in range(1, len(data) + 2):
+        chunks = split_csv_chunks(csv_path, data_start, chunk_bytes)
+
+        assert chunks[0].start == data_start
+        assert chunks[-1].end == len(data)
+        assert all(left.end == right.start for left, right in zip(chunks, chunks[1:]))
+        parsed = []
+        for chunk in chunks:
+            text = data[chunk.start : chunk.end].decode("utf-8")
+            assert text.endswith("\n"), (chunk_bytes, chunk)
+            parsed.extend(csv.reader(io.StringIO(text, newline="")))
+        assert parsed == records, chunk_bytes
+
+
+def test_chunk_first_lines(csv_path: Path) -> None:
+    _, data_start = read_header(csv_path)
+    line_by_offset = {}
+    offset = data_start
+    for line_no, values in expected_records(csv_path):
+        line_by_offset[offset] = line_no
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerow(values)
+        offset += len(buffer.getvalue().encode("utf-8"))
+
+    for chunk_bytes in (1, 50, 97, 256, 1000):
+        for chunk in split_csv_chunks(csv_path, data_start, chunk_bytes):
+            assert chunk.first_line == line_by_offset[chunk.start], (chunk_bytes, chunk)
+
+
+def test_empty_file(tmp_path: Path) -> None:
+    path = tmp_path / "empty.csv"
+    path.write_bytes(b"")
+
+    assert split_csv_chunks(path, 0) == []
+
+
+@pytest.mark.parametrize("chunk_bytes", [1, 64, 300, 1 << 20])
+def test_parse_results_do_not_depend_on_chunking(csv_path: Path, chunk_bytes: int) -> None:
+    fieldnames, data_start = read_header(csv_path)
+    whole = split_csv_chunks(csv_path, data_start, 1 << 20)
+    assert len(whole) == 1
+    expected = parse_chunk(csv_path, whole[0], fieldnames)
+
+    rows, skipped_lines, error_lines = [], [], []
+    for result in iter_parsed_chunks(csv_path, chunk_bytes=chunk_bytes):
+        rows.extend(result.rows)
+        skipped_lines.extend(result.skipped_lines)
+        error_lines.extend(error.line_no for error in result.errors)
+
+    assert rows == expected.rows
+    assert skipped_lines == expected.skipped_lines
+    assert error_lines == [error.line_no for error in expected.errors]
+
+
+def test_line_numbers_account_for_multiline_values(csv_path: Path) -> None:
+    fieldnames, data_start = read_header(csv_path)
+    records = expected_records(csv_path)
+    (chunk,) = split_csv_chunks(csv_path, data_start, 1 << 20)
+    result = parse_chunk(csv_path, chunk, fieldnames)
+
+    assert result.rows_read == len(records)
+    assert result.skipped_lines == [records[7][0]]
+    assert [error.line_no for error in result.errors] == [records[11][0]]
+    assert [row[0] for row in result.rows] == [
+        line_no for index, (line_no, _) in enumerate(records) if index not in (7, 11)
+    ]
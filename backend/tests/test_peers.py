@@ -0,0 +1,150 @@
+import numpy as np
+import pytest
+
+from app.peers.index import PeerIndex, merge_arrays, sort_arrays
+from app.peers.percentiles import last_observed_months, peer_percentiles
+from app.scoring.engine import MONTHS
+
+nan = np.nan
+
+
+def make_index(bands: np.ndarray, seed: int = 3) -> PeerIndex:
+    rng = np.random.default_rng(seed)
+    arrays = sort_arrays(
+        {
+            "employee_ids": np.arange(1, len(bands) + 1, dtype=np.int32),
+            "bands": bands.astype(np.int16),
+            "vectors": rng.normal(size=(len(bands), 8)).astype(np.float32),
+        }
+    )
+    return PeerIndex(1, **arrays)
+
+
+def brute_force(index: PeerIndex, row: int, start: int, end: int) -> np.ndarray:
+    vectors = index.vectors.astype(np.float64)
+    distances = np.sqrt(((vectors[start:end] - vectors[row]) ** 2).sum(axis=1))
+    if start <= row < end:
+        distances[row - start] = np.inf
+    return distances
+
+
+def test_nearest_block_matches_brute_force() -> None:
+    index = make_index(np.zeros(60))
+    rows = np.array([0, 7, 59])
+    neighbours, distances = index.nearest_block(rows, 0, 60, 5)
+
+    assert neighbours.shape == distances.shape == (3, 5)
+    for row, row_neighbours, row_distances in zip(rows, neighbours, distances):
+        expected = brute_force(index, row, 0, 60)
+        assert row not in row_neighbours
+        assert row_neighbours.tolist() == np.argsort(expected)[:5].tolist()
+        np.testing.assert_allclose(row_distances, np.sort(expected)[:5], rtol=1e-4, atol=1e-4)
+
+
+def test_nearest_block_outside_rows() -> None:
+    index = make_index(np.zeros(40))
+    neighbours, distances = index.nearest_block(np.array([0, 1]), 20, 40, 3)
+
+    for row, row_neighbours in zip([0, 1], neighbours):
+        assert ((row_neighbours >= 20) & (row_neighbours < 40)).all()
+        assert row_neighbours.tolist() == (20 + np.argsort(brute_force(index, row, 20, 40))[:3]).tolist()
+
+
+def test_nearest_block_caps_k() -> None:
+    index = make_index(np.zeros(4))
+    neighbours, _ = index.nearest_block(np.array([2]), 0, 4, 10)
+
+    assert sorted(neighbours[0].tolist()) == [0, 1, 3]
+
+
+def test_nearest_searches_own_band_or_everyone() -> None:
+    bands = np.array([0] * 30 + [1] * 3)
+    index = make_index(bands)
+    row = 5
+    neighbours, _ = index.nearest(row, 4)
+    assert (index.bands[neighbours] == index.bands[row]).all()
+
+    # В группе 1 меньше k + 1 сотрудников: поиск по всему индексу
+    small = int(np.flatnonzero(index.bands == 1)[0])
+    neighbours, _ = index.nearest(small, 4)
+    assert len(neighbours) == 4
+    assert neighbours.tolist() == np.argsort(brute_force(index, small, 0, len(index)))[:4].tolist()
+
+
+def test_iter_nearest_covers_every_row_once() -> None:
+    index = make_index(np.array([0] * 25 + [1] * 12 + [2] * 2))
+    seen = []
+    for rows, neighbours, _ in index.iter_nearest(3, block_cells=50):
+        assert neighbours.shape == (len(rows), 3)
+        seen.extend(rows.tolist())
+
+    assert sorted(seen) == list(range(len(index)))
+
+
+def test_row_of() -> None:
+    index = make_index(np.array([2, 0, 1, 0]))
+
+    for row, employee_id in enumerate(index.employee_ids):
+        assert index.row_of(int(employee_id)) == row
+    assert index.row_of(100) is None
+
+
+def test_merge_arrays() -> None:
+    previous = sort_arrays(
+        {
+            "employee_ids": np.array([1, 2, 3, 4], dtype=np.int32),
+            "bands": np.array([0, 1, 0, 1], dtype=np.int16),
+            "vectors": np.array([[1.0], [2.0], [3.0], [4.0]], dtype=np.float32),
+        }
+    )
+    fresh = {
+        "employee_ids": np.array([2, 5], dtype=np.int32),
+        "bands": np.array([0, 1], dtype=np.int16),
+        "vectors": np.array([[20.0], [50.0]], dtype=np.float32),
+    }
+    # Сотрудник 3 изменился, но в свежих данных его нет - удалён
+    merged = merge_arrays(previous, [2, 3, 5], fresh)
+
+    assert merged["employee_ids"].tolist() == [1, 2, 4, 5]
+    assert merged["bands"].tolist() == [0, 0, 1, 1]
+    assert merged["vectors"][:, 0].tolist() == [1.0, 20.0, 4.0, 50.0]
+
+
+def test_last_observed_months() -> None:
+    kpi = np.full((3, MONTHS), nan)
+    kpi[0, [0, 4]] = 1.0
+    kpi[1, MONTHS - 1] = 1.0
+
+    assert last_observed_months(kpi).tolist() == [4, MONTHS - 1, -1]
+
+
+def test_peer_percentiles() -> None:
+    kpi = np.full((6, MONTHS), nan)
+    kpi[:, 2] = [1.0, 0.5, 1.0, 1.5, nan, 2.0]
+    # У сотрудника 4 нет KPI за год, у сотрудника 5 коллеги без KPI за его последний месяц
+    kpi[5, 3] = 2.0
+    kpi[4, :] = nan
+    months = last_observed_months(kpi)
+    rows = np.array([0, 4, 5])
+    neighbours = np.array([[1, 2, 3, 4], [0, 1, 2, 3], [0, 1, 2, 3]])
+
+    result = peer_percentiles(kpi, months, rows, neighbours)
+
+    assert result["rows"].tolist() == [0]
+    assert result["kpi_month"].tolist() == [3]
+    assert result["kpi_value"].tolist() == [1.0]
+    assert result["peer_count"].tolist() == [3]
+    # Коллеги 0.5, 1.0, 1.5: один ниже, один равен
+    assert result["peer_percentile"][0] == pytest.approx(100 * 1.5 / 3)
+    assert result["peer_kpi_median"][0] == pytest.approx(1.0)
+
+
+def test_peer_median_of_even_count() -> None:
+    kpi = np.full((5, MONTHS), nan)
+    kpi[:, 0] = [1.0, 0.2, 0.4, 0.8, 1.6]
+    months = last_observed_months(kpi)
+
+    result = peer_percentiles(kpi, months, np.array([0]), np.array([[1, 2, 3, 4]]))
+
+    assert result["peer_kpi_median"][0] == pytest.approx(0.6)
+    assert result["peer_percentile"][0] == pytest.approx(75.0)
@@ -0,0 +1,85 @@
+from typing import List
+
+import numpy as np
+import pytest
+
+from app.scoring.engine import DEFAULT_DAYS_SINCE_VACATION, MONTHS, KPIMatrix, compute_features
+
+
+def make_matrix(kpi: List[List[float]], days_since_vacation: List[float]) -> KPIMatrix:
+    size = len(kpi)
+    return KPIMatrix(
+        employee_ids=np.arange(1, size + 1, dtype=np.int64),
+        kpi=np.array(kpi, dtype=np.float64),
+        tenure_years=np.ones(size),
+        age=np.full(size, 30.0),
+        has_subordinates=np.zeros(size, dtype=bool),
+        took_sick_leave=np.zeros(size, dtype=bool),
+        has_disciplinary_action=np.zeros(size, dtype=bool),
+        participates_in_corporate_events=np.zeros(size, dtype=bool),
+        days_since_vacation=np.array(days_since_vacation, dtype=np.float64),
+    )
+
+
+def padded(values: List[float]) -> List[float]:
+    return values + [np.nan] * (MONTHS - len(values))
+
+
+def test_linear_trend() -> None:
+    matrix = make_matrix([[1.0 + 0.1 * month for month in range(MONTHS)]], [10.0])
+    features = compute_features(matrix)
+
+    assert features["trend_slope"][0] == pytest.approx(0.1)
+    assert features["max_drop"][0] == 0.0
+    assert features["kpi_months"][0] == MONTHS
+
+
+def test_max_drop_skips_missing_months() -> None:
+    # Падение через пропущенный месяц не считается падением между соседними месяцами
+    matrix = make_matrix([padded([1.0, 0.7, 0.9, np.nan, 0.1])], [10.0])
+    features = compute_features(matrix)
+
+    assert features["max_drop"][0] == pytest.approx(0.3)
+    assert features["kpi_months"][0] == 4
+    assert features["kpi_mean"][0] == pytest.approx((1.0 + 0.7 + 0.9 + 0.1) / 4)
+
+
+def test_zscore_of_last_month() -> None:
+    matrix = make_matrix([padded([1.0, 1.2, 1.0, 1.2, 0.5])], [10.0])
+    features = compute_features(matrix)
+
+    # Среднее предыдущих месяцев 1.1, стандартное отклонение 0.1
+    assert features["kpi_zscore"][0] == pytest.approx(-6.0)
+
+
+def test_constant_kpi() -> None:
+    matrix = make_matrix([[0.8] * MONTHS], [10.0])
+    features = compute_features(matrix)
+
+    assert features["volatility"][0] == pytest.approx(0.0)
+    assert features["trend_slope"][0] == pytest.approx(0.0)
+    assert features["kpi_zscore"][0] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_employee_without_kpi() -> None:
+    matrix = make_matrix([[np.nan] * MONTHS], [np.nan])
+    features = compute_features(matrix)
+
+    for name in ("trend_slope", "max_drop", "volatility", "kpi_zscore", "kpi_mean"):
+        assert features[name][0] == 0.0, name
+    assert features["kpi_months"][0] == 0
+    assert features["days_since_vacation"][0] == DEFAULT_DAYS_SINCE_VACATION
+
+
+def test_rows_are_independent() -> None:
+    rows = [
+        [1.0 + 0.1 * month for month in range(MONTHS)],
+        padded([1.0, 1.2, 1.0, 1.2, 0.5]),
+        [np.nan] * MONTHS,
+    ]
+    together = compute_features(make_matrix(rows, [10.0, 20.0, np.nan]))
+
+    for index, row in enumerate(rows):
+        alone = compute_features(make_matrix([row], [10.0]))
+        for name in ("trend_slope", "max_drop", "volatility", "kpi_zscore", "kpi_mean"):
+            assert together[name][index] == pytest.approx(alone[name][0]), name
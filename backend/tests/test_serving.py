@@ -0,0 +1,74 @@
+import asyncio
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from app.features.store import FEATURE_DTYPE, FeatureSnapshot
+from app.serving import model as serving_model
+from app.serving.batcher import MicroBatcher
+from app.serving.model import FormulaModel, predict_requests
+from app.serving.schema import BatchPredictRequest, PredictRequest
+
+
+class FakeStore:
+    def __init__(self, snapshot: FeatureSnapshot) -> None:
+        self._snapshot = snapshot
+
+    def snapshot(self) -> FeatureSnapshot:
+        return self._snapshot
+
+
+@pytest.fixture(autouse=True)
+def feature_store(monkeypatch: pytest.MonkeyPatch) -> None:
+    records = np.zeros(2, dtype=FEATURE_DTYPE)
+    records["employee_id"] = [5, 7]
+    records["days_since_vacation"] = [30.0, 400.0]
+    records["took_sick_leave"] = [False, True]
+    snapshot = FeatureSnapshot(1, records)
+    monkeypatch.setattr(serving_model, "get_feature_store", lambda kpi_year: FakeStore(snapshot))
+
+
+@pytest.mark.parametrize("employee_id", [0, 2**31, 2**32 + 5, 2**70])
+def test_predict_request_rejects_out_of_range_ids(employee_id: int) -> None:
+    with pytest.raises(ValidationError):
+        PredictRequest(employee_id=employee_id)
+    with pytest.raises(ValidationError):
+        BatchPredictRequest(employee_ids=[5, employee_id])
+
+
+def test_predict_requests() -> None:
+    results = predict_requests(FormulaModel(), [(2025, [5, 6]), (2025, [7])])
+
+    assert results[0][0] is not None and results[0][1] is None
+    assert results[1][0] is not None
+    assert results[0][0] != results[1][0]
+
+
+def test_out_of_range_id_is_not_another_employee() -> None:
+    (wrapped,) = predict_requests(FormulaModel(), [(2025, [2**32 + 5])])
+
+    assert wrapped == [None]
+
+
+async def test_bad_request_does_not_fail_its_batch() -> None:
+    model = FormulaModel()
+
+    def handler(requests: Sequence[Tuple[int, List[int]]]) -> List[List[Optional[float]]]:
+        return predict_requests(model, requests)
+
+    batcher = MicroBatcher(handler, max_items=100, max_wait_ms=50)
+    await batcher.start()
+    try:
+        good, huge, wrapped = await asyncio.gather(
+            batcher.submit((2025, [5, 7]), size=2),
+            batcher.submit((2025, [2**70]), size=1),
+            batcher.submit((2025, [2**32 + 5]), size=1),
+        )
+    finally:
+        await batcher.stop()
+
+    assert good == predict_requests(model, [(2025, [5, 7])])[0]
+    assert huge == [None]
+    assert wrapped == [None]
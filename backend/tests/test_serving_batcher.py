@@ -0,0 +1,78 @@
+import asyncio
+from typing import List, Sequence
+
+import pytest
+
+from app.serving.batcher import MicroBatcher
+
+
+class Handler:
+    def __init__(self) -> None:
+        self.batches: List[List[int]] = []
+
+    def __call__(self, items: Sequence[int]) -> List[int]:
+        self.batches.append(list(items))
+        return [item * 10 for item in items]
+
+
+async def test_concurrent_requests_share_a_batch() -> None:
+    handler = Handler()
+    batcher = MicroBatcher(handler, max_items=10, max_wait_ms=50)
+    await batcher.start()
+    try:
+        results = await asyncio.gather(*(batcher.submit(item) for item in range(5)))
+    finally:
+        await batcher.stop()
+
+    assert results == [0, 10, 20, 30, 40]
+    assert handler.batches == [[0, 1, 2, 3, 4]]
+
+
+async def test_batch_is_closed_at_max_items() -> None:
+    handler = Handler()
+    batcher = MicroBatcher(handler, max_items=4, max_wait_ms=50)
+    await batcher.start()
+    try:
+        results = await asyncio.gather(batcher.submit(1, size=3), batcher.submit(2, size=3), batcher.submit(3))
+    finally:
+        await batcher.stop()
+
+    assert results == [10, 20, 30]
+    assert handler.batches == [[1, 2], [3]]
+
+
+async def test_handler_error_fails_the_batch() -> None:
+    def failing(items: Sequence[int]) -> List[int]:
+        raise ValueError("boom")
+
+    batcher = MicroBatcher(failing, max_items=10, max_wait_ms=10)
+    await batcher.start()
+    try:
+        with pytest.raises(ValueError):
+            await batcher.submit(1)
+        # После ошибки пачки батчер продолжает работать
+        batcher.handler = Handler()
+        assert await batcher.submit(2) == 20
+    finally:
+        await batcher.stop()
+
+
+async def test_stop_fails_collected_requests() -> None:
+    handler = Handler()
+    batcher = MicroBatcher(handler, max_items=10, max_wait_ms=10_000)
+    await batcher.start()
+    submitted = asyncio.ensure_future(batcher.submit(1))
+    # Запрос уже взят из очереди, и пачка ждёт следующих
+    await asyncio.sleep(0.05)
+    await batcher.stop()
+
+    with pytest.raises(RuntimeError):
+        await asyncio.wait_for(submitted, 1)
+    assert handler.batches == []
+
+
+async def test_submit_before_start() -> None:
+    batcher = MicroBatcher(Handler(), max_items=10, max_wait_ms=10)
+
+    with pytest.raises(RuntimeError):
+        await batcher.submit(1)
@@ -0,0 +1,113 @@
+from datetime import date
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from app.scoring.engine import MONTHS, KPIMatrix, combine_risk, compute_features
+from app.simulation.engine import Baseline, _simulate_chunk, cohort_rows, take_rows
+from app.simulation.schema import CohortFilter, KPIPerturbation, Scenario
+
+SIZE = 200
+
+
+@pytest.fixture(scope="module")
+def baseline() -> Baseline:
+    rng = np.random.default_rng(7)
+    kpi = rng.uniform(0.5, 1.5, (SIZE, MONTHS))
+    kpi[rng.random((SIZE, MONTHS)) < 0.1] = np.nan
+    age = rng.integers(20, 65, SIZE).astype(np.float64)
+    age[::17] = np.nan
+    matrix = KPIMatrix(
+        employee_ids=np.arange(1, SIZE + 1, dtype=np.int64),
+        kpi=kpi,
+        tenure_years=rng.uniform(0, 20, SIZE),
+        age=age,
+        has_subordinates=rng.random(SIZE) < 0.2,
+        took_sick_leave=rng.random(SIZE) < 0.3,
+        has_disciplinary_action=rng.random(SIZE) < 0.1,
+        participates_in_corporate_events=rng.random(SIZE) < 0.5,
+        days_since_vacation=rng.uniform(0, 500, SIZE),
+    )
+    features = compute_features(matrix)
+    return Baseline(2025, date(2025, 12, 31), matrix, features, combine_risk(matrix, features), 0.0)
+
+
+def expected_scores(baseline: Baseline, rows: np.ndarray, scenario: Scenario) -> np.ndarray:
+    """
+    Сценарий, посчитанный напрямую: изменённая копия строк когорты и полный расчёт оценки.
+    """
+    matrix = take_rows(baseline.matrix, rows)
+    if scenario.kpi is not None:
+        months = np.asarray(scenario.kpi.months) - 1
+        matrix.kpi[:, months] = matrix.kpi[:, months] * scenario.kpi.scale + scenario.kpi.shift
+    if scenario.days_since_vacation is not None:
+        matrix.days_since_vacation = np.full(len(rows), scenario.days_since_vacation)
+    for flag in ("took_sick_leave", "has_disciplinary_action", "participates_in_corporate_events", "has_subordinates"):
+        value = getattr(scenario, flag)
+        if value is not None:
+            setattr(matrix, flag, np.full(len(rows), value))
+    return combine_risk(matrix, compute_features(matrix))
+
+
+def test_cohort_rows_by_attributes(baseline: Baseline) -> None:
+    matrix = baseline.matrix
+    cohort = CohortFilter(min_tenure_years=2, max_tenure_years=10, min_age=30, took_sick_leave=True)
+    rows = cohort_rows(matrix, cohort)
+
+    expected = np.flatnonzero(
+        (matrix.tenure_years >= 2) & (matrix.tenure_years <= 10) & (matrix.age >= 30) & matrix.took_sick_leave
+    )
+    assert rows.tolist() == expected.tolist()
+    assert not np.isnan(matrix.age[rows]).any()
+
+
+def test_cohort_rows_by_ids(baseline: Baseline) -> None:
+    rows = cohort_rows(baseline.matrix, CohortFilter(employee_ids=[5, 3, 10_000]))
+
+    assert baseline.matrix.employee_ids[rows].tolist() == [3, 5]
+
+
+def test_cohort_rows_without_conditions(baseline: Baseline) -> None:
+    assert len(cohort_rows(baseline.matrix, CohortFilter())) == SIZE
+
+
+def test_unchanged_scenario_keeps_baseline(baseline: Baseline) -> None:
+    rows = np.arange(0, SIZE, 3)
+    scores = _simulate_chunk(baseline, rows, [Scenario(name="как есть")])
+
+    assert scores.shape == (1, len(rows))
+    np.testing.assert_allclose(scores[0], baseline.scores[rows])
+
+
+def test_scenarios_match_direct_calculation(baseline: Baseline) -> None:
+    rows = cohort_rows(baseline.matrix, CohortFilter(min_tenure_years=1))
+    scenarios = [
+        Scenario(name="снижение цели", kpi=KPIPerturbation(scale=1 / 0.9)),
+        Scenario(name="отпуск", days_since_vacation=0),
+        Scenario(name="провал весны", kpi=KPIPerturbation(months=[3, 4, 5], scale=0.5, shift=-0.1)),
+        Scenario(name="без выговоров", has_disciplinary_action=False, participates_in_corporate_events=True),
+        Scenario(name="как есть"),
+    ]
+    scores = _simulate_chunk(baseline, rows, scenarios)
+
+    assert scores.shape == (len(scenarios), len(rows))
+    for index, scenario in enumerate(scenarios):
+        np.testing.assert_allclose(scores[index], expected_scores(baseline, rows, scenario), err_msg=scenario.name)
+
+
+def test_baseline_is_not_modified(baseline: Baseline) -> None:
+    kpi = baseline.matrix.kpi.copy()
+    features = {name: values.copy() for name, values in baseline.features.items()}
+    rows = np.arange(SIZE)
+    _simulate_chunk(baseline, rows, [Scenario(name="отпуск", days_since_vacation=0, kpi=KPIPerturbation(shift=1))])
+
+    np.testing.assert_array_equal(baseline.matrix.kpi, kpi)
+    for name, values in features.items():
+        np.testing.assert_array_equal(baseline.features[name], values)
+
+
+@pytest.mark.parametrize("employee_id", [0, 2**31, 2**70])
+def test_cohort_rejects_out_of_range_ids(employee_id: int) -> None:
+    with pytest.raises(ValidationError):
+        CohortFilter(employee_ids=[1, employee_id])